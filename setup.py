@@ -16,7 +16,8 @@ setup(
     long_description_content_type="text/markdown",
     long_description=LONG_DESCRIPTION,
     packages=find_packages(),
-    install_requires=['requests', 'aiohttp', 'aenum', 'attr', 'pycryptodome', 'datetime', 'munch', 'websockets'],
+    install_requires=['requests', 'aiohttp', 'aenum', 'attr', 'pycryptodome', 'datetime', 'munch', 'websockets>=14'],
+    extras_require={'fast': ['orjson']},
     keywords=['python', 'zalo', 'api', 'zalo api', 'zalo chat', 'requests'],
     classifiers=[
 		"Development Status :: 3 - Alpha",
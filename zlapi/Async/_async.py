@@ -3,7 +3,7 @@ import random
 import websockets
 
 from . import _state
-from .. import _util
+from .. import _util, _flight, _ratelimit, _retry, _outbox, _offload, _recent, _executor, _events, _supervisor, _backfill
 from ..models import *
 from .._package import *
 from ..logging import Logging
@@ -14,7 +14,7 @@ pool = ThreadPoolExecutor()
 logger = Logging(theme="catppuccin-mocha", log_text_color="black")
 
 class ZaloAPI(object):
-	def __init__(self, phone, password, imei, session_cookies=None, user_agent=None, auto_login=True):
+	def __init__(self, phone, password, imei, session_cookies=None, user_agent=None, auto_login=True, connector_options=None, transport=None, coalesce=False, rate_limit=None, retry=None, outbox_workers=8, prewarm=False, offload_frames=None, recent_messages=50, handler_workers=16, event_queue=None, reconnect_policy=None, backfill=True):
 		"""Initialize and log in the client.
 		
 		Args:
@@ -24,12 +24,49 @@ class ZaloAPI(object):
 			auto_login (bool): Automatically log in when initializing ZaloAPI (Default: True)
 			user_agent (str): Custom user agent to use when sending requests. If `None`, user agent will be chosen from a premade list
 			session_cookies (dict): Cookies from a previous session (Required if logging in with cookies)
+			connector_options (dict): Options for the pooled HTTP connector (``limit``, ``limit_per_host``, ``keepalive_timeout``, ``ttl_dns_cache``)
+			transport (AsyncTransport): Custom HTTP transport (e.g. ``AiohttpTransport(base_url=...)`` pointing at ``zlapi.mock.MockZaloServer``)
+			coalesce (bool): Collapse identical concurrent fetch/get requests into one network call (Default: False).
+				All waiting callers receive the same result object
+			rate_limit (bool | RateLimiter): Pace send/admin requests with an adaptive token bucket per endpoint family
+				and thread (Default: None). Pass ``True`` for the defaults or a configured ``RateLimiter``
+			retry (bool | RetryPolicy): Retry idempotent reads on transient errors with jittered exponential backoff,
+				and optionally hedge them (Default: None). Pass ``True`` for the defaults or a configured ``RetryPolicy``
+			outbox_workers (int): Number of sends the ordered ``outbox`` runs at the same time (Default: 8)
+			prewarm (bool): Resolve the Zalo hosts and open keep-alive connections to them right after login (Default: False)
+			offload_frames (bool | int): Decrypt and decompress websocket frames of at least this many bytes in worker processes,
+				keeping the receive loop responsive (Default: None). ``True`` offloads frames from 256 KiB
+			recent_messages (int): Recent messages cached per group by the listener, so an incoming group message
+				only costs a ``getRecentGroup`` fetch the first time its group is seen (Default: 50)
+			handler_workers (int): Number of ``thread=True`` handlers running at the same time. Handlers of the same
+				conversation run one at a time in arrival order, different conversations concurrently (Default: 16)
+			event_queue (bool | EventQueue): Queue decoded websocket frames in a bounded ``EventQueue`` dispatched apart from
+				the receive loop (Default: None). Pass ``True`` for the defaults or a configured ``EventQueue``
+			reconnect_policy (ReconnectPolicy): Backoff between listener reconnects (Default: exponential with jitter from the
+				``reconnect`` delay of ``listen`` up to 5 minutes, at most 30 attempts per 10 minutes)
+			backfill (bool | Backfill): After a websocket reconnect, replay the messages missed while disconnected before the live
+				ones, within the time and request budget of a ``Backfill`` (Default: True)
 			
 		Raises:
 			ZaloLoginError: On failed login
 			LoginMethodNotSupport: If method login not support
 		"""
-		self._state = _state.State()
+		self._state = _state.State(transport, **(connector_options or {}))
+		self._flight = _flight.SingleFlight() if coalesce else None
+		self._limiter = _ratelimit.RateLimiter() if rate_limit is True else rate_limit or None
+		self._retry = _retry.RetryPolicy() if retry is True else retry or None
+		self.outbox = _outbox.AsyncOutbox(self, outbox_workers)
+		self._prewarm = prewarm
+		self._offload = _offload.threshold(offload_frames)
+		self._recent = _recent.RecentMessages(recent_messages)
+		self._handlers = _executor.AsyncKeyedExecutor(handler_workers)
+		self._events = _events.EventQueue() if event_queue is True else event_queue or None
+		self._reconnect_policy = reconnect_policy or _supervisor.ReconnectPolicy()
+		self._supervisor = None
+		self._ws = None
+		self._overlap = _supervisor.OverlapFilter()
+		self._backfill = _backfill.Backfill() if backfill is True else backfill or None
+		self._cursors = _backfill.Cursors()
 		self._condition = threading.Event()
 		self._undefined = object()
 		self._listening = False
@@ -57,6 +94,56 @@ class ZaloAPI(object):
 	async def _post(self, *args, **kwargs):
 		return await self._state._post(*args, **kwargs)
 	
+	async def prewarmConnections(self, families=None, connections=1):
+		"""Resolve the Zalo hosts and open keep-alive connections to them in parallel.
+		
+		Args:
+			families (list): Host families to warm, e.g. ``["chat", "group"]`` (Default: all)
+			connections (int): Connections to open per host (Default: 1)
+			
+		Returns:
+			dict: ``{url: error}`` with ``None`` for the hosts that were warmed
+		"""
+		return await self._state.prewarm(families, connections)
+	
+	def getHandlerStats(self):
+		"""Retrieve the counters of the executor running ``thread=True`` handlers.
+		
+		Returns:
+			dict: Queue depth (``queued``, ``max_depth``), ``running`` handlers, conversation ``lanes``
+			and handler latency (``wait_avg``, ``wait_max``, ``run_avg``, ``run_max``, in seconds)
+		"""
+		return self._handlers.stats()
+	
+	def getConnectionState(self):
+		"""Retrieve the state of the listener connection.
+		
+		Returns:
+			str: ``connecting``, ``live``, ``draining``, ``backoff`` or ``stopped``
+		"""
+		return self._supervisor.state if self._supervisor is not None else _supervisor.STOPPED
+	
+	def getEventStats(self):
+		"""Retrieve the counters of the ``event_queue`` between the websocket and the handlers.
+		
+		Returns:
+			dict: Queue ``depth``, ``dropped`` frames per command, ``spilled`` frames and enqueue to dispatch
+			latency (``latency_avg``, ``latency_max``, in seconds), see ``EventQueue.stats``. ``None`` without a queue
+		"""
+		return self._events.stats() if self._events is not None else None
+	
+	async def close(self):
+		"""Finish the queued handlers and ``outbox`` sends and close the HTTP transport used to send requests."""
+		await self._handlers.join()
+		await self.outbox.close()
+		await self._state.close()
+	
+	async def __aenter__(self):
+		return self
+	
+	async def __aexit__(self, *exc_info):
+		await self.close()
+	
 	"""
 	END INTERNAL REQUEST METHODS
 	"""
@@ -66,10 +153,10 @@ class ZaloAPI(object):
 	"""
 	
 	def _encode(self, params):
-		return _util.zalo_encode(params, self._state._config.get("secret_key"))
+		return self._state.get_codec().encode(_retry.mark_attempt(params))
 		
 	def _decode(self, params):
-		return _util.zalo_decode(params, self._state._config.get("secret_key")) 
+		return self._state.get_codec().decode(params)
 	
 	def run_in_thread(self, func, *args, **kwargs):
 		def run_async():
@@ -186,6 +273,9 @@ class ZaloAPI(object):
 			self._imei = None
 			self.uid = self._state.user_id
 		
+		if self._prewarm:
+			await self.prewarmConnections()
+		
 		await self.onLoggedIn(self._state._config.get("phone_number"))
 		
 	"""
@@ -256,7 +346,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -274,6 +364,8 @@ class ZaloAPI(object):
 	FETCH METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetchAccountInfo(self):
 		"""fetch account information of the client 
 		
@@ -305,7 +397,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -315,6 +407,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetchPhoneNumber(self, phoneNumber, language="vi"):
 		"""Fetch user info by Phone Number.
 		
@@ -356,7 +450,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -366,6 +460,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetchUserInfo(self, userId):
 		"""Fetch user info by ID.
 		
@@ -415,7 +511,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -425,11 +521,14 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	async def fetchGroupInfo(self, groupId):
+	@_flight.coalesce
+	@_retry.idempotent
+	async def fetchGroupInfo(self, groupId, columnar=False):
 		"""Fetch group info by ID.
 		
 		Args:
 			groupId (int | str | dict): Group(s) ID to get info
+			columnar (bool): Return the members in ``currentMems`` as a ``Directory`` (Default: False)
 		
 		Returns:
 			object: `Group` group info
@@ -441,7 +540,8 @@ class ZaloAPI(object):
 		
 		params = {
 			"zpw_ver": 647,
-			"zpw_type": 30
+			"zpw_type": 30,
+			"nretry": 0
 		}
 		
 		payload = {
@@ -456,7 +556,7 @@ class ZaloAPI(object):
 		else:
 			payload["params"]["gridVerMap"][str(groupId)] = 0
 			
-		payload["params"]["gridVerMap"] = json.dumps(payload["params"]["gridVerMap"])
+		payload["params"]["gridVerMap"] = _util.json_dumps(payload["params"]["gridVerMap"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post("https://tt-group-wpa.chat.zalo.me/api/group/getmg-v2", params=params, data=payload)
@@ -469,32 +569,28 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
+			if columnar:
+				for info in (results.get("gridInfoMap") or {}).values():
+					if isinstance(info, dict) and isinstance(info.get("currentMems"), list):
+						info["currentMems"] = Directory(info["currentMems"], key="id")
+			
 			return Group.fromDict(results, None)
 		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	async def fetchAllFriends(self):
-		"""Fetch all users the client is currently chatting with (only friends).
-		
-		Returns:
-			object: `User` all friend IDs
-			any: If response is not list friends
-			
-		Raises:
-			ZaloAPIException: If request failed
-		"""
-		
+	@_retry.idempotent
+	async def _fetchFriendsPage(self, page, count):
 		params = {
 			"params": self._encode({
 				"incInvalid": 0,
-				"page": 1,
-				"count": 20000,
+				"page": page,
+				"count": count,
 				"avatar_size": 120,
 				"actiontime": 0
 			}),
@@ -506,18 +602,72 @@ class ZaloAPI(object):
 		data = await self._get("https://profile-wpa.chat.zalo.me/api/social/friend/getfriends", params=params)
 		results = data.get("data") if data.get("error_code") == 0 else None
 		if results:
-			results = self._decode(results)
-			datas = []
-			if results.get("data"):
-				for data in results.get("data"):
-					datas.append(User(**data))
-			
-			return datas
-					
+			return self._decode(results).get("data") or []
+		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
+	
+	@_flight.coalesce
+	async def fetchAllFriends(self, columnar=False):
+		"""Fetch all users the client is currently chatting with (only friends).
+		
+		Args:
+			columnar (bool): Return a ``Directory`` instead of a list of ``User`` (Default: False)
+		
+		Returns:
+			object: `User` all friend IDs
+			any: If response is not list friends
+			
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		friends = await self._fetchFriendsPage(1, 20000)
+		if columnar:
+			return Directory(friends)
 		
+		return [User(**data) for data in friends]
+	
+	async def iterFriends(self, page_size=500, read_ahead=True):
+		"""Iterate over all friends, one page at a time.
+		
+		Unlike ``fetchAllFriends``, friends are yielded as soon as their page is
+		decoded and only about two pages are held in memory.
+		
+		Args:
+			page_size (int): Friends requested per page (Default: 500)
+			read_ahead (bool): Fetch the next page while the current one is consumed (Default: True)
+		
+		Yields:
+			User: One friend at a time
+		
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		page = 1
+		ahead = None
+		friends = await self._fetchFriendsPage(page, page_size)
+		try:
+			while friends:
+				if read_ahead and len(friends) >= page_size:
+					ahead = asyncio.ensure_future(self._fetchFriendsPage(page + 1, page_size))
+				
+				for data in friends:
+					yield User(**data)
+				
+				if len(friends) < page_size:
+					return
+				
+				page += 1
+				friends = await ahead if ahead else await self._fetchFriendsPage(page, page_size)
+				ahead = None
+		
+		finally:
+			if ahead and not ahead.done():
+				ahead.cancel()
+	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetchAllGroups(self):
 		"""Fetch all group IDs are joining and chatting.
 		
@@ -544,7 +694,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -562,6 +712,8 @@ class ZaloAPI(object):
 	GET METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def getLastMsgs(self):
 		"""Get last message the client's friends/group chat room.
 			
@@ -576,9 +728,10 @@ class ZaloAPI(object):
 			"zpw_ver": "647",
 			"zpw_type": "30",
 			"params": self._encode({
-				"threadIdLocalMsgId": json.dumps({}),
+				"threadIdLocalMsgId": _util.json_dumps({}),
 				"imei": self._imei
-			})
+			}),
+			"nretry": 0
 		}
 		
 		data = await self._get("https://tt-convers-wpa.chat.zalo.me/api/preloadconvers/get-last-msgs", params=params)
@@ -591,7 +744,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -601,11 +754,15 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	async def getRecentGroup(self, groupId):
+	@_flight.coalesce
+	@_retry.idempotent
+	async def getRecentGroup(self, groupId, globalMsgId=None, count=50):
 		"""Get recent messages in group by ID.
 			
 		Args:
 			groupId (int | str): Group ID to get recent msgs
+			globalMsgId (int | str): Get the messages older than this message ID, to page back (Default: the latest ones)
+			count (int): Number of messages to get (Default: 50)
 			
 		Returns:
 			object: `Group` List msg data in groupMsgs
@@ -617,8 +774,8 @@ class ZaloAPI(object):
 		params = {
 			"params": self._encode({
 				"groupId": str(groupId),
-				"globalMsgId": 10000000000000000,
-				"count": 50,
+				"globalMsgId": int(globalMsgId) if globalMsgId else 10000000000000000,
+				"count": count,
 				"msgIds": [],
 				"imei": self._imei,
 				"src": 1
@@ -632,13 +789,13 @@ class ZaloAPI(object):
 		results = data.get("data") if data.get("error_code") == 0 else None
 		if results:
 			results = self._decode(results)
-			results = json.loads(results.get("data")) if results.get("error_code") == 0 else results
+			results = _util.json_loads(results.get("data")) if results.get("error_code") == 0 else results
 			if results == None:
 				results = {"error_code": 1337, "error_message": "Data is None"}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -648,6 +805,11 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	async def _fetchRecentGroupMsgs(self, groupId, globalMsgId=None):
+		return (await self.getRecentGroup(groupId, globalMsgId)).groupMsgs or []
+	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def _getGroupBoardList(self, board_type, page, count, last_id, last_type, groupId):
 		params = {
 			"params": self._encode({
@@ -673,7 +835,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -801,12 +963,12 @@ class ZaloAPI(object):
 		
 		payload = {
 			"params": self._encode({
-				"profile": json.dumps({
+				"profile": _util.json_dumps({
 					"name": name,
 					"dob": dob,
 					"gender": int(gender)
 				}),
-				"biz": json.dumps(biz),
+				"biz": _util.json_dumps(biz),
 				"language": language
 			})
 		}
@@ -821,7 +983,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -862,7 +1024,7 @@ class ZaloAPI(object):
 				"avatarSize": 120,
 				"clientId": str(self.uid) + _util.formatTime("%H:%M %d/%m/%Y"),
 				"language": language,
-				"metaData": json.dumps({
+				"metaData": _util.json_dumps({
 					"origin": {
 						"width": width,
 						"height": height
@@ -886,7 +1048,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -904,6 +1066,7 @@ class ZaloAPI(object):
 	USER ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def sendFriendRequest(self, userId, msg, language="vi"):
 		"""Send friend request to a user by ID.
 			
@@ -931,7 +1094,7 @@ class ZaloAPI(object):
 				"reqsrc": 30,
 				"imei": self._imei,
 				"language": language,
-				"srcParams": json.dumps({
+				"srcParams": _util.json_dumps({
 					"uidTo": str(userId)
 				})
 			})
@@ -947,7 +1110,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -957,6 +1120,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def acceptFriendRequest(self, userId, language="vi"):
 		"""Accept friend request from user by ID.
 			
@@ -993,7 +1157,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1003,6 +1167,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def blockViewFeed(self, userId, isBlockFeed):
 		"""Block/Unblock friend view feed by ID.
 			
@@ -1040,7 +1205,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1050,6 +1215,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def blockUser(self, userId):
 		"""Block user by ID.
 			
@@ -1085,7 +1251,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1095,6 +1261,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def unblockUser(self, userId):
 		"""Unblock user by ID.
 			
@@ -1130,7 +1297,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1148,6 +1315,7 @@ class ZaloAPI(object):
 	GROUP ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("group_admin")
 	async def createGroup(self, name=None, description=None, members=[], nameChanged=1, createLink=1):
 		"""Create a new group.
 			
@@ -1205,7 +1373,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1215,6 +1383,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def changeGroupAvatar(self, filePath, groupId):
 		"""Upload/Change group avatar by ID.
 		
@@ -1262,7 +1431,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1272,6 +1441,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def changeGroupName(self, groupName, groupId):
 		"""Set/Change group name by ID.
 		
@@ -1312,7 +1482,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1325,6 +1495,7 @@ class ZaloAPI(object):
 	async def changeGroupDesc(self, groupDesc, groupId):
 		"""Not Available Yet"""
 	
+	@_ratelimit.limited("group_admin")
 	async def changeGroupSetting(self, groupId, defaultMode="default", **kwargs):
 		"""Update group settings by ID.
 		
@@ -1433,7 +1604,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1443,6 +1614,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def changeGroupOwner(self, newAdminId, groupId):
 		"""Change group owner (yellow key) by ID.
 		
@@ -1481,7 +1653,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1491,6 +1663,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def addUsersToGroup(self, user_ids, groupId):
 		"""Add friends/users to a group.
 			
@@ -1541,7 +1714,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1551,6 +1724,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def kickUsersInGroup(self, members, groupId):
 		"""Kickout members in group by ID.
 		
@@ -1594,7 +1768,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1604,6 +1778,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def blockUsersInGroup(self, members, groupId):
 		"""blocked members in group by ID.
 		
@@ -1644,7 +1819,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1654,6 +1829,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def unblockUsersInGroup(self, members, groupId):
 		"""unblock members in group by ID.
 		
@@ -1694,7 +1870,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1704,6 +1880,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def addGroupAdmins(self, members, groupId):
 		"""Add admins to the group (white key).
 		
@@ -1746,7 +1923,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1756,6 +1933,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("group_admin")
 	async def removeGroupAdmins(self, members, groupId):
 		"""Remove admins in the group (white key) by ID.
 		
@@ -1798,7 +1976,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1808,6 +1986,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def pinGroupMsg(self, pinMsg, groupId):
 		"""Pin message in group by ID.
 		
@@ -1844,7 +2023,7 @@ class ZaloAPI(object):
 		
 		if pinMsg.msgType == "webchat":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1855,7 +2034,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.voice":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1865,7 +2044,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.photo", "chat.video.msg"]:
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1877,12 +2056,12 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.sticker":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
 				"senderName": pinMsg.dName,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"id": pinMsg.content.id,
 					"catId": pinMsg.content.catId,
 					"type": pinMsg.content.type
@@ -1892,8 +2071,8 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.recommended", "chat.link"]:
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1907,9 +2086,9 @@ class ZaloAPI(object):
 				"artist": extra.get("artist", ""),
 				"stream_icon": extra.get("stream_icon", ""),
 				"type": 2,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"action": pinMsg.content.action,
-					"params": json.dumps({
+					"params": _util.json_dumps({
 						"mediaTitle": extra.get("mediaTitle", ""),
 						"artist": extra.get("artist", ""),
 						"src": extra.get("src", ""),
@@ -1923,7 +2102,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.location.new":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1934,14 +2113,14 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "share.file":
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
 				"senderName": pinMsg.dName,
 				"title": pinMsg.content.title,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"fileSize": "7295",
 					"checksum": extra.get("checksum", ""),
 					"fileExt": extra.get("fileExt", ""),
@@ -1956,7 +2135,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.gif":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1976,7 +2155,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1986,6 +2165,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def unpinGroupMsg(self, pinId, pinTime, groupId):
 		"""Unpin message in group by ID.
 		
@@ -2025,7 +2205,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 				
@@ -2035,6 +2215,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def deleteGroupMsg(self, msgId, ownerId, clientMsgId, groupId):
 		"""Delete message in group by ID.
 		
@@ -2080,7 +2261,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2090,6 +2271,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def viewGroupPending(self, groupId):
 		"""See list of people pending approval in group by ID.
 		
@@ -2122,7 +2305,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2132,6 +2315,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def handleGroupPending(self, members, groupId, isApprove=True):
 		"""Approve/Deny pending users to the group from the group's approval.
 		
@@ -2174,7 +2358,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 				
@@ -2184,6 +2368,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def viewPollDetail(self, pollId):
 		"""View poll data by ID.
 		
@@ -2216,7 +2402,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2226,6 +2412,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def createPoll(
 		self,
 		question,
@@ -2299,7 +2486,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2309,6 +2496,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def lockPoll(self, pollId):
 		"""Lock/end poll in group by ID.
 		
@@ -2346,7 +2534,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2356,6 +2544,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def disperseGroup(self, groupId):
 		"""Disperse group by ID.
 		
@@ -2393,7 +2582,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2432,6 +2621,7 @@ class ZaloAPI(object):
 		else:
 			return await self.sendMessage(message, thread_id, thread_type, mark_message, ttl)
 	
+	@_ratelimit.limited("message")
 	async def sendMessage(self, message, thread_id, thread_type, mark_message=None, ttl=0):
 		"""Send message to a thread (user/group).
 			
@@ -2492,7 +2682,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2506,6 +2696,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def replyMessage(self, message, replyMsg, thread_id, thread_type, ttl=0):
 		"""Reply message in group by ID.
 			
@@ -2538,7 +2729,7 @@ class ZaloAPI(object):
 				"qmsgType": 1,
 				"qmsg": replyMsg.content,
 				"qmsgTs": replyMsg.ts,
-				"qmsgAttach": json.dumps({"properties": {"color":0,"size":0,"type":0,"subType":0,"ext": {"shouldParseLinkOrContact":0}}}),
+				"qmsgAttach": _util.json_dumps({"properties": {"color":0,"size":0,"type":0,"subType":0,"ext": {"shouldParseLinkOrContact":0}}}),
 				"qmsgTTL": 0,
 				"ttl": ttl
 			}
@@ -2572,7 +2763,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2586,6 +2777,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendMentionMessage(self, message, groupId, ttl=0):
 		"""Send message to a group with mention by ID.
 			
@@ -2633,7 +2825,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2643,6 +2835,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def undoMessage(self, msgId, cliMsgId, thread_id, thread_type):
 		"""Undo message from the client by ID.
 			
@@ -2696,7 +2889,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2710,6 +2903,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	async def sendReaction(self, messageObject, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2734,7 +2928,7 @@ class ZaloAPI(object):
 		payload = {
 			"params": {
 				"react_list": [{
-					"message": json.dumps({
+					"message": _util.json_dumps({
 						"rMsg": [{
 							"gMsgID": int(messageObject.msgId),
 							"cMsgID": int(messageObject.cliMsgId),
@@ -2771,7 +2965,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2785,6 +2979,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	async def sendMultiReaction(self, reactionObj, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2837,7 +3032,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["react_list"][0]["message"] = json.dumps(payload["params"]["react_list"][0]["message"])
+		payload["params"]["react_list"][0]["message"] = _util.json_dumps(payload["params"]["react_list"][0]["message"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -2850,13 +3045,13 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2870,6 +3065,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendRemoteFile(self, fileUrl, thread_id, thread_type, fileName="default", fileSize=None, extension="vrxx", ttl=0):
 		"""Send File to a User/Group with url.
 			
@@ -2949,7 +3145,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2963,6 +3159,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendRemoteVideo(self, videoUrl, thumbnailUrl, duration, thread_id, thread_type, width=1280, height=720, message=None, ttl=0):
 		"""Send (Forward) video to a User/Group with url.
 		
@@ -3010,7 +3207,7 @@ class ZaloAPI(object):
 				"ttl": ttl,
 				"zsource": 704,
 				"msgType": 5,
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"videoUrl": str(videoUrl),
 					"thumbUrl": str(thumbnailUrl),
 					"duration": int(duration),
@@ -3059,7 +3256,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3073,6 +3270,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendRemoteVoice(self, voiceUrl, thread_id, thread_type, fileSize=None, ttl=0):
 		"""Send voice by url.
 			
@@ -3107,7 +3305,7 @@ class ZaloAPI(object):
 				"zsource": -1,
 				"msgType": 3,
 				"clientId": str(_util.now()),
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"voiceUrl": str(voiceUrl),
 					"m4aUrl": str(voiceUrl),
 					"fileSize": int(fileSize)
@@ -3136,7 +3334,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3150,6 +3348,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendRemoteImage(self, imageUrl, thread_id, thread_type, width=2560, height=2560, message=None, ttl=0, custom_payload=None):
 		"""Send Image to a User/Group with url.
 			
@@ -3210,7 +3409,7 @@ class ZaloAPI(object):
 					"fileSize": str(fileSize),
 					"hdSize": str(fileSize),
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3242,7 +3441,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3256,6 +3455,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendLocalImage(self, imagePath, thread_id, thread_type, width=2560, height=2560, message=None, custom_payload=None, ttl=0):
 		"""Send Image to a User/Group with local file.
 			
@@ -3307,7 +3507,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3339,7 +3539,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3400,7 +3600,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3427,6 +3627,7 @@ class ZaloAPI(object):
 			User.fromDict(uploadData, None)
 		)
 	
+	@_ratelimit.limited("message")
 	async def sendLocalGif(self, gifPath, thumbnailUrl, thread_id, thread_type, gifName="vrxx.gif", width=500, height=500, ttl=0):
 		"""Send Gif to a User/Group with local file.
 			
@@ -3496,7 +3697,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3510,6 +3711,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendSticker(self, stickerId, cateId, thread_id, thread_type, ttl=0):
 		"""Send Sticker to a User/Group.
 			
@@ -3566,7 +3768,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3580,6 +3782,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("message")
 	async def sendCustomSticker(
 		self,
 		staticImgUrl,
@@ -3626,12 +3829,12 @@ class ZaloAPI(object):
 				"hdUrl": staticImgUrl,
 				"width": width,
 				"height": height,
-				"properties": json.dumps({
+				"properties": _util.json_dumps({
 					"subType": 0,
 					"color": -1,
 					"size": -1,
 					"type": 3,
-					"ext": json.dumps({
+					"ext": _util.json_dumps({
 						"sSrcStr": "@STICKER",
 						"sSrcType": 0
 					})
@@ -3639,7 +3842,7 @@ class ZaloAPI(object):
 				"contentId": _util.now(),
 				"thumb_height": width,
 				"thumb_width": height,
-				"webp": json.dumps({
+				"webp": _util.json_dumps({
 					"width": width,
 					"height": height,
 					"url": animationImgUrl
@@ -3674,7 +3877,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3688,6 +3891,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendLink(self, linkUrl, title, thread_id, thread_type, thumbnailUrl=None, domainUrl=None, desc=None, message=None, ttl=0):
 		"""Send link to a User/Group with url.
 			
@@ -3722,7 +3926,7 @@ class ZaloAPI(object):
 				"desc": desc or "",
 				"thumb": thumbnailUrl or "",
 				"type": 0,
-				"media": json.dumps({
+				"media": _util.json_dumps({
 					"type": 0,
 					"count": 0,
 					"mediaTitle": "",
@@ -3760,7 +3964,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3774,6 +3978,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def sendReport(self, user_id, reason=0, content=None):
 		"""Send report to Zalo.
 		
@@ -3821,7 +4026,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3831,6 +4036,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def sendBusinessCard(self, userId, qrCodeUrl, thread_id, thread_type, phone=None, ttl=0):
 		"""Send business card by user ID.
 			
@@ -3877,7 +4083,7 @@ class ZaloAPI(object):
 			payload["params"]["visibility"] = 0
 			payload["params"]["grid"] = str(thread_id)
 		
-		payload["params"]["msgInfo"] = json.dumps(payload["params"]["msgInfo"])
+		payload["params"]["msgInfo"] = _util.json_dumps(payload["params"]["msgInfo"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -3890,7 +4096,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -4010,7 +4216,7 @@ class ZaloAPI(object):
 			payload["params"]["msgInfos"]["grid"] = str(destination_id)
 			payload["params"]["imei"] = self._imei
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -4085,7 +4291,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -4102,11 +4308,73 @@ class ZaloAPI(object):
 	LISTEN METHODS
 	"""
 	
+	def _threadId(self, msgObj, thread_type):
+		if thread_type == ThreadType.GROUP:
+			return str(int(msgObj.idTo) or self.uid)
+		
+		return str(int(msgObj.uidFrom) or msgObj.idTo)
+	
+	def _submitMessages(self, batch, thread_type):
+		"""Queue ``batch`` to ``onMessages`` on the handler executor, one call per conversation."""
+		for threadId, messages in _executor.lanes(batch, lambda msgObj: self._threadId(msgObj, thread_type)).items():
+			self._handlers.submit(threadId, self.onMessages, messages, thread_type)
+	
+	async def _connected(self):
+		reconnected = self._supervisor.live()
+		if reconnected:
+			await self.onReconnect(*reconnected)
+		
+		return reconnected
+	
+	async def _backfillGap(self, thread):
+		"""Replay the messages missed while the websocket was down, oldest first, before the live frames.
+		
+		Live frames repeating a replayed message are dropped by the overlap filter.
+		"""
+		self._overlap.start()
+		try:
+			missed = await self._backfill.run_async(self._cursors, self.getLastMsgs, self._fetchRecentGroupMsgs)
+			for frame in _backfill.frames(missed):
+				frame = self._overlap.filter(frame)
+				if frame is None:
+					continue
+				
+				self._cursors.record(frame)
+				if self._events is not None:
+					await self._events.put_async(frame, frame[1])
+				
+				else:
+					await self._dispatchFrame(frame, thread)
+			
+			logger.debug(f"Backfilled {len(missed)} missed messages")
+		
+		except Exception as e:
+			logger.warning(f"Unable to backfill missed messages: {e}")
+		
+		finally:
+			self._overlap.end()
+	
+	async def _disconnected(self, error):
+		if self._supervisor.draining():
+			await self.onDisconnect(error)
+		
+		if self._condition.is_set():
+			return
+		
+		delay = self._supervisor.backoff()
+		logger.debug(f"Reconnecting in {delay:.1f}s (attempt {self._supervisor.attempts + 1})...")
+		deadline = time.monotonic() + delay
+		while not self._condition.is_set() and time.monotonic() < deadline:
+			await asyncio.sleep(min(1, deadline - time.monotonic()))
+	
 	async def _listen_req(self, delay=1, reconnect=5):
 		self._condition.clear()
 		HasRead = set()
 		
+		supervisor = self._supervisor = _supervisor.Supervisor(self._reconnect_policy, reconnect)
 		while not self._condition.is_set():
+			supervisor.connecting()
+			error = None
 			try:
 				await self.onListening()
 				self._listening = True
@@ -4120,16 +4388,17 @@ class ZaloAPI(object):
 					messages = await self.getLastMsgs()
 					groupmsg = messages.groupMsgs
 					messages = messages.msgs
+					if supervisor.state != _supervisor.LIVE:
+						await self._connected()
 					
-					loop = asyncio.get_event_loop()
 					for message in messages + groupmsg:
 						if int(message["ts"]) >= ListenTime and message["msgId"] not in HasRead:
 							HasRead.add(message["msgId"])
-							msgObj = MessageObject.fromDict(message, self._undefined)
+							msgObj = CompactMessageObject.fromDict(message, self._undefined)
 							if message in messages:
-								loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER))
+								self._handlers.submit(str(int(msgObj.uidFrom) or msgObj.idTo), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
 							else:
-								loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP))
+								self._handlers.submit(str(int(msgObj.idTo) or self.uid), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
 					
 					await asyncio.sleep(delay)
 			
@@ -4139,10 +4408,105 @@ class ZaloAPI(object):
 				break
 			
 			except Exception as e:
+				error = e
 				await self.onErrorCallBack(e)
-				
-			await asyncio.sleep(reconnect)
+			
+			finally:
+				self._listening = False
+			
+			await self._disconnected(error)
 		
+		supervisor.stopped()
+	
+	async def _dispatchFrame(self, frame, thread=False):
+		n, cmd, s, parsedData = frame
+		if n == 1 and cmd == 501 and s == 0:
+			userMsgs = parsedData["data"]["msgs"]
+			
+			batch = [CompactMessageObject.fromDict(message, None) for message in userMsgs]
+			[
+				self._submitMessages(batch, ThreadType.USER)
+				if thread else
+				await self.onMessages(batch, ThreadType.USER)
+			]
+		
+		elif n == 1 and cmd == 521 and s == 0:
+			groupMsgs = parsedData["data"]["groupMsgs"]
+			
+			batch = []
+			for message in groupMsgs:
+			
+				try:
+					message = await self._recent.resolve_async(message["idTo"], message, self._fetchRecentGroupMsgs)
+				except:
+					pass
+				
+				batch.append(CompactMessageObject.fromDict(message, None))
+			
+			[
+				self._submitMessages(batch, ThreadType.GROUP)
+				if thread else
+				await self.onMessages(batch, ThreadType.GROUP)
+			]
+		
+		elif n == 1 and cmd in [502, 522, 504, 524] and s == 0:
+			# Delivereds, Seen, Clear Unread, ...
+			return
+		
+		elif n == 1 and cmd == 602 and s == 0:
+			# Typing Event
+			return
+		
+		elif n == 1 and cmd == 601 and s == 0:
+			controls = parsedData["data"].get("controls", [])
+			for control in controls:
+				if control["content"]["act_type"] == "group":
+					
+					if control["content"]["act"] == "join_reject":
+						continue
+					
+					groupEventData = _util.json_loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
+					groupEventType = _util.getGroupEventType(control["content"]["act"])
+					event_data = EventObject.fromDict(groupEventData)
+					event_type = groupEventType
+					[
+						self._handlers.submit(str(event_data.groupId), self.onEvent, event_data, event_type)
+						if thread else
+						await self.onEvent(event_data, event_type)
+					]
+		
+		elif cmd == 612:
+			reacts = parsedData["data"].get("reacts", [])
+			reactGroups = parsedData["data"].get("reactGroups", [])
+			
+			for react in reacts:
+				react["content"] = _util.json_loads(react["content"])
+				msgObj = CompactMessageObject.fromDict(react, None)
+				[
+					self._handlers.submit(str(int(msgObj.uidFrom) or msgObj.idTo), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
+					if thread else
+					await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
+				]
+			
+			for reactGroup in reactGroups:
+				reactGroup["content"] = _util.json_loads(reactGroup["content"])
+				msgObj = CompactMessageObject.fromDict(reactGroup, None)
+				[
+					self._handlers.submit(str(int(msgObj.idTo) or self.uid), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
+					if thread else
+					await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
+				]
+	
+	async def _dispatchEvents(self, thread):
+		while True:
+			frame = await self._events.get_async()
+			if frame is None:
+				return
+			
+			try:
+				await self._dispatchFrame(frame, thread)
+			except Exception as e:
+				await self.onErrorCallBack(e)
 	
 	async def _listen_ws(self, thread=False, reconnect=5):
 		self._condition.clear()
@@ -4160,7 +4524,6 @@ class ZaloAPI(object):
 			"Accept-Language": "en-US,en;q=0.9",
 			"Cache-Control": "no-cache",
 			"Connection": "Upgrade",
-			"Host": urllib.parse.urlparse(url).netloc,
 			"Origin": "https://chat.zalo.me",
 			"Pargma": "no-cache",
 			"Sec-Websocket-Extensions": "permessage-deflate; client_max_window_bits",
@@ -4170,130 +4533,62 @@ class ZaloAPI(object):
 			"Cookie": raw_cookies
 		}
 		
+		dispatcher = asyncio.ensure_future(self._dispatchEvents(thread)) if self._events is not None else None
+		supervisor = self._supervisor = _supervisor.Supervisor(self._reconnect_policy, reconnect)
 		while not self._condition.is_set():
+			commands = _offload.commands(self, ZaloAPI, {601: "onEvent"})
+			reader = _offload.AsyncFrameReader(getattr(self, "ws_key", None), self._offload, commands=commands)
+			supervisor.connecting()
+			error = None
 			try:
 				
-				async with websockets.connect(url, extra_headers=headers, ping_interval=30) as ws:
-					loop = asyncio.get_event_loop()
+				async with websockets.connect(url, additional_headers=headers, ping_interval=30) as ws:
+					self._ws = (ws, asyncio.get_running_loop())
+					if await self._connected() and self._backfill is not None:
+						await self._backfillGap(thread)
+					
 					await self.onListening()
 					self._listening = True
 					while not self._condition.is_set():
 						try:
-							data = await asyncio.wait_for(ws.recv(), timeout=60)
-							if not isinstance(data, bytes):
+							frame = await asyncio.wait_for(reader.read(ws.recv), timeout=60)
+							if not frame:
 								continue
 							
-							encodedHeader = data[:4]
-							n, cmd, s = _util.getHeader(encodedHeader)
-							
-							dataToDecode = data[4:]
-							decodedData = dataToDecode.decode("utf-8")
-							if not decodedData:
+							n, cmd, s, parsedData = frame
+							if n == 1 and cmd == 1 and s == 1 and "key" in parsedData:
+								self.ws_key = parsedData["key"]
 								continue
 							
-							parsed = json.loads(decodedData)
-							if n == 1 and cmd == 1 and s == 1 and "key" in parsed:
-								self.ws_key = parsed["key"]
+							if parsedData is None:
+								logger.error("Unable to decrypt data because key not found")
 								continue
 							
-							if not hasattr(self, "ws_key"):
-								logger.error("Unable to decrypt data because key not found")
+							frame = self._overlap.filter(frame)
+							if frame is None:
 								continue
 							
-							parsedData = _util.zws_decode(parsed, self.ws_key)
+							self._cursors.record(frame)
 							if n == 1 and cmd == 3000 and s == 0:
 								logger.warning("Another connection is opened, closing this one")
 								await ws.close()
 							
-							elif n == 1 and cmd == 501 and s == 0:
-								userMsgs = parsedData["data"]["msgs"]
-								
-								for message in userMsgs:
-									msgObj = MessageObject.fromDict(message, None)
-									[
-										loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER))
-										if thread else
-										await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-									]
-							
-							elif n == 1 and cmd == 521 and s == 0:
-								groupMsgs = parsedData["data"]["groupMsgs"]
-								
-								for message in groupMsgs:
-								
-									try:
-										messages = (await self.getRecentGroup(message["idTo"]))["groupMsgs"]
-										message = next((msg for msg in messages if msg["msgId"] == message["msgId"]), message)
-									except:
-										pass
-									
-									msgObj = MessageObject.fromDict(message, None)
-									[
-										loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP))
-										if thread else
-										await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-									]
-							
-							elif n == 1 and cmd in [502, 522, 504, 524] and s == 0:
-								# Delivereds, Seen, Clear Unread, ...
-								continue
-							
-							elif n == 1 and cmd == 602 and s == 0:
-								# Typing Event
-								continue
-							
-							elif n == 1 and cmd == 601 and s == 0:
-								controls = parsedData["data"].get("controls", [])
-								for control in controls:
-									if control["content"]["act_type"] == "group":
-										
-										if control["content"]["act"] == "join_reject":
-											continue
-										
-										groupEventData = json.loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
-										groupEventType = _util.getGroupEventType(control["content"]["act"])
-										event_data = EventObject.fromDict(groupEventData)
-										event_type = groupEventType
-										[
-											loop.create_task(self.onEvent(event_data, event_type))
-											if thread else
-											await self.onEvent(event_data, event_type)
-										]
-								
-								continue
-							
-							elif cmd == 612:
-								reacts = parsedData["data"].get("reacts", [])
-								reactGroups = parsedData["data"].get("reactGroups", [])
-								
-								for react in reacts:
-									react["content"] = json.loads(react["content"])
-									msgObj = MessageObject.fromDict(react, None)
-									[
-										loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER))
-										if thread else
-										await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-									]
-								
-								for reactGroup in reactGroups:
-									reactGroup["content"] = json.loads(reactGroup["content"])
-									msgObj = MessageObject.fromDict(reactGroup, None)
-									[
-										loop.create_task(self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP))
-										if thread else
-										await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-									]
+							elif self._events is not None:
+								await self._events.put_async(frame, cmd)
 							
 							else:
-								continue
+								await self._dispatchFrame(frame, thread)
 						
-						except (websockets.ConnectionClosedOK, websockets.ConnectionClosedError, websockets.exceptions.ConnectionClosedError, websockets.ConnectionClosed):
+						except (websockets.ConnectionClosedOK, websockets.ConnectionClosedError, websockets.exceptions.ConnectionClosedError, websockets.ConnectionClosed) as e:
+							# Closed by stopListening
+							error = e if not self._condition.is_set() else None
 							break
 						
 						except asyncio.TimeoutError:
 							await ws.ping()
 						
 						except Exception as e:
+							error = e
 							await self.onErrorCallBack(e)
 							break
 			
@@ -4304,9 +4599,20 @@ class ZaloAPI(object):
 				break
 			
 			except Exception as e:
+				error = e
 				await self.onErrorCallBack(e)
 			
-			await asyncio.sleep(reconnect)
+			finally:
+				self._ws = None
+				reader.close()
+				self._listening = False
+			
+			await self._disconnected(error)
+		
+		supervisor.stopped()
+		if dispatcher is not None:
+			# Frames still queued are dispatched by the next listen
+			dispatcher.cancel()
 	
 	
 	def startListening(self, delay=1, thread=False, type="websocket", reconnect=5):
@@ -4342,6 +4648,11 @@ class ZaloAPI(object):
 		"""Stop the listening loop."""
 		self._listening = False
 		self._condition.set()
+		current = self._ws
+		if current is not None:
+			# Wake up the receive loop instead of waiting for its next frame
+			ws, loop = current
+			loop.call_soon_threadsafe(lambda: asyncio.ensure_future(ws.close()))
 	
 	def listen(self, delay=1, thread=False, type="websocket", reconnect=5):
 		"""Initialize and runs the listening loop continually.
@@ -4382,6 +4693,26 @@ class ZaloAPI(object):
 		"""Called when the client is listening."""
 		logger.debug("Listening...")
 	
+	async def onDisconnect(self, error=None):
+		"""Called when the listener connection ends.
+		
+		Args:
+			error (Exception): Error that ended the connection, ``None`` when it was closed (stop or periodic renewal)
+		"""
+		if error:
+			logger.warning("Listener disconnected: {}".format(error))
+		else:
+			logger.debug("Listener disconnected")
+	
+	async def onReconnect(self, attempts, downtime):
+		"""Called when the listener is connected again after a disconnect.
+		
+		Args:
+			attempts (int): Connection attempts it took
+			downtime (float): Seconds without a connection
+		"""
+		logger.debug("Reconnected after {:.1f}s ({} attempts)".format(downtime, attempts))
+	
 	async def onMessage(
 		self,
 		mid=None,
@@ -4403,6 +4734,27 @@ class ZaloAPI(object):
 		"""
 		logger.info("{} from {} in {}".format(message, thread_id, thread_type.name))
 	
+	async def onMessages(self, batch, thread_type=ThreadType.USER):
+		"""Called with the messages received in one websocket frame.
+		
+		When listening with ``thread=True``, the frame is split by conversation: the
+		messages of each thread get their own task on the handler executor, so calls
+		of one thread run in order and calls of different threads concurrently.
+		
+		Override it to handle a burst at once (e.g. one database write per frame).
+		By default, each message is passed on to `onMessage`.
+		
+		Args:
+			batch (list): The messages, oldest first (As `Message` objects)
+			thread_type (ThreadType): Type of thread that the messages were sent to
+		"""
+		for msgObj in batch:
+			try:
+				await self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, self._threadId(msgObj, thread_type), thread_type)
+			except Exception as e:
+				# One failing message does not cost the rest of the batch
+				await self.onErrorCallBack(e)
+	
 	async def onEvent(self, event_data, event_type):
 		"""Called when the client listening, and some events occurred.
 
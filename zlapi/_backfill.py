@@ -0,0 +1,197 @@
+# -*- coding: UTF-8 -*-
+import time
+import asyncio
+import itertools
+import threading
+
+from concurrent.futures import wait
+
+from ._threads import ThreadType
+
+_LISTS = {501: ("msgs", ThreadType.USER), 521: ("groupMsgs", ThreadType.GROUP)}
+
+
+def _threadId(message, thread_type):
+	if thread_type == ThreadType.GROUP:
+		return str(message.get("idTo"))
+
+	return str(int(message.get("uidFrom") or 0) or message.get("idTo"))
+
+
+def _ts(message):
+	try:
+		return int(message.get("ts") or 0)
+	except (TypeError, ValueError):
+		return 0
+
+
+def frames(missed):
+	"""Decoded 501/521 frames of ``(thread_type, message)`` items, in their order."""
+	commands = {thread_type: (cmd, key) for cmd, (key, thread_type) in _LISTS.items()}
+	for thread_type, items in itertools.groupby(missed, key=lambda item: item[0]):
+		cmd, key = commands[thread_type]
+		yield 1, cmd, 0, {"data": {key: [message for _, message in items]}}
+
+
+class Cursors(object):
+	"""Last seen message of each thread, recorded by the listener from the live frames.
+
+	Args:
+		max_threads (int): Threads tracked, the least recently active ones are dropped first
+	"""
+
+	def __init__(self, max_threads=10000):
+		self.max_threads = max_threads
+		self.watermark = None
+		self._lock = threading.Lock()
+		self._threads = {}
+
+	def seen(self, message, thread_type):
+		"""Move the cursor of the thread of ``message`` to it, if it is newer."""
+		key = (thread_type, _threadId(message, thread_type))
+		ts = _ts(message)
+		with self._lock:
+			cursor = self._threads.get(key)
+			if cursor is None or ts >= cursor[0]:
+				self._threads.pop(key, None)
+				self._threads[key] = (ts, str(message.get("msgId")))
+				while len(self._threads) > self.max_threads:
+					del self._threads[next(iter(self._threads))]
+
+			self.watermark = max(self.watermark or 0, ts)
+
+	def record(self, frame):
+		"""Move the cursors to the messages of a decoded 501/521 frame."""
+		n, cmd, s, parsedData = frame
+		key, thread_type = _LISTS.get(cmd, (None, None))
+		data = parsedData.get("data") if key else None
+		if isinstance(data, dict):
+			for message in data.get(key) or ():
+				self.seen(message, thread_type)
+
+	def get(self, thread_id, thread_type):
+		"""``(ts, msgId)`` of the last seen message of a thread, or ``None``."""
+		with self._lock:
+			return self._threads.get((thread_type, str(thread_id)))
+
+	def since(self, thread_id, thread_type):
+		"""Timestamp after which messages of a thread were not seen."""
+		cursor = self.get(thread_id, thread_type)
+		return cursor[0] if cursor is not None else self.watermark
+
+
+class Backfill(object):
+	"""Recover the messages missed while the listener was disconnected.
+
+	After a reconnect, the last messages of every conversation (``getLastMsgs``)
+	are compared to the listener cursors. Groups with newer messages are then
+	paged back with ``getRecentGroup``, in parallel, up to their cursor. The
+	missed messages are deduplicated and replayed oldest first, before the
+	live frames. The whole run is bounded by ``timeout`` and ``max_requests``.
+
+	Args:
+		timeout (float): Seconds a backfill may take, pages still loading are dropped
+		max_requests (int): Requests per backfill, ``getLastMsgs`` included
+		max_pages (int): ``getRecentGroup`` pages per group
+		workers (int): Group pages fetched at the same time
+	"""
+
+	def __init__(self, timeout=20, max_requests=30, max_pages=4, workers=8):
+		self.timeout = timeout
+		self.max_requests = max_requests
+		self.max_pages = max_pages
+		self.workers = workers
+
+	def _plan(self, cursors, last):
+		missed = {}
+		groups = {}
+		for key, thread_type in _LISTS.values():
+			for message in (last.get(key) if last else None) or ():
+				thread_id = _threadId(message, thread_type)
+				since = cursors.since(thread_id, thread_type)
+				if _ts(message) > since:
+					missed.setdefault(str(message.get("msgId")), (thread_type, message))
+					if thread_type == ThreadType.GROUP:
+						groups[thread_id] = None
+
+		return missed, groups
+
+	def _collect(self, cursors, missed, groupId, messages):
+		"""Add the missed messages of a page; the ``msgId`` to page back from, if the gap goes on."""
+		since = cursors.since(groupId, ThreadType.GROUP)
+		for message in messages:
+			if _ts(message) > since:
+				missed.setdefault(str(message.get("msgId")), (ThreadType.GROUP, message))
+
+		if not messages:
+			return None
+
+		oldest = min(messages, key=lambda message: (_ts(message), int(message.get("msgId") or 0)))
+		return oldest.get("msgId") if _ts(oldest) > since else None
+
+	def _ordered(self, missed):
+		return sorted(missed.values(), key=lambda item: (_ts(item[1]), int(item[1].get("msgId") or 0)))
+
+	def _next(self, pending, pages, requests):
+		batch = list(pending.items())[:min(self.workers, self.max_requests - requests)]
+		for groupId, globalMsgId in batch:
+			pages[groupId] = pages.get(groupId, 0) + 1
+
+		return batch
+
+	def _advance(self, pending, pages, groupId, globalMsgId):
+		pending.pop(groupId, None)
+		if globalMsgId is not None and pages[groupId] < self.max_pages:
+			pending[groupId] = globalMsgId
+
+	def run(self, cursors, fetch_last, fetch_group, submit):
+		"""Fetch the missed messages.
+
+		Args:
+			cursors (Cursors): Last seen messages
+			fetch_last (callable): ``fetch_last()`` returns ``{"msgs": [...], "groupMsgs": [...]}``
+			fetch_group (callable): ``fetch_group(groupId, globalMsgId)`` returns a page of group messages,
+				the latest one for ``globalMsgId=None``
+			submit (callable): Runs ``fetch_group`` in the background, e.g. ``ThreadPoolExecutor.submit``
+
+		Returns:
+			list: ``(thread_type, message)`` oldest first
+		"""
+		if cursors.watermark is None:
+			return []
+
+		deadline = time.monotonic() + self.timeout
+		missed, pending = self._plan(cursors, fetch_last())
+		requests, pages = 1, {}
+		while pending and requests < self.max_requests and time.monotonic() < deadline:
+			batch = self._next(pending, pages, requests)
+			requests += len(batch)
+			futures = {submit(fetch_group, groupId, globalMsgId): groupId for groupId, globalMsgId in batch}
+			done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+			for future, groupId in futures.items():
+				page = future.result() if future in done and future.exception() is None else None
+				self._advance(pending, pages, groupId, self._collect(cursors, missed, groupId, page) if page is not None else None)
+
+		return self._ordered(missed)
+
+	async def run_async(self, cursors, fetch_last, fetch_group):
+		"""``run`` with coroutine ``fetch_last`` and ``fetch_group``."""
+		if cursors.watermark is None:
+			return []
+
+		deadline = time.monotonic() + self.timeout
+		missed, pending = self._plan(cursors, await fetch_last())
+		requests, pages = 1, {}
+		while pending and requests < self.max_requests and time.monotonic() < deadline:
+			batch = self._next(pending, pages, requests)
+			requests += len(batch)
+			tasks = {asyncio.ensure_future(fetch_group(groupId, globalMsgId)): groupId for groupId, globalMsgId in batch}
+			done, late = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+			for task in late:
+				task.cancel()
+
+			for task, groupId in tasks.items():
+				page = task.result() if task in done and task.exception() is None else None
+				self._advance(pending, pages, groupId, self._collect(cursors, missed, groupId, page) if page is not None else None)
+
+		return self._ordered(missed)
@@ -5,16 +5,15 @@ import requests, json
 
 from .models import *
 from ._package import *
-from . import _util, _state
+from . import _util, _state, _flight, _ratelimit, _retry, _outbox, _offload, _recent, _executor, _events, _supervisor, _backfill
 from .logging import Logging
 from websockets.sync.client import connect
 from concurrent.futures import ThreadPoolExecutor
 
-pool = ThreadPoolExecutor(max_workers=9999)
 logger = Logging(theme="catppuccin-mocha", log_text_color="black")
 
 class ZaloAPI(object):
-	def __init__(self, phone, password, imei, session_cookies=None, user_agent=None, auto_login=True):
+	def __init__(self, phone, password, imei, session_cookies=None, user_agent=None, auto_login=True, pool_options=None, transport=None, coalesce=False, rate_limit=None, retry=None, outbox_workers=8, prewarm=False, offload_frames=None, recent_messages=50, handler_workers=16, event_queue=None, reconnect_policy=None, backfill=True):
 		"""Initialize and log in the client.
 		
 		Args:
@@ -24,12 +23,56 @@ class ZaloAPI(object):
 			auto_login (bool): Automatically log in when initializing ZaloAPI (Default: True)
 			user_agent (str): Custom user agent to use when sending requests. If `None`, user agent will be chosen from a premade list
 			session_cookies (dict): Cookies from a previous session (Required if logging in with cookies)
+			pool_options (dict): Connection pool settings (``pool_connections``, ``pool_maxsize``, ``pool_block``, ``keepalive``),
+				with optional per host family overrides under ``families`` (e.g. ``{"families": {"group": {"pool_maxsize": 64}}}``)
+			transport (Transport): Custom HTTP transport (e.g. ``RequestsTransport(base_url=...)`` pointing at ``zlapi.mock.MockZaloServer``)
+			coalesce (bool): Collapse identical concurrent fetch/get requests into one network call (Default: False).
+				All waiting callers receive the same result object
+			rate_limit (bool | RateLimiter): Pace send/admin requests with an adaptive token bucket per endpoint family
+				and thread (Default: None). Pass ``True`` for the defaults or a configured ``RateLimiter``
+			retry (bool | RetryPolicy): Retry idempotent reads on transient errors with jittered exponential backoff,
+				and optionally hedge them (Default: None). Pass ``True`` for the defaults or a configured ``RetryPolicy``
+			outbox_workers (int): Number of sends the ordered ``outbox`` runs at the same time (Default: 8)
+			prewarm (bool): Resolve the Zalo hosts and open keep-alive connections to them right after login (Default: False)
+			offload_frames (bool | int): Decrypt and decompress websocket frames of at least this many bytes in worker processes,
+				keeping the receive loop responsive (Default: None). ``True`` offloads frames from 256 KiB
+			recent_messages (int): Recent messages cached per group by the listener, so an incoming group message
+				only costs a ``getRecentGroup`` fetch the first time its group is seen (Default: 50)
+			handler_workers (int): Number of threads running ``thread=True`` handlers. Handlers of the same conversation
+				run one at a time in arrival order, different conversations in parallel (Default: 16)
+			event_queue (bool | EventQueue): Queue decoded websocket frames in a bounded ``EventQueue`` dispatched apart from
+				the receive loop (Default: None). Pass ``True`` for the defaults or a configured ``EventQueue``
+			reconnect_policy (ReconnectPolicy): Backoff between listener reconnects (Default: exponential with jitter from the
+				``reconnect`` delay of ``listen`` up to 5 minutes, at most 30 attempts per 10 minutes)
+			backfill (bool | Backfill): After a websocket reconnect, replay the messages missed while disconnected before the live
+				ones, within the time and request budget of a ``Backfill`` (Default: True)
 			
 		Raises:
 			ZaloLoginError: On failed login
 			LoginMethodNotSupport: If method login not support
 		"""
-		self._state = _state.State()
+		self._state = _state.State(pool_options, transport)
+		self._flight = _flight.SingleFlight() if coalesce else None
+		self._limiter = _ratelimit.RateLimiter() if rate_limit is True else rate_limit or None
+		self._retry = _retry.RetryPolicy() if retry is True else retry or None
+		self.outbox = _outbox.Outbox(self, outbox_workers)
+		self._prewarm = prewarm
+		self._offload = _offload.threshold(offload_frames)
+		self._recent = _recent.RecentMessages(recent_messages)
+		self._handlers = _executor.KeyedExecutor(handler_workers, name="zlapi-handler")
+		# Read-ahead and other background fetches of this client
+		self._fetches = ThreadPoolExecutor(max_workers=8, thread_name_prefix="zlapi-fetch")
+		self._events = _events.EventQueue() if event_queue is True else event_queue or None
+		self._reconnect_policy = reconnect_policy or _supervisor.ReconnectPolicy()
+		self._supervisor = None
+		self._ws = None
+		self._wsIndex = 0
+		self._handover = None
+		self._overlap = _supervisor.OverlapFilter()
+		self._backfill = _backfill.Backfill() if backfill is True else backfill or None
+		self._cursors = _backfill.Cursors()
+		self._dispatcher = None
+		self._dispatchThreaded = False
 		self._condition = threading.Event()
 		self._listening = False
 		self._start_fix = False
@@ -57,6 +100,65 @@ class ZaloAPI(object):
 	def _post(self, *args, **kwargs):
 		return self._state._post(*args, **kwargs)
 	
+	def getPoolStats(self):
+		"""Retrieve connection pool counters.
+		
+		Returns:
+			dict: Counters (``requests``, ``new_connections``, ``reused_connections``,
+			``pool_exhausted``, ``discarded_connections``) for each host family
+		"""
+		return self._state.get_pool_stats()
+	
+	def getHandlerStats(self):
+		"""Retrieve the counters of the executor running ``thread=True`` handlers.
+		
+		Returns:
+			dict: Queue depth (``queued``, ``max_depth``), ``running`` handlers, conversation ``lanes``
+			and handler latency (``wait_avg``, ``wait_max``, ``run_avg``, ``run_max``, in seconds)
+		"""
+		return self._handlers.stats()
+	
+	def getConnectionState(self):
+		"""Retrieve the state of the listener connection.
+		
+		Returns:
+			str: ``connecting``, ``live``, ``draining``, ``backoff`` or ``stopped``
+		"""
+		return self._supervisor.state if self._supervisor is not None else _supervisor.STOPPED
+	
+	def getEventStats(self):
+		"""Retrieve the counters of the ``event_queue`` between the websocket and the handlers.
+		
+		Returns:
+			dict: Queue ``depth``, ``dropped`` frames per command, ``spilled`` frames and enqueue to dispatch
+			latency (``latency_avg``, ``latency_max``, in seconds), see ``EventQueue.stats``. ``None`` without a queue
+		"""
+		return self._events.stats() if self._events is not None else None
+	
+	def prewarmConnections(self, families=None, connections=1):
+		"""Resolve the Zalo hosts and open keep-alive connections to them in parallel.
+		
+		Args:
+			families (list): Host families to warm, e.g. ``["chat", "group"]`` (Default: all)
+			connections (int): Connections to open per host (Default: 1)
+			
+		Returns:
+			dict: ``{url: error}`` with ``None`` for the hosts that were warmed
+		"""
+		return self._state.prewarm(families, connections)
+	
+	def close(self):
+		"""Finish the queued events, handlers and ``outbox`` sends and close the HTTP transport used to send requests."""
+		if self._events is not None:
+			self._events.close()
+			if self._dispatcher is not None and self._dispatcher is not threading.current_thread():
+				self._dispatcher.join()
+		
+		self._handlers.shutdown()
+		self._fetches.shutdown()
+		self.outbox.close()
+		self._state.close()
+	
 	"""
 	END INTERNAL REQUEST METHODS
 	"""
@@ -66,10 +168,10 @@ class ZaloAPI(object):
 	"""
 	
 	def _encode(self, params):
-		return _util.zalo_encode(params, self._state._config.get("secret_key"))
+		return self._state.get_codec().encode(_retry.mark_attempt(params))
 		
 	def _decode(self, params):
-		return _util.zalo_decode(params, self._state._config.get("secret_key")) 
+		return self._state.get_codec().decode(params)
 		
 	"""
 	END EXTENSIONS METHODS
@@ -178,6 +280,9 @@ class ZaloAPI(object):
 			self._imei = None
 			self.uid = self._state.user_id
 		
+		if self._prewarm:
+			self.prewarmConnections()
+		
 		self.onLoggedIn(self._state._config.get("phone_number"))
 		
 	"""
@@ -249,7 +354,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -267,6 +372,8 @@ class ZaloAPI(object):
 	FETCH METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	def fetchAccountInfo(self):
 		"""fetch account information of the client 
 		
@@ -299,7 +406,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -309,6 +416,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	def fetchPhoneNumber(self, phoneNumber, language="vi"):
 		"""Fetch user info by Phone Number.
 		
@@ -351,7 +460,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -361,6 +470,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_flight.coalesce
+	@_retry.idempotent
 	def fetchUserInfo(self, userId):
 		"""Fetch user info by ID.
 		
@@ -411,7 +522,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -421,11 +532,14 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	def fetchGroupInfo(self, groupId):
+	@_flight.coalesce
+	@_retry.idempotent
+	def fetchGroupInfo(self, groupId, columnar=False):
 		"""Fetch group info by ID.
 		
 		Args:
 			groupId (int | str | dict): Group(s) ID to get info
+			columnar (bool): Return the members in ``currentMems`` as a ``Directory`` (Default: False)
 		
 		Returns:
 			object: `Group` group info
@@ -437,7 +551,8 @@ class ZaloAPI(object):
 		
 		params = {
 			"zpw_ver": 645,
-			"zpw_type": 30
+			"zpw_type": 30,
+			"nretry": 0
 		}
 		
 		payload = {
@@ -452,7 +567,7 @@ class ZaloAPI(object):
 		else:
 			payload["params"]["gridVerMap"][str(groupId)] = 0
 			
-		payload["params"]["gridVerMap"] = json.dumps(payload["params"]["gridVerMap"])
+		payload["params"]["gridVerMap"] = _util.json_dumps(payload["params"]["gridVerMap"])
 		payload["params"] = self._encode(payload["params"])
 		
 		response = self._post("https://tt-group-wpa.chat.zalo.me/api/group/getmg-v2", params=params, data=payload)
@@ -466,32 +581,28 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
+			if columnar:
+				for info in (results.get("gridInfoMap") or {}).values():
+					if isinstance(info, dict) and isinstance(info.get("currentMems"), list):
+						info["currentMems"] = Directory(info["currentMems"], key="id")
+			
 			return Group.fromDict(results, None)
 		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	def fetchAllFriends(self):
-		"""Fetch all users the client is currently chatting with (only friends).
-		
-		Returns:
-			object: `User` all friend IDs
-			any: If response is not list friends
-			
-		Raises:
-			ZaloAPIException: If request failed
-		"""
-		
+	@_retry.idempotent
+	def _fetchFriendsPage(self, page, count):
 		params = {
 			"params": self._encode({
 				"incInvalid": 0,
-				"page": 1,
-				"count": 20000,
+				"page": page,
+				"count": count,
 				"avatar_size": 120,
 				"actiontime": 0
 			}),
@@ -504,18 +615,63 @@ class ZaloAPI(object):
 		data = response.json()
 		results = data.get("data") if data.get("error_code") == 0 else None
 		if results:
-			results = self._decode(results)
-			datas = []
-			if results.get("data"):
-				for data in results.get("data"):
-					datas.append(User(**data))
-			
-			return datas
-					
+			return self._decode(results).get("data") or []
+		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
+	
+	@_flight.coalesce
+	def fetchAllFriends(self, columnar=False):
+		"""Fetch all users the client is currently chatting with (only friends).
 		
+		Args:
+			columnar (bool): Return a ``Directory`` instead of a list of ``User`` (Default: False)
+		
+		Returns:
+			object: `User` all friend IDs
+			any: If response is not list friends
+			
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		friends = self._fetchFriendsPage(1, 20000)
+		if columnar:
+			return Directory(friends)
+		
+		return [User(**data) for data in friends]
+	
+	def iterFriends(self, page_size=500, read_ahead=True):
+		"""Iterate over all friends, one page at a time.
+		
+		Unlike ``fetchAllFriends``, friends are yielded as soon as their page is
+		decoded and only about two pages are held in memory.
+		
+		Args:
+			page_size (int): Friends requested per page (Default: 500)
+			read_ahead (bool): Fetch the next page while the current one is consumed (Default: True)
+		
+		Yields:
+			User: One friend at a time
+		
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		page = 1
+		friends = self._fetchFriendsPage(page, page_size)
+		while friends:
+			ahead = self._fetches.submit(self._fetchFriendsPage, page + 1, page_size) if read_ahead and len(friends) >= page_size else None
+			for data in friends:
+				yield User(**data)
+			
+			if len(friends) < page_size:
+				return
+			
+			page += 1
+			friends = ahead.result() if ahead else self._fetchFriendsPage(page, page_size)
+	
+	@_flight.coalesce
+	@_retry.idempotent
 	def fetchAllGroups(self):
 		"""Fetch all group IDs are joining and chatting.
 		
@@ -543,7 +699,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -561,6 +717,8 @@ class ZaloAPI(object):
 	GET METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	def getLastMsgs(self):
 		"""Get last message the client's friends/group chat room.
 			
@@ -575,9 +733,10 @@ class ZaloAPI(object):
 			"zpw_ver": "645",
 			"zpw_type": "30",
 			"params": self._encode({
-				"threadIdLocalMsgId": json.dumps({}),
+				"threadIdLocalMsgId": _util.json_dumps({}),
 				"imei": self._imei
-			})
+			}),
+			"nretry": 0
 		}
 		
 		response = self._get("https://tt-convers-wpa.chat.zalo.me/api/preloadconvers/get-last-msgs", params=params)
@@ -591,7 +750,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -601,11 +760,15 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	def getRecentGroup(self, groupId):
+	@_flight.coalesce
+	@_retry.idempotent
+	def getRecentGroup(self, groupId, globalMsgId=None, count=50):
 		"""Get recent messages in group by ID.
 			
 		Args:
 			groupId (int | str): Group ID to get recent msgs
+			globalMsgId (int | str): Get the messages older than this message ID, to page back (Default: the latest ones)
+			count (int): Number of messages to get (Default: 50)
 			
 		Returns:
 			object: `Group` List msg data in groupMsgs
@@ -617,8 +780,8 @@ class ZaloAPI(object):
 		params = {
 			"params": self._encode({
 				"groupId": str(groupId),
-				"globalMsgId": 10000000000000000,
-				"count": 50,
+				"globalMsgId": int(globalMsgId) if globalMsgId else 10000000000000000,
+				"count": count,
 				"msgIds": [],
 				"imei": self._imei,
 				"src": 1
@@ -633,13 +796,13 @@ class ZaloAPI(object):
 		results = data.get("data") if data.get("error_code") == 0 else None
 		if results:
 			results = self._decode(results)
-			results = json.loads(results.get("data")) if results.get("error_code") == 0 else results
+			results = _util.json_loads(results.get("data")) if results.get("error_code") == 0 else results
 			if results == None:
 				results = {"error_code": 1337, "error_message": "Data is None"}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -649,6 +812,11 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	def _fetchRecentGroupMsgs(self, groupId, globalMsgId=None):
+		return self.getRecentGroup(groupId, globalMsgId).groupMsgs or []
+	
+	@_flight.coalesce
+	@_retry.idempotent
 	def _getGroupBoardList(self, board_type, page, count, last_id, last_type, groupId):
 		params = {
 			"params": self._encode({
@@ -793,12 +961,12 @@ class ZaloAPI(object):
 		
 		payload = {
 			"params": self._encode({
-				"profile": json.dumps({
+				"profile": _util.json_dumps({
 					"name": name,
 					"dob": dob,
 					"gender": int(gender)
 				}),
-				"biz": json.dumps(biz),
+				"biz": _util.json_dumps(biz),
 				"language": language
 			})
 		}
@@ -814,7 +982,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -855,7 +1023,7 @@ class ZaloAPI(object):
 				"avatarSize": 120,
 				"clientId": str(self.uid) + _util.formatTime("%H:%M %d/%m/%Y"),
 				"language": language,
-				"metaData": json.dumps({
+				"metaData": _util.json_dumps({
 					"origin": {
 						"width": width,
 						"height": height
@@ -880,7 +1048,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -898,6 +1066,7 @@ class ZaloAPI(object):
 	USER ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def sendFriendRequest(self, userId, msg, language="vi"):
 		"""Send friend request to a user by ID.
 			
@@ -925,7 +1094,7 @@ class ZaloAPI(object):
 				"reqsrc": 30,
 				"imei": self._imei,
 				"language": language,
-				"srcParams": json.dumps({
+				"srcParams": _util.json_dumps({
 					"uidTo": str(userId)
 				})
 			})
@@ -942,7 +1111,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -952,6 +1121,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def acceptFriendRequest(self, userId, language="vi"):
 		"""Accept friend request from user by ID.
 			
@@ -989,7 +1159,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -999,6 +1169,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def blockViewFeed(self, userId, isBlockFeed):
 		"""Block/Unblock friend view feed by ID.
 			
@@ -1037,7 +1208,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1047,6 +1218,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def blockUser(self, userId):
 		"""Block user by ID.
 			
@@ -1083,7 +1255,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1093,6 +1265,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def unblockUser(self, userId):
 		"""Unblock user by ID.
 			
@@ -1129,7 +1302,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1147,6 +1320,7 @@ class ZaloAPI(object):
 	GROUP ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("group_admin")
 	def createGroup(self, name=None, description=None, members=[], nameChanged=1, createLink=1):
 		"""Create a new group.
 			
@@ -1205,7 +1379,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1215,6 +1389,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def changeGroupAvatar(self, filePath, groupId):
 		"""Upload/Change group avatar by ID.
 		
@@ -1263,7 +1438,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1273,6 +1448,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def changeGroupName(self, groupName, groupId):
 		"""Set/Change group name by ID.
 		
@@ -1314,7 +1490,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1327,6 +1503,7 @@ class ZaloAPI(object):
 	def changeGroupDesc(self, groupDesc, groupId):
 		"""Not Available Yet"""
 	
+	@_ratelimit.limited("group_admin")
 	def changeGroupSetting(self, groupId, defaultMode="default", **kwargs):
 		"""Update group settings by ID.
 		
@@ -1436,7 +1613,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1446,6 +1623,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def changeGroupOwner(self, newAdminId, groupId):
 		"""Change group owner (yellow key) by ID.
 		
@@ -1485,7 +1663,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1495,6 +1673,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def addUsersToGroup(self, user_ids, groupId):
 		"""Add friends/users to a group.
 			
@@ -1546,7 +1725,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1556,6 +1735,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def kickUsersInGroup(self, members, groupId):
 		"""Kickout members in group by ID.
 		
@@ -1600,7 +1780,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1610,6 +1790,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def blockUsersInGroup(self, members, groupId):
 		"""Blocked members in group by ID.
 		
@@ -1651,7 +1832,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1661,6 +1842,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def unblockUsersInGroup(self, members, groupId):
 		"""unblock members in group by ID.
 		
@@ -1702,7 +1884,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1712,6 +1894,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def addGroupAdmins(self, members, groupId):
 		"""Add admins to the group (white key).
 		
@@ -1755,7 +1938,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1765,6 +1948,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("group_admin")
 	def removeGroupAdmins(self, members, groupId):
 		"""Remove admins in the group (white key) by ID.
 		
@@ -1808,7 +1992,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1818,6 +2002,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def pinGroupMsg(self, pinMsg, groupId):
 		"""Pin message in group by ID.
 		
@@ -1854,7 +2039,7 @@ class ZaloAPI(object):
 		
 		if pinMsg.msgType == "webchat":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1865,7 +2050,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.voice":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1875,7 +2060,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.photo", "chat.video.msg"]:
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1887,12 +2072,12 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.sticker":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
 				"senderName": pinMsg.dName,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"id": pinMsg.content.id,
 					"catId": pinMsg.content.catId,
 					"type": pinMsg.content.type
@@ -1902,8 +2087,8 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.recommended", "chat.link"]:
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1917,9 +2102,9 @@ class ZaloAPI(object):
 				"artist": extra.get("artist", ""),
 				"stream_icon": extra.get("stream_icon", ""),
 				"type": 2,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"action": pinMsg.content.action,
-					"params": json.dumps({
+					"params": _util.json_dumps({
 						"mediaTitle": extra.get("mediaTitle", ""),
 						"artist": extra.get("artist", ""),
 						"src": extra.get("src", ""),
@@ -1933,7 +2118,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.location.new":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1944,14 +2129,14 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "share.file":
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
 				"senderName": pinMsg.dName,
 				"title": pinMsg.content.title,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"fileSize": "7295",
 					"checksum": extra.get("checksum", ""),
 					"fileExt": extra.get("fileExt", ""),
@@ -1966,7 +2151,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.gif":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.uid),
@@ -1987,7 +2172,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1997,6 +2182,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def unpinGroupMsg(self, pinId, pinTime, groupId):
 		"""Unpin message in group by ID.
 		
@@ -2037,7 +2223,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2047,6 +2233,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def deleteGroupMsg(self, msgId, ownerId, clientMsgId, groupId):
 		"""Delete message in group by ID.
 		
@@ -2093,7 +2280,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2103,6 +2290,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	def viewGroupPending(self, groupId):
 		"""See list of people pending approval in group by ID.
 		
@@ -2136,7 +2325,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2146,6 +2335,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def handleGroupPending(self, members, groupId, isApprove=True):
 		"""Approve/Deny pending users to the group from the group's approval.
 		
@@ -2189,7 +2379,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 				
@@ -2199,6 +2389,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	def viewPollDetail(self, pollId):
 		"""View poll data by ID.
 		
@@ -2232,7 +2424,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2242,6 +2434,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def createPoll(
 		self,
 		question,
@@ -2316,7 +2509,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2326,6 +2519,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def lockPoll(self, pollId):
 		"""Lock/end poll in group by ID.
 		
@@ -2364,7 +2558,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2374,6 +2568,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	def disperseGroup(self, groupId):
 		"""Disperse group by ID.
 		
@@ -2412,7 +2607,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2451,6 +2646,7 @@ class ZaloAPI(object):
 		else:
 			return self.sendMessage(message, thread_id, thread_type, mark_message, ttl)
 	
+	@_ratelimit.limited("message")
 	def sendMessage(self, message, thread_id, thread_type, mark_message=None, ttl=0):
 		"""Send message to a thread (user/group).
 			
@@ -2512,7 +2708,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2526,6 +2722,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def replyMessage(self, message, replyMsg, thread_id, thread_type, ttl=0):
 		"""Reply message in group by ID.
 			
@@ -2558,7 +2755,7 @@ class ZaloAPI(object):
 				"qmsgType": _util.getClientMessageType(replyMsg.msgType),
 				"qmsg": replyMsg.content,
 				"qmsgTs": replyMsg.ts,
-				"qmsgAttach": json.dumps({}),
+				"qmsgAttach": _util.json_dumps({}),
 				"qmsgTTL": 0,
 				"ttl": ttl,
 			}
@@ -2566,7 +2763,7 @@ class ZaloAPI(object):
 		
 		if not isinstance(replyMsg.content, str):
 			payload["params"]["qmsg"] = ""
-			payload["params"]["qmsgAttach"] = json.dumps(replyMsg.content.toDict())
+			payload["params"]["qmsgAttach"] = _util.json_dumps(replyMsg.content.toDict())
 		
 		if message.style:
 			payload["params"]["textProperties"] = message.style
@@ -2597,7 +2794,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2611,6 +2808,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendMentionMessage(self, message, groupId, ttl=0):
 		"""Send message to a group with mention by ID.
 			
@@ -2659,7 +2857,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2669,6 +2867,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def undoMessage(self, msgId, cliMsgId, thread_id, thread_type):
 		"""Undo message from the client by ID.
 			
@@ -2723,7 +2922,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2737,6 +2936,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	def sendReaction(self, messageObject, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2761,7 +2961,7 @@ class ZaloAPI(object):
 		payload = {
 			"params": {
 				"react_list": [{
-					"message": json.dumps({
+					"message": _util.json_dumps({
 						"rMsg": [{
 							"gMsgID": int(messageObject.msgId),
 							"cMsgID": int(messageObject.cliMsgId),
@@ -2799,7 +2999,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2813,6 +3013,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	def sendMultiReaction(self, reactionObj, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2865,7 +3066,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["react_list"][0]["message"] = json.dumps(payload["params"]["react_list"][0]["message"])
+		payload["params"]["react_list"][0]["message"] = _util.json_dumps(payload["params"]["react_list"][0]["message"])
 		payload["params"] = self._encode(payload["params"])
 		
 		response = self._post(url, params=params, data=payload)
@@ -2879,13 +3080,13 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2899,6 +3100,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendRemoteFile(self, fileUrl, thread_id, thread_type, fileName="default", fileSize=None, extension="vrxx", ttl=0):
 		"""Send File to a User/Group with url.
 			
@@ -2979,7 +3181,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2993,6 +3195,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendRemoteVideo(self, videoUrl, thumbnailUrl, duration, thread_id, thread_type, width=1280, height=720, message=None, ttl=0):
 		"""Send (Forward) video to a User/Group with url.
 		
@@ -3039,7 +3242,7 @@ class ZaloAPI(object):
 				"ttl": ttl,
 				"zsource": 704,
 				"msgType": 5,
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"videoUrl": str(videoUrl),
 					"thumbUrl": str(thumbnailUrl),
 					"duration": int(duration),
@@ -3089,7 +3292,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3103,6 +3306,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendRemoteVoice(self, voiceUrl, thread_id, thread_type, fileSize=None, ttl=0):
 		"""Send voice by url.
 			
@@ -3136,7 +3340,7 @@ class ZaloAPI(object):
 				"zsource": -1,
 				"msgType": 3,
 				"clientId": str(_util.now()),
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"voiceUrl": str(voiceUrl),
 					"m4aUrl": str(voiceUrl),
 					"fileSize": int(fileSize)
@@ -3166,7 +3370,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3180,6 +3384,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendLocalImage(self, imagePath, thread_id, thread_type, width=2560, height=2560, message=None, custom_payload=None, ttl=0):
 		"""Send Image to a User/Group with local file.
 			
@@ -3231,7 +3436,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3264,7 +3469,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3324,7 +3529,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3351,6 +3556,7 @@ class ZaloAPI(object):
 			User.fromDict(uploadData, None)
 		)
 	
+	@_ratelimit.limited("message")
 	def sendLocalGif(self, gifPath, thumbnailUrl, thread_id, thread_type, gifName="vrxx.gif", width=500, height=500, ttl=0):
 		"""Send Gif to a User/Group with local file.
 			
@@ -3421,7 +3627,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3435,6 +3641,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendSticker(self, stickerType, stickerId, cateId, thread_id, thread_type, ttl=0):
 		"""Send Sticker to a User/Group.
 			
@@ -3493,7 +3700,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3507,6 +3714,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("message")
 	def sendCustomSticker(
 		self,
 		staticImgUrl,
@@ -3553,12 +3761,12 @@ class ZaloAPI(object):
 				"hdUrl": staticImgUrl,
 				"width": width,
 				"height": height,
-				"properties": json.dumps({
+				"properties": _util.json_dumps({
 					"subType": 0,
 					"color": -1,
 					"size": -1,
 					"type": 3,
-					"ext": json.dumps({
+					"ext": _util.json_dumps({
 						"sSrcStr": "@STICKER",
 						"sSrcType": 0
 					})
@@ -3566,7 +3774,7 @@ class ZaloAPI(object):
 				"contentId": _util.now(),
 				"thumb_height": width,
 				"thumb_width": height,
-				"webp": json.dumps({
+				"webp": _util.json_dumps({
 					"width": width,
 					"height": height,
 					"url": animationImgUrl
@@ -3602,7 +3810,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3616,6 +3824,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendLink(self, linkUrl, title, thread_id, thread_type, thumbnailUrl=None, domainUrl=None, desc=None, message=None, ttl=0):
 		"""Send link to a User/Group with url.
 			
@@ -3650,7 +3859,7 @@ class ZaloAPI(object):
 				"desc": desc or "",
 				"thumb": thumbnailUrl or "",
 				"type": 0,
-				"media": json.dumps({
+				"media": _util.json_dumps({
 					"type": 0,
 					"count": 0,
 					"mediaTitle": "",
@@ -3689,7 +3898,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3703,6 +3912,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	def sendReport(self, user_id, reason=0, content=None):
 		"""Send report to Zalo.
 		
@@ -3751,7 +3961,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3765,6 +3975,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	def sendBusinessCard(self, userId, qrCodeUrl, thread_id, thread_type, phone=None, ttl=0):
 		"""Send business card by user ID.
 			
@@ -3811,7 +4022,7 @@ class ZaloAPI(object):
 			payload["params"]["visibility"] = 0
 			payload["params"]["grid"] = str(thread_id)
 		
-		payload["params"]["msgInfo"] = json.dumps(payload["params"]["msgInfo"])
+		payload["params"]["msgInfo"] = _util.json_dumps(payload["params"]["msgInfo"])
 		payload["params"] = self._encode(payload["params"])
 		
 		response = self._post(url, params=params, data=payload)
@@ -3825,7 +4036,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3946,7 +4157,7 @@ class ZaloAPI(object):
 			payload["params"]["msgInfos"]["grid"] = str(destination_id)
 			payload["params"]["imei"] = self._imei
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		response = self._post(url, params=params, data=payload)
@@ -4022,7 +4233,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		response = self._post(url, params=params, data=payload)
@@ -4040,10 +4251,95 @@ class ZaloAPI(object):
 	LISTEN METHODS
 	"""
 	
-	def _listen_req(self, delay=1, thread=False, reconnect=5):
+	def _threadId(self, msgObj, thread_type):
+		if thread_type == ThreadType.GROUP:
+			return str(int(msgObj.idTo) or self.uid)
+		
+		return str(int(msgObj.uidFrom) or msgObj.idTo)
+	
+	def _submitMessages(self, batch, thread_type):
+		"""Queue ``batch`` to ``onMessages`` on the handler executor, one call per conversation."""
+		for threadId, messages in _executor.lanes(batch, lambda msgObj: self._threadId(msgObj, thread_type)).items():
+			self._handlers.submit(threadId, self.onMessages, messages, thread_type)
+	
+	def _supervise(self, session, reconnect=5):
+		"""Run ``session`` until the listener is stopped, reconnecting with jittered exponential backoff.
+		
+		``session()`` holds one connection and returns ``False`` to stop listening. Network errors are
+		reconnected after, other errors only in ``run_forever`` mode.
+		"""
+		supervisor = self._supervisor = _supervisor.Supervisor(self._reconnect_policy, reconnect)
 		self._condition.clear()
-		HasRead = set()
+		while True:
+			supervisor.connecting()
+			error = None
+			try:
+				keep = session()
+			except _supervisor.DISCONNECT_ERRORS as e:
+				error, keep = e, True
+			except Exception as e:
+				error, keep = e, getattr(self, "run_forever", False)
+				self.onErrorCallBack(e)
+			
+			rotating, self._start_fix = self._start_fix, False
+			stopped = self._condition.is_set() and not rotating
+			if supervisor.draining():
+				self.onDisconnect(error)
+			elif isinstance(error, _supervisor.DISCONNECT_ERRORS):
+				logger.warning(f"Unable to connect: {error}")
+			
+			if stopped or not keep:
+				break
+			
+			self._condition.clear()
+			if not rotating:
+				delay = supervisor.backoff()
+				logger.debug(f"Reconnecting in {delay:.1f}s (attempt {supervisor.attempts + 1})...")
+				if self._condition.wait(delay):
+					break
+		
+		supervisor.stopped()
+	
+	def _connected(self):
+		reconnected = self._supervisor.live()
+		if reconnected:
+			self.onReconnect(*reconnected)
+		
+		return reconnected
+	
+	def _backfillGap(self, thread):
+		"""Replay the messages missed while the websocket was down, oldest first, before the live frames.
+		
+		Live frames repeating a replayed message are dropped by the overlap filter.
+		"""
+		self._overlap.start()
+		try:
+			missed = self._backfill.run(self._cursors, self.getLastMsgs, self._fetchRecentGroupMsgs, self._fetches.submit)
+			for frame in _backfill.frames(missed):
+				frame = self._overlap.filter(frame)
+				if frame is None:
+					continue
+				
+				self._cursors.record(frame)
+				if self._events is not None:
+					self._events.put(frame, frame[1])
+				
+				else:
+					self._dispatchFrame(frame, thread)
+			
+			logger.debug(f"Backfilled {len(missed)} missed messages")
 		
+		except Exception as e:
+			logger.warning(f"Unable to backfill missed messages: {e}")
+		
+		finally:
+			self._overlap.end()
+	
+	def _listen_req(self, delay=1, thread=False, reconnect=5):
+		HasRead = set()
+		self._supervise(lambda: self._listen_req_session(delay, thread, HasRead), reconnect)
+	
+	def _listen_req_session(self, delay, thread, HasRead):
 		try:
 			self.onListening()
 			self._listening = True
@@ -4057,15 +4353,17 @@ class ZaloAPI(object):
 				messages = self.getLastMsgs()
 				groupmsg = messages.groupMsgs
 				messages = messages.msgs
+				if self._supervisor.state != _supervisor.LIVE:
+					self._connected()
 				
 				for message in messages + groupmsg:
 					if int(message["ts"]) >= ListenTime and message["msgId"] not in HasRead:
 						HasRead.add(message["msgId"])
-						msgObj = MessageObject.fromDict(message, None)
+						msgObj = CompactMessageObject.fromDict(message, None)
 						if message in messages:
 							
 							[
-								pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
+								self._handlers.submit(str(int(msgObj.uidFrom) or msgObj.idTo), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
 								if thread else
 								self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
 							]
@@ -4073,12 +4371,12 @@ class ZaloAPI(object):
 						else:
 							
 							[
-								pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
+								self._handlers.submit(str(int(msgObj.idTo) or self.uid), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
 								if thread else
 								self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
 							]
 				
-				time.sleep(delay)
+				self._condition.wait(delay)
 		
 		except KeyboardInterrupt:
 			self._condition.set()
@@ -4087,33 +4385,120 @@ class ZaloAPI(object):
 			pid = os.getpid()
 			os.kill(pid, signal.SIGTERM)
 		
-		except Exception as e:
-			self._condition.set()
-			self._listening = False
-			self.onErrorCallBack(e)
-			if self.run_forever:
-				while not self._listening:
-					try:
-						logger.debug("Run forever mode is enabled, trying to reconnect...")
-						self._listen_req(delay, thread, reconnect)
-					except:
-						pass
-					
-					time.sleep(reconnect)
-		
 		finally:
 			self._listening = False
+		
+		return True
 	
 	def _fix_recv(self):
-		old_timestamp = int(time.time())
-		time.sleep(50 * 60)
 		self._start_fix = True
 		self._condition.set()
 	
+	def _dispatchFrame(self, frame, thread=False):
+		n, cmd, s, parsedData = frame
+		if n == 1 and cmd == 501 and s == 0:
+			userMsgs = parsedData["data"]["msgs"]
+			
+			batch = [CompactMessageObject.fromDict(message, None) for message in userMsgs]
+			[
+				self._submitMessages(batch, ThreadType.USER)
+				if thread else
+				self.onMessages(batch, ThreadType.USER)
+			]
+		
+		elif n == 1 and cmd == 521 and s == 0:
+			groupMsgs = parsedData["data"]["groupMsgs"]
+			
+			batch = []
+			for message in groupMsgs:
+				try:
+					message = self._recent.resolve(message["idTo"], message, self._fetchRecentGroupMsgs)
+				except:
+					pass
+				
+				batch.append(CompactMessageObject.fromDict(message, None))
+			
+			[
+				self._submitMessages(batch, ThreadType.GROUP)
+				if thread else
+				self.onMessages(batch, ThreadType.GROUP)
+			]
+		
+		elif n == 1 and cmd in [502, 522, 504, 524] and s == 0:
+			# Delivereds, Seen, Clear Unread, ...
+			return
+		
+		elif n == 1 and cmd == 602 and s == 0:
+			# Typing Event
+			return
+		
+		elif n == 1 and cmd == 601 and s == 0:
+			controls = parsedData["data"].get("controls", [])
+			for control in controls:
+				if control["content"]["act_type"] == "group":
+					
+					if control["content"]["act"] == "join_reject":
+						continue
+					
+					groupEventData = _util.json_loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
+					groupEventType = _util.getGroupEventType(control["content"]["act"])
+					event_data = EventObject.fromDict(groupEventData)
+					event_type = groupEventType
+					[
+						self._handlers.submit(str(event_data.groupId), self.onEvent, event_data, event_type)
+						if thread else
+						self.onEvent(event_data, event_type)
+					]
+		
+		elif cmd == 612:
+			reacts = parsedData["data"].get("reacts", [])
+			reactGroups = parsedData["data"].get("reactGroups", [])
+			
+			for react in reacts:
+				react["content"] = _util.json_loads(react["content"])
+				msgObj = CompactMessageObject.fromDict(react, None)
+				[
+					self._handlers.submit(str(int(msgObj.uidFrom) or msgObj.idTo), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
+					if thread else
+					self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
+				]
+			
+			for reactGroup in reactGroups:
+				reactGroup["content"] = _util.json_loads(reactGroup["content"])
+				msgObj = CompactMessageObject.fromDict(reactGroup, None)
+				[
+					self._handlers.submit(str(int(msgObj.idTo) or self.uid), self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
+					if thread else
+					self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
+				]
+	
+	def _startDispatcher(self, thread):
+		self._dispatchThreaded = thread
+		if self._dispatcher is None or not self._dispatcher.is_alive():
+			self._dispatcher = threading.Thread(target=self._dispatchEvents, name="zlapi-dispatch", daemon=True)
+			self._dispatcher.start()
+	
+	def _dispatchEvents(self):
+		while True:
+			frame = self._events.get()
+			if frame is None:
+				return
+			
+			try:
+				self._dispatchFrame(frame, self._dispatchThreaded)
+			except Exception as e:
+				self.onErrorCallBack(e)
+	
 	def _listen_ws(self, thread=False, reconnect=5):
-		self._condition.clear()
+		if self._events is not None:
+			self._startDispatcher(thread)
+		
+		self._supervise(lambda: self._listen_ws_session(thread), reconnect)
+	
+	def _wsConnect(self):
+		urls = self._state._config["zpw_ws"]
 		params = {"zpw_ver": 645, "zpw_type": 30, "t": _util.now()}
-		url = self._state._config["zpw_ws"][0] + "?" + urllib.parse.urlencode(params)
+		url = urls[self._wsIndex % len(urls)] + "?" + urllib.parse.urlencode(params)
 		
 		user_agent = self._state._headers.get("User-Agent") or _util.HEADERS["User-Agent"]
 		raw_cookies = _util.dict_to_raw_cookies(self._state.get_cookies())
@@ -4126,7 +4511,6 @@ class ZaloAPI(object):
 			"Accept-Language": "en-US,en;q=0.9",
 			"Cache-Control": "no-cache",
 			"Connection": "Upgrade",
-			"Host": urllib.parse.urlparse(url).netloc,
 			"Origin": "https://chat.zalo.me",
 			"Pargma": "no-cache",
 			"Sec-Websocket-Extensions": "permessage-deflate; client_max_window_bits",
@@ -4136,119 +4520,100 @@ class ZaloAPI(object):
 			"Cookie": raw_cookies
 		}
 		
-		with connect(url, additional_headers=headers) as ws:
-			pool.submit(self._fix_recv)
+		return connect(url, additional_headers=headers)
+	
+	def _scheduleRotation(self, commands):
+		if not self._reconnect_policy.rotate:
+			return None
+		
+		rotation = threading.Timer(self._reconnect_policy.rotate, self._rotateWs, (commands,))
+		rotation.daemon = True
+		rotation.start()
+		return rotation
+	
+	def _rotateWs(self, commands):
+		"""Open the next ``zpw_ws`` websocket and hand it over to the listener once its key has arrived.
+		
+		The old websocket is closed only then, so there is no delivery gap. Messages received
+		on both during the overlap are dispatched once.
+		"""
+		old = self._ws
+		if old is None or self._condition.is_set():
+			return
+		
+		self._wsIndex += 1
+		self._overlap.start()
+		ws = None
+		try:
+			ws = self._wsConnect()
+			reader = _offload.FrameReader(None, self._offload, commands=commands)
+			deadline = time.monotonic() + 30
+			frame = None
+			while not (frame and frame[:3] == _offload.KEY_FRAME):
+				frame = reader.decode(ws.recv(timeout=max(deadline - time.monotonic(), 0)))
+		
+		except Exception as e:
+			if ws is not None:
+				ws.close()
+			
+			self._overlap.end()
+			logger.warning(f"Websocket rotation failed, reconnecting instead: {e}")
+			self._fix_recv()
+			old.close()
+			return
+		
+		self._handover = (ws, reader, frame[3]["key"])
+		if self._ws is not old:
+			# The listener stopped meanwhile
+			self._handover = None
+			ws.close()
+			return
+		
+		old.close()
+	
+	def _listen_ws_session(self, thread):
+		commands = _offload.commands(self, ZaloAPI, {601: "onEvent"})
+		reader = _offload.FrameReader(getattr(self, "ws_key", None), self._offload, commands=commands)
+		ws = self._ws = self._wsConnect()
+		rotation = None
+		try:
+			rotation = self._scheduleRotation(commands)
+			if self._connected() and self._backfill is not None:
+				self._backfillGap(thread)
+			
 			self.onListening()
 			self._listening = True
 			while not self._condition.is_set():
 				try:
-					data = ws.recv()
-					if not isinstance(data, bytes):
-						continue
-					
-					encodedHeader = data[:4]
-					n, cmd, s = _util.getHeader(encodedHeader)
-					
-					dataToDecode = data[4:]
-					decodedData = dataToDecode.decode("utf-8")
-					if not decodedData:
+					frame = reader.read(ws.recv)
+					if not frame:
 						continue
 					
-					parsed = json.loads(decodedData)
-					if n == 1 and cmd == 1 and s == 1 and "key" in parsed:
-						self.ws_key = parsed["key"]
+					n, cmd, s, parsedData = frame
+					if n == 1 and cmd == 1 and s == 1 and "key" in parsedData:
+						self.ws_key = parsedData["key"]
 						continue
 					
-					if not hasattr(self, "ws_key"):
+					if parsedData is None:
 						logger.error("Unable to decrypt data because key not found")
 						continue
 					
-					parsedData = _util.zws_decode(parsed, self.ws_key)
-					if n == 1 and cmd == 3000 and s == 0:
-						logger.warning("Another connection is opened, closing this one")
-						ws.close()
-					
-					elif n == 1 and cmd == 501 and s == 0:
-						parsedData = _util.zws_decode(parsed, self.ws_key)
-						userMsgs = parsedData["data"]["msgs"]
-						
-						for message in userMsgs:
-							msgObj = MessageObject.fromDict(message, None)
-							[
-								pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-								if thread else
-								self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-							]
-					
-					elif n == 1 and cmd == 521 and s == 0:
-						groupMsgs = parsedData["data"]["groupMsgs"]
-						
-						try:
-							for message in groupMsgs:
-								messages = self.getRecentGroup(message["idTo"])["groupMsgs"]
-								message = next((msg for msg in messages if msg["msgId"] == message["msgId"]), message)
-						except:
-							pass
-							
-						msgObj = MessageObject.fromDict(message, None)
-						[
-							pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-							if thread else
-							self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-						]
-					
-					elif n == 1 and cmd in [502, 522, 504, 524] and s == 0:
-						# Delivereds, Seen, Clear Unread, ...
-						continue
-					
-					elif n == 1 and cmd == 602 and s == 0:
-						# Typing Event
+					frame = self._overlap.filter(frame)
+					if frame is None:
 						continue
 					
-					elif n == 1 and cmd == 601 and s == 0:
-						controls = parsedData["data"].get("controls", [])
-						for control in controls:
-							if control["content"]["act_type"] == "group":
-								
-								if control["content"]["act"] == "join_reject":
-									continue
-								
-								groupEventData = json.loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
-								groupEventType = _util.getGroupEventType(control["content"]["act"])
-								event_data = EventObject.fromDict(groupEventData)
-								event_type = groupEventType
-								[
-									pool.submit(self.onEvent, event_data, event_type)
-									if thread else
-									self.onEvent(event_data, event_type)
-								]
-						
-						continue
+					self._cursors.record(frame)
+					if n == 1 and cmd == 3000 and s == 0:
+						# Expected on the old websocket of a rotation
+						if self._handover is None:
+							logger.warning("Another connection is opened, closing this one")
+							ws.close()
 					
-					elif cmd == 612:
-						reacts = parsedData["data"].get("reacts", [])
-						reactGroups = parsedData["data"].get("reactGroups", [])
-						
-						for react in reacts:
-							react["content"] = json.loads(react["content"])
-							msgObj = MessageObject.fromDict(react, None)
-							[
-								pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-								if thread else
-								self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.uidFrom) or msgObj.idTo), ThreadType.USER)
-							]
-						
-						for reactGroup in reactGroups:
-							reactGroup["content"] = json.loads(reactGroup["content"])
-							msgObj = MessageObject.fromDict(reactGroup, None)
-							[
-								pool.submit(self.onMessage, msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-								if thread else
-								self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, str(int(msgObj.idTo) or self.uid), ThreadType.GROUP)
-							]
+					elif self._events is not None:
+						self._events.put(frame, cmd)
 					
 					else:
-						continue
+						self._dispatchFrame(frame, thread)
 				
 				except KeyboardInterrupt:
 					self._condition.set()
@@ -4258,43 +4623,43 @@ class ZaloAPI(object):
 					pid = os.getpid()
 					os.kill(pid, signal.SIGTERM)
 				
-				except (websockets.ConnectionClosedOK, websockets.exceptions.ConnectionClosedOK):
-					self._condition.set()
-					ws.close()
-					break
-				
-				except (websockets.ConnectionClosedError, websockets.exceptions.ConnectionClosedError):
-					self._start_fix = True
-					self._condition.set()
-					ws.close()
-				
-				except Exception as e:
-					if str(e) == "sent 1000 (OK); then received 1000 (OK) NORMAL_CLOSURE":
-						pass
+				except websockets.ConnectionClosed as e:
+					handover, self._handover = self._handover, None
+					if handover is None or self._condition.is_set():
+						if handover is not None:
+							handover[0].close()
+						
+						if isinstance(e, websockets.ConnectionClosedOK):
+							return self._start_fix
+						
+						raise
 					
-					else:
-						self._listening = False
-						self._start_fix = False
-						self._condition.set()
-						ws.close()
-						self.onErrorCallBack(e)
-						if self.run_forever:
-							while not self._listening:
-								try:
-									logger.debug("Run forever mode is enabled, trying to reconnect...")
-									self._listen_ws(thread, reconnect)
-								except:
-									pass
-								
-								time.sleep(reconnect)
+					# The old websocket is drained, carry on with the new one
+					reader.close()
+					ws, reader, self.ws_key = handover
+					self._ws = ws
+					self._overlap.end()
+					rotation = self._scheduleRotation(commands)
+					logger.debug("Websocket rotated")
 				
-				finally:
-					self._listening = False
+				except Exception as e:
+					if str(e) != "sent 1000 (OK); then received 1000 (OK) NORMAL_CLOSURE":
+						raise
+		
+		finally:
+			self._ws = None
+			handover, self._handover = self._handover, None
+			if handover is not None:
+				handover[0].close()
+			
+			if rotation is not None:
+				rotation.cancel()
+			
+			ws.close()
+			reader.close()
+			self._listening = False
 		
-		if self._start_fix:
-			logger.debug("Reconnecting websocket because of interruption...")
-			self._start_fix = False
-			self._listen_ws(thread, reconnect)
+		return True
 	
 	def startListening(self, delay=1, thread=False, type="websocket", reconnect=5):
 		"""Start listening from an external event loop.
@@ -4327,6 +4692,9 @@ class ZaloAPI(object):
 		"""Stop the listening loop."""
 		self.listening = False
 		self._condition.set()
+		ws = self._ws
+		if ws is not None:
+			ws.close()
 	
 	def listen(self, delay=1, thread=False, type="websocket", run_forever=False, reconnect=5):
 		"""Initialize and runs the listening loop continually.
@@ -4368,6 +4736,26 @@ class ZaloAPI(object):
 		"""Called when the client is listening."""
 		logger.debug("Listening...")
 	
+	def onDisconnect(self, error=None):
+		"""Called when the listener connection ends.
+		
+		Args:
+			error (Exception): Error that ended the connection, ``None`` when it was closed (stop or periodic renewal)
+		"""
+		if error:
+			logger.warning("Listener disconnected: {}".format(error))
+		else:
+			logger.debug("Listener disconnected")
+	
+	def onReconnect(self, attempts, downtime):
+		"""Called when the listener is connected again after a disconnect.
+		
+		Args:
+			attempts (int): Connection attempts it took
+			downtime (float): Seconds without a connection
+		"""
+		logger.debug("Reconnected after {:.1f}s ({} attempts)".format(downtime, attempts))
+	
 	def onMessage(
 		self,
 		mid=None,
@@ -4389,6 +4777,27 @@ class ZaloAPI(object):
 		"""
 		logger.info("{} from {} in {}".format(message, thread_id, thread_type.name))
 	
+	def onMessages(self, batch, thread_type=ThreadType.USER):
+		"""Called with the messages received in one websocket frame.
+		
+		When listening with ``thread=True``, the frame is split by conversation: the
+		messages of each thread get their own call on the handler executor, so calls
+		of one thread run in order and calls of different threads in parallel.
+		
+		Override it to handle a burst at once (e.g. one database write per frame).
+		By default, each message is passed on to `onMessage`.
+		
+		Args:
+			batch (list): The messages, oldest first (As `Message` objects)
+			thread_type (ThreadType): Type of thread that the messages were sent to
+		"""
+		for msgObj in batch:
+			try:
+				self.onMessage(msgObj.msgId, str(int(msgObj.uidFrom) or self.uid), msgObj.content, msgObj, self._threadId(msgObj, thread_type), thread_type)
+			except Exception as e:
+				# One failing message does not cost the rest of the batch
+				self.onErrorCallBack(e)
+	
 	def onEvent(self, event_data, event_type):
 		"""Called when the client listening, and some events occurred.
 
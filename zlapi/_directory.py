@@ -0,0 +1,144 @@
+# -*- coding: UTF-8 -*-
+import sys
+import array
+import itertools
+
+from ._objects import User
+
+_INT64 = (-(1 << 63), (1 << 63) - 1)
+
+
+def _column(values):
+	"""Store a column compactly: ``array('q')`` for integers, interned strings otherwise."""
+	if values and all(type(value) is int and _INT64[0] <= value <= _INT64[1] for value in values):
+		return array.array("q", values)
+
+	return [sys.intern(value) if type(value) is str else value for value in values]
+
+
+class Directory(object):
+	"""Column-oriented table of users, for friend and group member lists.
+
+	Each field is stored once as a column (an ``array`` for integer fields,
+	interned strings otherwise) instead of one dict per user, with an
+	id -> row index for lookups. Rows are materialized as ``User`` objects
+	only when read.
+
+	Args:
+		records (list): User dicts as returned by Zalo
+		key (str): Field holding the user ID (Default: ``userId``)
+
+	Example:
+		>>> friends = client.fetchAllFriends(columnar=True)
+		>>> friends["123456789"].displayName
+		>>> women = friends.where(gender=1)
+		>>> recent = friends.between("lastActionTime", low=int(time.time() * 1000) - 86400000)
+	"""
+	__slots__ = ("key", "_columns", "_index", "_length")
+
+	def __init__(self, records=(), key="userId"):
+		records = list(records)
+		fields = {}
+		for record in records:
+			for field in record:
+				fields.setdefault(field, None)
+
+		columns = {field: _column([record.get(field) for record in records]) for field in fields}
+		self._set(key, columns, len(records))
+
+	def _set(self, key, columns, length):
+		self.key = key
+		self._columns = columns
+		self._length = length
+		ids = columns.get(key, ())
+		self._index = {str(uid): row for row, uid in enumerate(ids)}
+
+	@classmethod
+	def _from_columns(cls, key, columns, length):
+		directory = cls.__new__(cls)
+		directory._set(key, columns, length)
+		return directory
+
+	@property
+	def fields(self):
+		"""list: Field names, in first seen order."""
+		return list(self._columns)
+
+	@property
+	def ids(self):
+		"""list: User IDs, in row order."""
+		return [str(uid) for uid in self._columns.get(self.key, ())]
+
+	def __len__(self):
+		return self._length
+
+	def __contains__(self, uid):
+		return str(uid) in self._index
+
+	def __iter__(self):
+		return (self.row(row) for row in range(self._length))
+
+	def __getitem__(self, uid):
+		return self.row(self._index[str(uid)])
+
+	def get(self, uid, default=None):
+		"""``User`` with ID ``uid``, or ``default`` if it is not in the directory."""
+		row = self._index.get(str(uid))
+		return default if row is None else self.row(row)
+
+	def column(self, field):
+		"""Values of ``field`` in row order (``None`` where a user lacks it)."""
+		if field in self._columns:
+			return self._columns[field]
+
+		return [None] * self._length
+
+	def row(self, row):
+		"""The user at position ``row`` as a ``User``."""
+		return User(**{field: column[row] for field, column in self._columns.items()})
+
+	def mask(self, field, predicate):
+		"""``predicate`` applied to every value of ``field``.
+
+		Returns:
+			list: One bool per row
+		"""
+		return [bool(predicate(value)) for value in self.column(field)]
+
+	def select(self, mask):
+		"""Rows whose ``mask`` entry is true, as a new ``Directory``."""
+		mask = list(mask)
+		columns = {field: _column(list(itertools.compress(column, mask))) for field, column in self._columns.items()}
+		return self._from_columns(self.key, columns, sum(map(bool, mask)))
+
+	def where(self, predicate=None, **values):
+		"""Rows matching every ``field=value`` and, if given, ``predicate(user)``.
+
+		A value that is a ``set``, ``frozenset``, ``list`` or ``tuple`` matches any of its items.
+		"""
+		mask = [True] * self._length
+		for field, value in values.items():
+			if isinstance(value, (set, frozenset, list, tuple)):
+				value = set(value)
+				mask = [keep and item in value for keep, item in zip(mask, self.column(field))]
+			else:
+				mask = [keep and item == value for keep, item in zip(mask, self.column(field))]
+
+		if predicate is not None:
+			mask = [keep and bool(predicate(self.row(row))) for row, keep in enumerate(mask)]
+
+		return self.select(mask)
+
+	def between(self, field, low=None, high=None):
+		"""Rows whose ``field`` lies in ``[low, high]``, missing bounds are open (e.g. a last-active window)."""
+		return self.select(
+			value is not None and (low is None or value >= low) and (high is None or value <= high)
+			for value in self.column(field)
+		)
+
+	def toList(self):
+		"""The rows as plain dicts."""
+		return [row.toDict() for row in self]
+
+	def __repr__(self):
+		return f"Directory({self._length} users, key={self.key!r})"
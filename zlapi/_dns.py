@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+import time
+import socket
+import asyncio
+import threading
+
+from aiohttp.abc import AbstractResolver
+
+
+class DNSCache(object):
+	"""Thread-safe cache of resolved host addresses, shared by the transports.
+
+	Args:
+		ttl (float): Seconds an answer is reused before the host is resolved again
+	"""
+
+	def __init__(self, ttl=300):
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._entries = {}
+
+	def _get(self, key):
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None or entry[0] < time.monotonic():
+				return None
+
+			return entry[1]
+
+	def _set(self, key, infos):
+		addresses = [(family, proto, sockaddr[0], sockaddr[1]) for family, _, proto, _, sockaddr in infos]
+		with self._lock:
+			self._entries[key] = (time.monotonic() + self.ttl, addresses)
+
+		return addresses
+
+	def resolve(self, host, port, family=socket.AF_UNSPEC):
+		"""Resolve ``host``, reusing a cached answer when there is one.
+
+		Returns:
+			list: ``(family, proto, address, port)`` tuples
+		"""
+		key = (host, port, family)
+		addresses = self._get(key)
+		if addresses is None:
+			addresses = self._set(key, socket.getaddrinfo(host, port, family, socket.SOCK_STREAM))
+
+		return addresses
+
+	async def resolve_async(self, host, port, family=socket.AF_UNSPEC):
+		"""Same as :meth:`resolve`, without blocking the event loop."""
+		key = (host, port, family)
+		addresses = self._get(key)
+		if addresses is None:
+			loop = asyncio.get_running_loop()
+			addresses = self._set(key, await loop.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM))
+
+		return addresses
+
+	def forget(self, host, port=None):
+		"""Drop the cached answers of ``host`` (e.g. after a connection to it failed)."""
+		with self._lock:
+			for key in [key for key in self._entries if key[0] == host and port in (None, key[1])]:
+				del self._entries[key]
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+
+class CachedResolver(AbstractResolver):
+	"""aiohttp resolver answering from a :class:`DNSCache`."""
+
+	def __init__(self, cache):
+		self.cache = cache
+
+	async def resolve(self, host, port=0, family=socket.AF_INET):
+		addresses = await self.cache.resolve_async(host, port, family)
+		return [
+			{
+				"hostname": host,
+				"host": address,
+				"port": address_port,
+				"family": address_family,
+				"proto": proto,
+				"flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+			}
+			for address_family, proto, address, address_port in addresses
+		]
+
+	async def close(self):
+		pass
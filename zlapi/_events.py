@@ -0,0 +1,277 @@
+# -*- coding: UTF-8 -*-
+import time
+import asyncio
+import tempfile
+import threading
+import collections
+
+from . import _util
+from ._exception import ZaloUserError
+
+#: Wait for room, pausing the websocket receive loop
+BLOCK = "block"
+
+#: Make room by dropping the oldest queued low-priority frame
+DROP_OLDEST = "drop_oldest"
+
+#: Write the overflow to a temporary file, read back in order
+SPILL = "spill"
+
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, SPILL)
+
+#: Commands ``drop_oldest`` may drop: reactions
+LOW_PRIORITY = frozenset({612})
+
+
+class _Spill(object):
+	"""Append-only file of JSON encoded frames, read back first in, first out."""
+
+	def __init__(self, directory=None):
+		self._file = tempfile.TemporaryFile(dir=directory)
+		self._read = 0
+		self._write = 0
+		self.pending = 0
+
+	def push(self, item, enqueued):
+		self._file.seek(self._write)
+		self._file.write(_util.json_dumps([enqueued, item]).encode("utf-8") + b"\n")
+		self._write = self._file.tell()
+		self.pending += 1
+
+	def pop(self):
+		self._file.seek(self._read)
+		enqueued, item = _util.json_loads(self._file.readline())
+		self._read = self._file.tell()
+		self.pending -= 1
+		if not self.pending:
+			self._file.seek(0)
+			self._file.truncate()
+			self._read = self._write = 0
+
+		return tuple(item), enqueued
+
+	def close(self):
+		self._file.close()
+
+
+class EventQueue(object):
+	"""Bounded queue of decoded websocket frames between the receive loop and the handlers.
+
+	The listener keeps receiving while the handlers work through the queue. When
+	``maxsize`` frames are waiting, ``overflow`` decides what happens to the next one:
+
+	* ``"block"``: the receive loop waits for room, so the backlog stays on the server side
+	* ``"drop_oldest"``: the oldest queued ``low_priority`` frame (reactions by default) is dropped.
+	  A low-priority frame is dropped on arrival if there is none queued, other frames wait for room
+	* ``"spill"``: frames are written to a temporary file in ``spill_dir`` and read back in order
+
+	Args:
+		maxsize (int): Frames kept in memory
+		overflow (str): ``"block"``, ``"drop_oldest"`` or ``"spill"`` (Default: ``"block"``)
+		low_priority (frozenset): Commands that ``drop_oldest`` may drop
+		spill_dir (str): Directory of the spill file (Default: system temporary directory)
+
+	Example:
+		>>> client = ZaloAPI(..., event_queue=EventQueue(2000, overflow="drop_oldest"))
+		>>> client.getEventStats()["dropped"]
+	"""
+
+	def __init__(self, maxsize=10000, overflow=BLOCK, low_priority=LOW_PRIORITY, spill_dir=None):
+		if overflow not in OVERFLOW_POLICIES:
+			raise ZaloUserError(f"Invalid overflow policy {overflow!r}, expected one of {', '.join(OVERFLOW_POLICIES)}")
+
+		self.maxsize = max(1, maxsize)
+		self.overflow = overflow
+		self.low_priority = frozenset(low_priority)
+		self.spill_dir = spill_dir
+		self._lock = threading.Lock()
+		self._cond = threading.Condition(self._lock)
+		self._waiters = {}
+		self._items = collections.deque()
+		self._spill = None
+		self._closed = False
+		self.enqueued = 0
+		self.dispatched = 0
+		self.spilled = 0
+		self.blocked = 0
+		self.dropped = collections.Counter()
+		self.max_depth = 0
+		self.latency_total = 0.0
+		self.latency_max = 0.0
+
+	def _offer(self, item, cmd):
+		"""Queue, spill or drop ``item``. ``False`` if the caller has to wait for room."""
+		enqueued = time.monotonic()
+		if self._spill is not None and self._spill.pending:
+			# Frames already on disk are older, keep them first
+			self._spill.push(item, enqueued)
+			self.spilled += 1
+
+		elif len(self._items) < self.maxsize:
+			self._items.append((item, enqueued, cmd))
+
+		elif self.overflow == DROP_OLDEST:
+			index = next((index for index, queued in enumerate(self._items) if queued[2] in self.low_priority), None)
+			if index is not None:
+				self.dropped[self._items[index][2]] += 1
+				del self._items[index]
+				self._items.append((item, enqueued, cmd))
+
+			elif cmd in self.low_priority:
+				self.dropped[cmd] += 1
+				return True
+
+			else:
+				return False
+
+		elif self.overflow == SPILL:
+			if self._spill is None:
+				self._spill = _Spill(self.spill_dir)
+
+			self._spill.push(item, enqueued)
+			self.spilled += 1
+
+		else:
+			return False
+
+		self.enqueued += 1
+		self.max_depth = max(self.max_depth, self._depth())
+		return True
+
+	def _take(self):
+		item, enqueued, cmd = self._items.popleft()
+		while self._spill is not None and self._spill.pending and len(self._items) < self.maxsize:
+			spilled, spilled_at = self._spill.pop()
+			self._items.append((spilled, spilled_at, spilled[1]))
+
+		latency = time.monotonic() - enqueued
+		self.dispatched += 1
+		self.latency_total += latency
+		self.latency_max = max(self.latency_max, latency)
+		return item
+
+	def _depth(self):
+		return len(self._items) + (self._spill.pending if self._spill is not None else 0)
+
+	def put(self, item, cmd=None):
+		"""Queue a decoded frame, applying the overflow policy when the queue is full.
+
+		Args:
+			item (tuple): ``(version, cmd, subCmd, data)``
+			cmd (int): Command of the frame, for ``drop_oldest``
+
+		Returns:
+			bool: ``False`` if the queue was closed while waiting for room
+		"""
+		with self._cond:
+			if not self._offer(item, cmd):
+				self.blocked += 1
+				while not self._closed and not self._offer(item, cmd):
+					self._cond.wait()
+
+			self._cond.notify_all()
+			self._notify_async()
+			return not self._closed
+
+	def get(self, timeout=None):
+		"""Oldest queued frame, waiting up to ``timeout`` seconds for one.
+
+		Returns:
+			tuple: The frame, ``None`` on timeout or once the queue is closed and empty
+		"""
+		with self._cond:
+			if not self._cond.wait_for(lambda: self._items or self._closed, timeout) or not self._items:
+				return None
+
+			item = self._take()
+			self._cond.notify_all()
+			self._notify_async()
+			return item
+
+	def _waiter(self):
+		loop = asyncio.get_running_loop()
+		with self._lock:
+			event = self._waiters.get(loop)
+			if event is None:
+				for other in [other for other in self._waiters if other.is_closed()]:
+					del self._waiters[other]
+
+				event = self._waiters[loop] = asyncio.Event()
+
+			event.clear()
+			return event
+
+	def _notify_async(self):
+		for loop, event in list(self._waiters.items()):
+			if not loop.is_closed():
+				loop.call_soon_threadsafe(event.set)
+
+	async def put_async(self, item, cmd=None):
+		"""``put`` waiting for room without blocking the event loop."""
+		waited = False
+		while True:
+			event = self._waiter()
+			with self._cond:
+				if self._closed:
+					return False
+
+				if self._offer(item, cmd):
+					self._cond.notify_all()
+					self._notify_async()
+					return True
+
+				if not waited:
+					self.blocked += 1
+					waited = True
+
+			await event.wait()
+
+	async def get_async(self):
+		"""``get`` without blocking the event loop; ``None`` once the queue is closed and empty."""
+		while True:
+			event = self._waiter()
+			with self._cond:
+				if self._items:
+					item = self._take()
+					self._cond.notify_all()
+					self._notify_async()
+					return item
+
+				if self._closed:
+					return None
+
+			await event.wait()
+
+	def stats(self):
+		"""Queue depth, drops and enqueue to dispatch latency.
+
+		Returns:
+			dict: ``depth`` (of which ``spilled_depth`` on disk), ``max_depth``, ``enqueued``, ``dispatched``,
+			``dropped`` (``{cmd: count}``), ``spilled``, ``blocked`` (puts that waited for room),
+			``latency_avg``, ``latency_max`` (seconds)
+		"""
+		with self._lock:
+			done = self.dispatched or 1
+			return {
+				"depth": self._depth(),
+				"spilled_depth": self._spill.pending if self._spill is not None else 0,
+				"max_depth": self.max_depth,
+				"enqueued": self.enqueued,
+				"dispatched": self.dispatched,
+				"dropped": dict(self.dropped),
+				"spilled": self.spilled,
+				"blocked": self.blocked,
+				"latency_avg": self.latency_total / done,
+				"latency_max": self.latency_max,
+			}
+
+	def close(self):
+		"""Wake up the waiting callers; ``get`` returns the frames left, then ``None``."""
+		with self._cond:
+			self._closed = True
+			self._cond.notify_all()
+			self._notify_async()
+
+		if self._spill is not None and not self._spill.pending:
+			self._spill.close()
+			self._spill = None
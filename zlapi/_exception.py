@@ -50,3 +50,26 @@ class DecodePayloadError(ZaloAPIException):
 		self.message = message
 		super().__init__(message)
 		
+
+
+class ZaloServerError(ZaloAPIException):
+	"""Raised by ``zaloapi`` if:
+
+    - A Zalo server answered with an HTTP 5xx status.
+    """
+	def __init__(self, message=None, status=None):
+		self.message = message
+		self.status = status
+		super().__init__(message)
+
+
+class ZaloRateLimitError(ZaloAPIException):
+	"""Raised by ``zaloapi`` if:
+
+    - A Zalo server answered with HTTP 429 (Too Many Requests).
+    """
+	def __init__(self, message=None, status=429):
+		self.message = message
+		self.status = status
+		self.error_code = status
+		super().__init__(message)
@@ -0,0 +1,268 @@
+# -*- coding: UTF-8 -*-
+import time
+import asyncio
+import threading
+import collections
+
+from concurrent.futures import Future
+
+
+def lanes(items, key):
+	"""Split ``items`` into the lanes given by ``key(item)``, keeping their order.
+
+	Returns:
+		dict: ``{lane: [items]}``, lanes in order of first appearance
+	"""
+	split = {}
+	for item in items:
+		split.setdefault(key(item), []).append(item)
+
+	return split
+
+
+class ExecutorStats(object):
+	"""Thread-safe queueing and run time counters of a keyed executor."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self._lock:
+			self.submitted = 0
+			self.completed = 0
+			self.failed = 0
+			self.max_depth = 0
+			self.wait_total = 0.0
+			self.wait_max = 0.0
+			self.run_total = 0.0
+			self.run_max = 0.0
+
+	def queued(self, depth):
+		with self._lock:
+			self.submitted += 1
+			self.max_depth = max(self.max_depth, depth)
+
+	def started(self, wait):
+		with self._lock:
+			self.wait_total += wait
+			self.wait_max = max(self.wait_max, wait)
+
+	def finished(self, run, failed):
+		with self._lock:
+			self.completed += 1
+			self.failed += failed
+			self.run_total += run
+			self.run_max = max(self.run_max, run)
+
+	def snapshot(self, **current):
+		with self._lock:
+			done = self.completed or 1
+			return dict(
+				current,
+				submitted=self.submitted,
+				completed=self.completed,
+				failed=self.failed,
+				max_depth=self.max_depth,
+				wait_avg=self.wait_total / done,
+				wait_max=self.wait_max,
+				run_avg=self.run_total / done,
+				run_max=self.run_max,
+			)
+
+
+class KeyedExecutor(object):
+	"""Thread pool that runs the tasks of one key in submission order.
+
+	Tasks sharing a key (e.g. a ``thread_id``) form a FIFO lane and never run
+	concurrently; different lanes run in parallel on up to ``max_workers`` threads.
+
+	Args:
+		max_workers (int): Number of worker threads
+		name (str): Prefix of the worker thread names
+	"""
+
+	def __init__(self, max_workers=8, name="zlapi-executor"):
+		self.max_workers = max(1, max_workers)
+		self.name = name
+		self.metrics = ExecutorStats()
+		self._cond = threading.Condition()
+		self._lanes = {}
+		self._ready = collections.deque()
+		self._workers = []
+		self._depth = 0
+		self._running = 0
+		self._shutdown = False
+
+	def submit(self, key, fn, *args, **kwargs):
+		"""Queue ``fn(*args, **kwargs)`` behind the pending tasks of ``key``.
+
+		Returns:
+			concurrent.futures.Future: Resolves to the return value of ``fn``
+		"""
+		future = Future()
+		task = (future, fn, args, kwargs, time.monotonic())
+		with self._cond:
+			if self._shutdown:
+				raise RuntimeError("cannot schedule new tasks after shutdown")
+
+			lane = self._lanes.get(key)
+			if lane is None:
+				self._lanes[key] = collections.deque([task])
+				self._ready.append(key)
+				self._cond.notify()
+			else:
+				lane.append(task)
+
+			self._depth += 1
+			self.metrics.queued(self._depth)
+			if len(self._workers) < self.max_workers and len(self._workers) - self._running < len(self._ready):
+				self._start_worker()
+
+		return future
+
+	def _start_worker(self):
+		worker = threading.Thread(target=self._work, name=f"{self.name}-{len(self._workers)}", daemon=True)
+		self._workers.append(worker)
+		worker.start()
+
+	def _work(self):
+		while True:
+			with self._cond:
+				while not self._ready and not self._shutdown:
+					self._cond.wait()
+
+				if not self._ready:
+					return
+
+				key = self._ready.popleft()
+				future, fn, args, kwargs, queued = self._lanes[key][0]
+				self._depth -= 1
+				self._running += 1
+
+			started = time.monotonic()
+			self.metrics.started(started - queued)
+			failed = False
+			if future.set_running_or_notify_cancel():
+				try:
+					result = fn(*args, **kwargs)
+				except BaseException as e:
+					failed = True
+					future.set_exception(e)
+				else:
+					future.set_result(result)
+
+			self.metrics.finished(time.monotonic() - started, failed)
+			with self._cond:
+				self._running -= 1
+				lane = self._lanes[key]
+				lane.popleft()
+				if lane:
+					# Back of the line, so one busy lane does not starve the others
+					self._ready.append(key)
+					self._cond.notify()
+				else:
+					del self._lanes[key]
+
+	def stats(self):
+		"""Queue depth, lanes, running tasks and wait/run time counters.
+
+		Returns:
+			dict: ``queued``, ``running``, ``lanes``, ``workers``, ``submitted``, ``completed``,
+			``failed``, ``max_depth``, ``wait_avg``, ``wait_max``, ``run_avg``, ``run_max`` (seconds)
+		"""
+		with self._cond:
+			current = {"queued": self._depth, "running": self._running, "lanes": len(self._lanes), "workers": len(self._workers)}
+
+		return self.metrics.snapshot(**current)
+
+	def shutdown(self, wait=True):
+		"""Stop accepting tasks; workers exit once the queued tasks are done."""
+		with self._cond:
+			self._shutdown = True
+			self._cond.notify_all()
+			workers = list(self._workers)
+
+		if wait:
+			for worker in workers:
+				if worker is not threading.current_thread():
+					worker.join()
+
+
+class AsyncKeyedExecutor(object):
+	"""Asyncio counterpart of :class:`KeyedExecutor` for coroutine functions.
+
+	Args:
+		max_workers (int): Number of tasks running at the same time
+	"""
+
+	def __init__(self, max_workers=8):
+		self.max_workers = max(1, max_workers)
+		self.metrics = ExecutorStats()
+		self._tails = {}
+		self._depth = 0
+		self._running = 0
+		self._semaphores = {}
+
+	def _semaphore(self):
+		loop = asyncio.get_running_loop()
+		semaphore = self._semaphores.get(loop)
+		if semaphore is None:
+			for other_loop in [other for other in self._semaphores if other.is_closed()]:
+				del self._semaphores[other_loop]
+
+			semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+
+		return semaphore
+
+	def submit(self, key, fn, *args, **kwargs):
+		"""Schedule ``await fn(*args, **kwargs)`` behind the pending tasks of ``key``.
+
+		Must be called from a running event loop.
+
+		Returns:
+			asyncio.Task: Resolves to the return value of ``fn``
+		"""
+		previous = self._tails.get(key)
+		self._depth += 1
+		self.metrics.queued(self._depth)
+		task = asyncio.ensure_future(self._run(previous, fn, args, kwargs, time.monotonic()))
+		self._tails[key] = task
+		task.add_done_callback(lambda done: self._tails.get(key) is done and self._tails.pop(key))
+		return task
+
+	async def _run(self, previous, fn, args, kwargs, queued):
+		try:
+			if previous is not None:
+				await asyncio.wait([previous])
+
+			await self._semaphore().acquire()
+		except BaseException:
+			self._depth -= 1
+			raise
+
+		self._depth -= 1
+		self._running += 1
+		started = time.monotonic()
+		self.metrics.started(started - queued)
+		failed = True
+		try:
+			result = await fn(*args, **kwargs)
+			failed = False
+			return result
+		finally:
+			self._running -= 1
+			self._semaphore().release()
+			self.metrics.finished(time.monotonic() - started, failed)
+
+	async def join(self):
+		"""Wait until the tasks submitted from the running event loop are done."""
+		loop = asyncio.get_running_loop()
+		tails = [task for task in self._tails.values() if task.get_loop() is loop]
+		if tails:
+			await asyncio.wait(tails)
+
+	def stats(self):
+		"""Same counters as :meth:`KeyedExecutor.stats`."""
+		current = {"queued": self._depth, "running": self._running, "lanes": len(self._tails), "workers": self.max_workers}
+		return self.metrics.snapshot(**current)
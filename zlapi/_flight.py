@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import inspect
+import functools
+import threading
+
+from concurrent.futures import Future
+
+
+class SingleFlight(object):
+	"""Collapses identical concurrent calls into one.
+
+	While a call for ``key`` is in flight, other callers with the same key wait
+	for it and receive the same result (or exception) instead of calling again.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._calls = {}
+
+	def _join(self, key, factory):
+		with self._lock:
+			call = self._calls.get(key)
+			if call is not None:
+				return call, False
+
+			call = self._calls[key] = factory()
+			return call, True
+
+	def _forget(self, key):
+		with self._lock:
+			self._calls.pop(key, None)
+
+	def in_flight(self):
+		with self._lock:
+			return len(self._calls)
+
+	def do(self, key, func, *args, **kwargs):
+		call, leader = self._join(key, Future)
+		if not leader:
+			return call.result()
+
+		try:
+			result = func(*args, **kwargs)
+		except BaseException as e:
+			self._forget(key)
+			call.set_exception(e)
+			raise
+
+		self._forget(key)
+		call.set_result(result)
+		return result
+
+	async def do_async(self, key, func, *args, **kwargs):
+		loop = asyncio.get_running_loop()
+		call, leader = self._join((id(loop), key), loop.create_future)
+		if not leader:
+			return await asyncio.shield(call)
+
+		try:
+			result = await func(*args, **kwargs)
+		except BaseException as e:
+			self._forget((id(loop), key))
+			call.set_exception(e)
+			# Mark the exception as retrieved when nobody else was waiting
+			call.exception()
+			raise
+
+		self._forget((id(loop), key))
+		call.set_result(result)
+		return result
+
+
+def _call_key(func, args, kwargs):
+	return (func.__name__, repr(args), repr(sorted(kwargs.items())))
+
+
+def coalesce(func):
+	"""Coalesce concurrent identical calls of a client method.
+
+	Only active when the client has a ``SingleFlight`` in ``self._flight``.
+	"""
+	if inspect.iscoroutinefunction(func):
+		@functools.wraps(func)
+		async def wrapper(self, *args, **kwargs):
+			flight = getattr(self, "_flight", None)
+			if flight is None:
+				return await func(self, *args, **kwargs)
+
+			return await flight.do_async(_call_key(func, args, kwargs), func, self, *args, **kwargs)
+
+	else:
+		@functools.wraps(func)
+		def wrapper(self, *args, **kwargs):
+			flight = getattr(self, "_flight", None)
+			if flight is None:
+				return func(self, *args, **kwargs)
+
+			return flight.do(_call_key(func, args, kwargs), func, self, *args, **kwargs)
+
+	return wrapper
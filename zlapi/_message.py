@@ -13,7 +13,7 @@ class Message:
 		
 		
 		if parse_mode:
-			styles = json.loads(self.style)["styles"] if self.style else []
+			styles = _util.json_loads(self.style)["styles"] if self.style else []
 			if self.parse_mode == "Markdown":
 				
 				self.text, self.parse_list = Parse(self.text, self.style, "Markdown")
@@ -82,7 +82,7 @@ class MessageStyle:
 			self.style = "f_18"
 		
 		if auto_format:
-			self.styleFormat = json.dumps({
+			self.styleFormat = _util.json_dumps({
 				"styles": [{
 					"start": self.offset,
 					"len": self.length,
@@ -106,7 +106,7 @@ class MultiMsgStyle:
 		for style in listStyle:
 			styles.append(style)
 			
-		self.styleFormat = json.dumps({
+		self.styleFormat = _util.json_dumps({
 			"styles": styles,
 				"ver": 0
 		})
@@ -150,7 +150,7 @@ class Mention:
 			raise ValueError("Invalid Length, Offset! Length and Offset must be integers")
 		
 		if auto_format:
-			self.mentionFormat = json.dumps([{
+			self.mentionFormat = _util.json_dumps([{
 				"pos": self.offset,
 				"len": self.length,
 				"uid": self.user_id,
@@ -173,7 +173,7 @@ class MultiMention:
 		for mention in listMention:
 			mentions.append(mention)
 			
-		self.mentionFormat = json.dumps(mentions)
+		self.mentionFormat = _util.json_dumps(mentions)
 	
 	def __str__(self):
 		return self.mentionFormat
\ No newline at end of file
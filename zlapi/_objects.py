@@ -1,13 +1,62 @@
-from munch import DefaultMunch
+from munch import DefaultMunch, unmunchify
 from dataclasses import dataclass
 
-class User(DefaultMunch):
+class LazyMunch(DefaultMunch):
+	"""``DefaultMunch`` converting nested dicts and lists on first access.
+
+	``fromDict`` only copies the top level of the response. A nested dict is
+	wrapped in the same class when it is read (as an attribute, by key, with
+	``get``, ``values`` or ``items``) and a list when it is read, so large
+	responses only pay for the parts the caller uses.
+	"""
+
+	@classmethod
+	def fromDict(cls, d, default=None):
+		return cls._wrap(d, default)
+
+	@classmethod
+	def _wrap(cls, value, default):
+		if isinstance(value, dict):
+			return cls(default, value)
+
+		if type(value) in (list, tuple):
+			return type(value)(cls._wrap(item, default) for item in value)
+
+		return value
+
+	def _load(self, key, value):
+		if type(value) in (dict, list, tuple):
+			value = self._wrap(value, self.__default__)
+			dict.__setitem__(self, key, value)
+
+		return value
+
+	def __getitem__(self, k):
+		if not dict.__contains__(self, k):
+			return self.__default__
+
+		return self._load(k, dict.__getitem__(self, k))
+
+	def get(self, k, default=None):
+		if not dict.__contains__(self, k):
+			return default
+
+		return self[k]
+
+	def values(self):
+		return [self[k] for k in self]
+
+	def items(self):
+		return [(k, self[k]) for k in self]
+
+
+class User(LazyMunch):
 	def __repr__(self):
 		attrs = [f"{key}={value!r}" for key, value in self.__dict__.items()]
 		return f"User({', '.join(attrs)})"
 
 
-class Group(DefaultMunch):
+class Group(LazyMunch):
 	def __repr__(self):
 		attrs = [f"{key}={value!r}" for key, value in self.__dict__.items()]
 		return f"Group({', '.join(attrs)})"
@@ -28,4 +77,120 @@ class MessageObject(DefaultMunch):
 class EventObject(DefaultMunch):
 	def __repr__(self):
 		attrs = [f"{key}={value!r}" for key, value in self.__dict__.items()]
-		return f"GroupEvent({', '.join(attrs)})"
\ No newline at end of file
+		return f"GroupEvent({', '.join(attrs)})"
+
+
+_set = object.__setattr__
+
+
+class _Compact(dict):
+	"""Slotted, read-mostly ``dict`` standing in for a ``DefaultMunch`` built by the listeners.
+
+	The dict holds the raw fields, so ``len``, ``json.dumps`` and ``isinstance(obj, dict)``
+	behave as with ``DefaultMunch``. Fields in ``__slots__`` are also plain attributes,
+	other fields are read from the dict, nested dicts and lists being wrapped in
+	``MessageObject`` on first access. Missing fields are ``None``.
+	"""
+	__slots__ = ("_wrapped", "_default")
+	FIELDS = ()
+	_name = ""
+
+	@classmethod
+	def fromDict(cls, d, default=None):
+		return cls(d, default)
+
+	def _slot(self, name, value):
+		_set(self, name, MessageObject.fromDict(value, self._default) if type(value) in (dict, list) else value)
+
+	def _value(self, name):
+		value = dict.get(self, name, self._default)
+		if type(value) not in (dict, list):
+			return value
+
+		if self._wrapped is None:
+			_set(self, "_wrapped", {})
+
+		if name not in self._wrapped:
+			self._wrapped[name] = MessageObject.fromDict(value, self._default)
+
+		return self._wrapped[name]
+
+	def __getattr__(self, name):
+		if name.startswith("_"):
+			raise AttributeError(name)
+
+		return self._value(name)
+
+	def __setattr__(self, name, value):
+		if name.startswith("_"):
+			_set(self, name, value)
+		else:
+			self[name] = value
+
+	def __getitem__(self, key):
+		if key in self.FIELDS:
+			return getattr(self, key)
+
+		return self._value(key)
+
+	def __setitem__(self, key, value):
+		dict.__setitem__(self, key, value)
+		if self._wrapped:
+			self._wrapped.pop(key, None)
+
+		if key in self.FIELDS:
+			self._slot(key, value)
+
+	def get(self, key, default=None):
+		return self[key] if dict.__contains__(self, key) else default
+
+	def values(self):
+		return [self[key] for key in self]
+
+	def items(self):
+		return [(key, self[key]) for key in self]
+
+	def toDict(self):
+		return unmunchify(dict(self.items()))
+
+	def __repr__(self):
+		attrs = [f"{key}={value!r}" for key, value in self.items()]
+		return f"{self._name}({', '.join(attrs)})"
+
+
+class CompactMessageObject(_Compact):
+	"""Listener message keeping the fields read on every message as slots.
+
+	Any other field is read from the message dict, nested dicts and lists
+	being wrapped like ``MessageObject`` does on first access (e.g. ``quote``,
+	``mentions``, ``propertyExt``), so handlers written for ``MessageObject``
+	work unchanged.
+
+	Args:
+		raw (dict): Message as received from the websocket
+		default: Value of missing fields (Default: None)
+	"""
+	__slots__ = ("msgId", "cliMsgId", "uidFrom", "idTo", "msgType", "content", "ts")
+	FIELDS = __slots__
+	_name = "Message"
+
+	def __init__(self, raw, default=None):
+		dict.__init__(self, raw)
+		_set(self, "_wrapped", None)
+		_set(self, "_default", default)
+		for name in self.FIELDS:
+			self._slot(name, dict.get(self, name, default))
+
+
+class CompactContextObject(_Compact):
+	"""Slotted ``ContextObject`` for the messages dispatched by the simple client."""
+	__slots__ = ("message_id", "author_id", "message", "message_object", "thread_id", "thread_type")
+	FIELDS = __slots__
+	_name = "Context"
+
+	def __init__(self, fields, default=None):
+		dict.__init__(self, ((name, fields.get(name, default)) for name in self.FIELDS))
+		_set(self, "_wrapped", None)
+		_set(self, "_default", default)
+		for name in self.FIELDS:
+			_set(self, name, dict.__getitem__(self, name))
@@ -0,0 +1,310 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import threading
+import multiprocessing
+import collections
+
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from . import _util
+
+#: Frame size in bytes from which ``offload_frames=True`` decodes in a worker process
+DEFAULT_THRESHOLD = 256 * 1024
+
+#: Number of worker processes decoding large frames
+DEFAULT_WORKERS = 2
+
+#: Header of the frame carrying the websocket key
+KEY_FRAME = (1, 1, 1)
+
+#: Commands the listeners act on. Other frames (delivered/seen receipts
+#: 502/504/522/524, typing 602, ...) are dropped from their header alone
+DISPATCHED = frozenset({1, 501, 521, 601, 612, 3000})
+
+#: Start method of the worker processes. The listeners are already threaded,
+#: so the workers are not forked from them
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_worker_codec = None
+
+
+def _init_worker(key, backend):
+	global _worker_codec
+	_util.set_json_backend(backend)
+	_worker_codec = _util.Codec(key)
+
+
+def _decode_worker(data):
+	version, cmd, subCmd, envelope = _util.parseFrame(data)
+	if not envelope:
+		return None
+
+	return version, cmd, subCmd, _worker_codec.decode_frame(envelope)
+
+
+def commands(client, base, optional):
+	"""Websocket commands ``client`` has to decode.
+
+	Args:
+		client: Listening client
+		base (type): Client class defining the default handlers
+		optional (dict): ``{cmd: handler name}`` of commands whose default handler does nothing,
+			they are only decoded when that handler is overridden (or set with ``event``)
+
+	Returns:
+		frozenset: Commands to decode
+	"""
+	subscribed = set(DISPATCHED)
+	for cmd, name in optional.items():
+		handler = getattr(client, name)
+		if getattr(handler, "__func__", handler) is getattr(base, name):
+			subscribed.discard(cmd)
+
+	return frozenset(subscribed)
+
+
+def threshold(offload):
+	"""Normalize the ``offload_frames`` client option to a size threshold (or ``None``)."""
+	if offload is True:
+		return DEFAULT_THRESHOLD
+
+	return int(offload) if offload else None
+
+
+class FrameReader(object):
+	"""Decode websocket frames in arrival order, offloading the large ones.
+
+	Frames of at least ``threshold`` bytes (typically the offline message
+	backlog sent after a reconnect) are decrypted and gunzipped in a process
+	pool, so the receive loop keeps reading while they are being decoded.
+	Decoded frames still come out in the order they were received. The
+	websocket key is shipped once to each worker, when the pool is started.
+	Workers are started with ``START_METHOD`` (not forked), so the script
+	creating the client has to guard its entry point with
+	``if __name__ == "__main__":``.
+
+	Args:
+		key (str): Websocket key, if one is already known
+		threshold (int): Frame size from which frames are offloaded, ``None`` decodes everything inline
+		workers (int): Number of worker processes
+		commands (frozenset): Commands to decode, other frames are dropped without being
+			decrypted or parsed. ``None`` decodes every command
+	"""
+
+	def __init__(self, key=None, threshold=None, workers=DEFAULT_WORKERS, commands=None):
+		self.threshold = threshold
+		self.workers = workers
+		self.commands = commands
+		self.codec = None
+		self._executor = None
+		self._pending = collections.deque()
+		self._ready = threading.Condition()
+		self._drain_lock = threading.Lock()
+		self._pump = None
+		if key:
+			self.rekey(key)
+
+	@property
+	def offloading(self):
+		return self.threshold is not None
+
+	def rekey(self, key):
+		"""Use ``key`` for the following frames, restarting the worker processes."""
+		self.codec = _util.Codec(key)
+		if self._executor:
+			# Frames already submitted still complete with the old key
+			self._executor.shutdown(wait=False)
+			self._executor = None
+
+	def decode(self, data):
+		"""Decode one frame inline.
+
+		Returns:
+			tuple: ``(version, cmd, subCmd, data)``, ``data`` is ``None`` while the key is unknown.
+			``None`` for non-binary, empty or unsubscribed frames
+		"""
+		if not self._wanted(data):
+			return None
+
+		version, cmd, subCmd, envelope = _util.parseFrame(data)
+		if not envelope:
+			return None
+
+		if (version, cmd, subCmd) == KEY_FRAME and "key" in envelope:
+			self.rekey(envelope["key"])
+			return version, cmd, subCmd, envelope
+
+		if not self.codec:
+			return version, cmd, subCmd, None
+
+		return version, cmd, subCmd, self.codec.decode_frame(envelope)
+
+	def _wanted(self, data):
+		if not isinstance(data, bytes):
+			return False
+
+		return self.commands is None or _util.getHeader(data)[1] in self.commands
+
+	def _offloads(self, data):
+		return self.offloading and self.codec is not None and self._wanted(data) and len(data) >= self.threshold
+
+	def _submit(self, data):
+		if self._offloads(data):
+			if self._executor is None:
+				self._executor = ProcessPoolExecutor(
+					self.workers,
+					mp_context=multiprocessing.get_context(START_METHOD),
+					initializer=_init_worker,
+					initargs=(self.codec.key, _util.JSON_BACKEND),
+				)
+
+			return self._executor.submit(_decode_worker, data)
+
+		future = Future()
+		try:
+			future.set_result(self.decode(data))
+		except Exception as e:
+			future.set_exception(e)
+
+		return future
+
+	def _append(self, future):
+		with self._ready:
+			self._pending.append(future)
+
+		future.add_done_callback(self._wake)
+
+	def _wake(self, future):
+		with self._ready:
+			self._ready.notify_all()
+
+	def put(self, data):
+		"""Queue a received frame for decoding.
+
+		Returns:
+			Future: Resolves to the decoded frame (see ``decode``)
+		"""
+		future = self._submit(data)
+		self._append(future)
+		return future
+
+	def get(self):
+		"""Block until the oldest queued frame is decoded and return it."""
+		with self._ready:
+			self._ready.wait_for(lambda: self._pending and self._pending[0].done())
+			future = self._pending.popleft()
+
+		return future.result()
+
+	def drain(self, handler, on_error=None):
+		"""Pass the decoded frames at the head of the queue to ``handler``, in order.
+
+		Returns at the first frame that is still being decoded, the frames behind
+		it are handed over by a later call.
+
+		Args:
+			handler (callable): Called with each decoded frame
+			on_error (callable): Called with the error of a frame that failed to decode,
+				instead of raising it
+		"""
+		with self._drain_lock:
+			while True:
+				with self._ready:
+					if not (self._pending and self._pending[0].done()):
+						return
+
+					future = self._pending.popleft()
+
+				error = future.exception()
+				if error is not None:
+					if on_error is None:
+						raise error
+
+					on_error(error)
+
+				elif future.result():
+					handler(future.result())
+
+	def _run_pump(self, recv):
+		while True:
+			try:
+				data = recv()
+			except BaseException as e:
+				future = Future()
+				future.set_exception(e)
+				self._append(future)
+				return
+
+			self.put(data)
+
+	def read(self, recv):
+		"""Receive and decode the next frame.
+
+		Inline, this calls ``recv`` once. When offloading, ``recv`` runs in a
+		background thread that keeps receiving while large frames are decoded,
+		and errors it raises (e.g. a closed connection) are re-raised here.
+
+		Returns:
+			tuple: See ``decode``
+		"""
+		if not self.offloading:
+			return self.decode(recv())
+
+		if self._pump is None:
+			self._pump = threading.Thread(target=self._run_pump, args=(recv,), daemon=True)
+			self._pump.start()
+
+		return self.get()
+
+	def close(self):
+		if self._executor:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+
+class AsyncFrameReader(FrameReader):
+	"""``FrameReader`` receiving from a coroutine, for the asyncio clients."""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._queue = None
+		self._head = None
+
+	async def _run_pump_async(self, recv):
+		loop = asyncio.get_running_loop()
+		while True:
+			try:
+				data = await recv()
+			except BaseException as e:
+				future = loop.create_future()
+				future.set_exception(e)
+				self._queue.put_nowait(future)
+				return
+
+			self._queue.put_nowait(asyncio.wrap_future(self._submit(data), loop=loop))
+
+	async def read(self, recv):
+		"""Receive and decode the next frame, see ``FrameReader.read``.
+
+		Safe to cancel (e.g. by ``asyncio.wait_for``), a frame being decoded is
+		kept for the next call.
+		"""
+		if not self.offloading:
+			return self.decode(await recv())
+
+		if self._pump is None:
+			self._queue = asyncio.Queue()
+			self._pump = asyncio.ensure_future(self._run_pump_async(recv))
+
+		if self._head is None:
+			self._head = await self._queue.get()
+
+		await asyncio.wait({self._head})
+		future, self._head = self._head, None
+		return future.result()
+
+	def close(self):
+		if self._pump is not None:
+			self._pump.cancel()
+
+		super().close()
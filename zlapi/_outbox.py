@@ -0,0 +1,102 @@
+# -*- coding: UTF-8 -*-
+import inspect
+
+from . import _executor
+from ._exception import ZaloUserError
+from ._ratelimit import _THREAD_PARAMS
+
+
+def _message_id(result):
+	if hasattr(result, "get") and result.get("msgId") is not None:
+		return result.get("msgId")
+
+	return result
+
+
+def _call(func, *args, **kwargs):
+	return _message_id(func(*args, **kwargs))
+
+
+async def _call_async(func, *args, **kwargs):
+	return _message_id(await func(*args, **kwargs))
+
+
+class Outbox(object):
+	"""Ordered outbound queue of a client.
+
+	Sends to the same thread are made one at a time in the order they were queued,
+	while different threads are served in parallel up to ``max_workers`` at once.
+	Any client method taking a thread argument can be queued with its usual
+	arguments::
+
+		future = client.outbox.sendMessage(Message(text="Hi"), thread_id, thread_type)
+		msgId = future.result()
+
+	Args:
+		client (ZaloAPI): Client whose methods are queued
+		max_workers (int): Number of sends running at the same time
+	"""
+
+	def __init__(self, client, max_workers=8):
+		self._client = client
+		self._executor = _executor.KeyedExecutor(max_workers, name="zlapi-outbox")
+
+	def submit(self, thread_id, func, *args, **kwargs):
+		"""Queue ``func(*args, **kwargs)`` behind the pending sends of ``thread_id``.
+
+		Returns:
+			concurrent.futures.Future: Resolves to the ``msgId`` of the sent message
+			(or the result of ``func`` when it has none)
+		"""
+		return self._executor.submit(str(thread_id), _call, func, *args, **kwargs)
+
+	def __getattr__(self, name):
+		method = getattr(self._client, name) if not name.startswith("_") else None
+		if not callable(method):
+			raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+		signature = inspect.signature(method)
+		thread_param = next((param for param in _THREAD_PARAMS if param in signature.parameters), None)
+		if thread_param is None:
+			raise ZaloUserError(f"{name} has no thread argument to order the sends by")
+
+		def queue(*args, **kwargs):
+			thread_id = signature.bind(*args, **kwargs).arguments[thread_param]
+			return self.submit(thread_id, method, *args, **kwargs)
+
+		queue.__name__ = name
+		queue.__doc__ = method.__doc__
+		return queue
+
+	def stats(self):
+		"""Queue depth, running sends and wait/send time counters.
+
+		Returns:
+			dict: See ``KeyedExecutor.stats``
+		"""
+		return self._executor.stats()
+
+	def close(self, wait=True):
+		"""Stop accepting sends, waiting for the queued ones to finish if ``wait`` is set."""
+		self._executor.shutdown(wait)
+
+
+class AsyncOutbox(Outbox):
+	"""Asyncio counterpart of :class:`Outbox`; queued sends return ``asyncio.Task``."""
+
+	def __init__(self, client, max_workers=8):
+		self._client = client
+		self._executor = _executor.AsyncKeyedExecutor(max_workers)
+
+	def submit(self, thread_id, func, *args, **kwargs):
+		"""Queue ``await func(*args, **kwargs)`` behind the pending sends of ``thread_id``.
+
+		Returns:
+			asyncio.Task: Resolves to the ``msgId`` of the sent message
+			(or the result of ``func`` when it has none)
+		"""
+		return self._executor.submit(str(thread_id), _call_async, func, *args, **kwargs)
+
+	async def close(self):
+		"""Wait for the queued sends of the running event loop to finish."""
+		await self._executor.join()
@@ -0,0 +1,216 @@
+# -*- coding: UTF-8 -*-
+import socket
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ._exception import ZaloUserError
+
+#: Zalo hosts grouped by the kind of traffic they serve
+HOST_FAMILIES = {
+	"login": ("wpa.chat.zalo.me",),
+	"chat": (
+		"tt-chat1-wpa.chat.zalo.me",
+		"tt-chat2-wpa.chat.zalo.me",
+		"tt-chat3-wpa.chat.zalo.me",
+		"tt-chat4-wpa.chat.zalo.me",
+	),
+	"group": (
+		"tt-group-wpa.chat.zalo.me",
+		"tt-group-cm.chat.zalo.me",
+		"groupboard-wpa.chat.zalo.me",
+	),
+	"files": ("tt-files-wpa.chat.zalo.me",),
+	"profile": (
+		"tt-profile-wpa.chat.zalo.me",
+		"profile-wpa.chat.zalo.me",
+		"tt-friend-wpa.chat.zalo.me",
+	),
+	"convers": ("tt-convers-wpa.chat.zalo.me",),
+	"reaction": ("reaction.chat.zalo.me",),
+}
+
+#: Default pool settings, used for every family unless overridden
+POOL_DEFAULTS = {
+	"pool_connections": 4,
+	"pool_maxsize": 32,
+	"pool_block": False,
+	"keepalive": True,
+}
+
+
+def _keepalive_options():
+	options = list(HTTPConnection.default_socket_options)
+	options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+	for name, value in (("TCP_KEEPIDLE", 60), ("TCP_KEEPINTVL", 20), ("TCP_KEEPCNT", 3)):
+		if hasattr(socket, name):
+			options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+	return options
+
+
+class PoolStats(object):
+	"""Thread-safe connection pool counters, grouped by host family."""
+
+	FIELDS = ("requests", "new_connections", "reused_connections", "pool_exhausted", "discarded_connections", "prewarmed_connections")
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._counters = {}
+
+	def incr(self, family, field):
+		with self._lock:
+			counters = self._counters.setdefault(family, dict.fromkeys(self.FIELDS, 0))
+			counters[field] += 1
+
+	def snapshot(self):
+		with self._lock:
+			return {family: dict(counters) for family, counters in self._counters.items()}
+
+	def reset(self):
+		with self._lock:
+			self._counters.clear()
+
+
+def _pinned_connection(base, resolver):
+	class PinnedConnection(base):
+		def _new_conn(self):
+			host = self._dns_host
+			try:
+				address = resolver.resolve(host, self.port)[0][2]
+			except (OSError, IndexError):
+				return super()._new_conn()
+
+			# Only the socket goes to the cached address, TLS still verifies ``host``
+			self._dns_host = address
+			try:
+				return super()._new_conn()
+			except Exception:
+				resolver.forget(host)
+				raise
+			finally:
+				self._dns_host = host
+
+	PinnedConnection.__name__ = "Pinned" + base.__name__
+	return PinnedConnection
+
+
+def _counting_pool(base, family, stats, resolver=None):
+	class CountingPool(base):
+		if resolver is not None:
+			ConnectionCls = _pinned_connection(base.ConnectionCls, resolver)
+
+		def _get_conn(self, timeout=None):
+			if self.pool is not None and self.pool.empty():
+				stats.incr(family, "pool_exhausted")
+
+			conn = super()._get_conn(timeout)
+			stats.incr(family, "requests")
+			stats.incr(family, "reused_connections" if getattr(conn, "sock", None) is not None else "new_connections")
+			return conn
+
+		def _put_conn(self, conn):
+			if self.pool is not None and self.pool.full():
+				stats.incr(family, "discarded_connections")
+
+			return super()._put_conn(conn)
+
+	CountingPool.__name__ = "Counting" + base.__name__
+	CountingPool.family = family
+	CountingPool.stats = stats
+	return CountingPool
+
+
+def warm_pool(pool, connections=1):
+	"""Open up to ``connections`` keep-alive connections in a urllib3 ``pool``.
+
+	Returns:
+		int: Number of connections opened
+	"""
+	conns = [HTTPConnectionPool._get_conn(pool) for _ in range(connections)]
+	opened = 0
+	try:
+		for conn in conns:
+			if getattr(conn, "sock", None) is None:
+				conn.connect()
+				opened += 1
+				if getattr(pool, "stats", None) is not None:
+					pool.stats.incr(pool.family, "prewarmed_connections")
+	finally:
+		for conn in conns:
+			HTTPConnectionPool._put_conn(pool, conn)
+
+	return opened
+
+
+class ZaloHTTPAdapter(HTTPAdapter):
+	"""HTTPAdapter for one Zalo host family that records :class:`PoolStats`."""
+
+	def __init__(self, family="default", stats=None, keepalive=True, resolver=None, **kwargs):
+		self.family = family
+		self.stats = stats or PoolStats()
+		self.keepalive = keepalive
+		self.resolver = resolver
+		super().__init__(**kwargs)
+
+	def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+		if self.keepalive:
+			pool_kwargs.setdefault("socket_options", _keepalive_options())
+
+		super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+		self.poolmanager.pool_classes_by_scheme = {
+			"http": _counting_pool(HTTPConnectionPool, self.family, self.stats, self.resolver),
+			"https": _counting_pool(HTTPSConnectionPool, self.family, self.stats, self.resolver),
+		}
+
+
+def mount_adapters(session, pool_options=None, stats=None, resolver=None):
+	"""Mount one :class:`ZaloHTTPAdapter` per host family on ``session``.
+
+	Args:
+		session (requests.Session): Session to mount the adapters on
+		pool_options (dict): Default pool settings (``pool_connections``, ``pool_maxsize``,
+			``pool_block``, ``keepalive``). A ``families`` key may map a family name
+			(see ``HOST_FAMILIES``, or ``"default"`` for the other hosts) to settings
+			overriding the defaults for that family
+		stats (PoolStats): Counters shared by all adapters
+		resolver (DNSCache): Cache the connections resolve their host with
+
+	Returns:
+		PoolStats: The counters shared by the mounted adapters
+
+	Raises:
+		ZaloUserError: On an unknown option or family name
+	"""
+	pool_options = dict(pool_options or {})
+	families = pool_options.pop("families", {}) or {}
+	stats = stats or PoolStats()
+
+	unknown = set(pool_options) - set(POOL_DEFAULTS)
+	if unknown:
+		raise ZaloUserError(f"Unknown pool options: {', '.join(sorted(unknown))}")
+
+	unknown = set(families) - set(HOST_FAMILIES) - {"default"}
+	if unknown:
+		raise ZaloUserError(f"Unknown host families: {', '.join(sorted(unknown))}")
+
+	for family, overrides in families.items():
+		unknown = set(overrides) - set(POOL_DEFAULTS)
+		if unknown:
+			raise ZaloUserError(f"Unknown pool options for family {family!r}: {', '.join(sorted(unknown))}")
+
+	def adapter(family):
+		options = dict(POOL_DEFAULTS, **pool_options)
+		options.update(families.get(family, {}))
+		return ZaloHTTPAdapter(family=family, stats=stats, resolver=resolver, **options)
+
+	session.mount("https://", adapter("default"))
+	session.mount("http://", adapter("default"))
+	for family, hosts in HOST_FAMILIES.items():
+		family_adapter = adapter(family)
+		for host in hosts:
+			session.mount(f"https://{host}/", family_adapter)
+
+	return stats
@@ -0,0 +1,225 @@
+# -*- coding: UTF-8 -*-
+import re
+import time
+import asyncio
+import inspect
+import functools
+import threading
+import collections
+
+from ._exception import ZaloAPIException
+
+#: Error codes treated as "slow down" answers: HTTP 429, raised by the transports as
+#: ``ZaloRateLimitError``. The ``error_code`` values Zalo uses for throttling are not
+#: documented, pass them in ``throttle_codes`` to slow down on them as well
+DEFAULT_THROTTLE_CODES = frozenset({429})
+
+#: Starting rate (requests per second) and burst of each endpoint family, per thread
+DEFAULT_RATES = {
+	"message": (2.0, 5),
+	"reaction": (2.0, 5),
+	"group_admin": (0.5, 2),
+	"friend": (0.2, 1),
+	"default": (1.0, 3),
+}
+
+_ERROR_CODE = re.compile(r"Error #(-?\d+)")
+
+
+def error_code(error):
+	"""Return the Zalo error code carried by an exception, or ``None``."""
+	code = getattr(error, "error_code", None)
+	if code is None:
+		match = _ERROR_CODE.search(str(error))
+		code = match and int(match.group(1))
+
+	return code
+
+
+class TokenBucket(object):
+	__slots__ = ("rate", "base_rate", "burst", "tokens", "last", "throttled")
+
+	def __init__(self, rate, burst):
+		self.rate = self.base_rate = float(rate)
+		self.burst = float(burst)
+		self.tokens = float(burst)
+		self.last = time.monotonic()
+		self.throttled = 0
+
+	def reserve(self):
+		"""Take a token, returning how long the caller has to wait for it."""
+		now = time.monotonic()
+		self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+		self.last = now
+		self.tokens -= 1
+		return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter(object):
+	"""Token bucket rate limiter keyed by endpoint family and thread.
+
+	Rates adapt AIMD-style: each successful call raises the rate of its bucket by
+	``increase`` (up to ``ceiling`` times the starting rate) and each throttling
+	answer divides it by ``1 / decrease`` (down to ``min_rate``).
+
+	Args:
+		rates (dict): ``{family: (rate, burst)}`` overriding ``DEFAULT_RATES``
+		throttle_codes (set): Error codes that mean the account is sending too fast. The default only
+			covers HTTP 429, the Zalo ``error_code`` values seen when throttled have to be added here
+		increase (float): Requests per second added after each successful call
+		decrease (float): Factor applied to the rate after a throttling error
+		min_rate (float): Lowest rate a bucket can be slowed down to
+		ceiling (float): Highest rate, as a multiple of the starting rate
+		max_buckets (int): Number of (family, thread) buckets to keep
+	"""
+
+	def __init__(
+		self,
+		rates=None,
+		throttle_codes=DEFAULT_THROTTLE_CODES,
+		increase=0.05,
+		decrease=0.5,
+		min_rate=0.05,
+		ceiling=2.0,
+		max_buckets=10000
+	):
+		self.rates = dict(DEFAULT_RATES, **(rates or {}))
+		self.throttle_codes = frozenset(int(code) for code in throttle_codes)
+		self.increase = increase
+		self.decrease = decrease
+		self.min_rate = min_rate
+		self.ceiling = ceiling
+		self.max_buckets = max_buckets
+		self._lock = threading.Lock()
+		self._buckets = collections.OrderedDict()
+
+	def _bucket(self, key):
+		bucket = self._buckets.get(key)
+		if bucket is None:
+			rate, burst = self.rates.get(key[0], self.rates["default"])
+			bucket = self._buckets[key] = TokenBucket(rate, burst)
+			if len(self._buckets) > self.max_buckets:
+				self._buckets.popitem(last=False)
+		else:
+			self._buckets.move_to_end(key)
+
+		return bucket
+
+	def reserve(self, key):
+		with self._lock:
+			return self._bucket(key).reserve()
+
+	def acquire(self, key):
+		"""Block until a request for ``key`` may be sent."""
+		delay = self.reserve(key)
+		if delay > 0:
+			time.sleep(delay)
+
+	async def acquire_async(self, key):
+		"""Wait, without blocking the event loop, until a request for ``key`` may be sent."""
+		delay = self.reserve(key)
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+	def success(self, key):
+		with self._lock:
+			bucket = self._bucket(key)
+			bucket.rate = min(bucket.base_rate * self.ceiling, bucket.rate + self.increase)
+
+	def throttled(self, key):
+		with self._lock:
+			bucket = self._bucket(key)
+			bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+			bucket.tokens = min(bucket.tokens, 0)
+			bucket.throttled += 1
+
+	def is_throttle_error(self, error=None, result=None):
+		if error is not None:
+			code = error_code(error)
+		else:
+			code = result.get("error_code") if isinstance(result, dict) else None
+
+		try:
+			return int(code) in self.throttle_codes
+		except (TypeError, ValueError):
+			return False
+
+	def stats(self):
+		"""Current rate and throttle count of each bucket.
+
+		Returns:
+			dict: ``{(family, thread_id): {"rate": float, "tokens": float, "throttled": int}}``
+		"""
+		with self._lock:
+			return {
+				key: {"rate": bucket.rate, "tokens": bucket.tokens, "throttled": bucket.throttled}
+				for key, bucket in self._buckets.items()
+			}
+
+
+_THREAD_PARAMS = ("thread_id", "groupId", "userId", "user_id", "user_ids", "pollId")
+
+
+def limited(family, per_thread=True):
+	"""Rate limit a client method under ``family``, keyed by its thread argument.
+
+	Only active when the client has a ``RateLimiter`` in ``self._limiter``.
+	With ``per_thread=False`` a single bucket is shared by the whole account.
+	"""
+	def decorator(func):
+		params = list(inspect.signature(func).parameters)[1:]
+		thread_param = next((name for name in _THREAD_PARAMS if name in params), None) if per_thread else None
+		thread_index = params.index(thread_param) if thread_param else None
+
+		def key_of(args, kwargs):
+			if thread_param is None:
+				return (family, None)
+
+			thread_id = kwargs.get(thread_param, args[thread_index] if thread_index < len(args) else None)
+			return (family, str(thread_id) if isinstance(thread_id, (int, str)) else None)
+
+		def settle(limiter, key, error=None, result=None):
+			if limiter.is_throttle_error(error, result):
+				limiter.throttled(key)
+			elif error is None:
+				limiter.success(key)
+
+		if inspect.iscoroutinefunction(func):
+			@functools.wraps(func)
+			async def wrapper(self, *args, **kwargs):
+				limiter = getattr(self, "_limiter", None)
+				if limiter is None:
+					return await func(self, *args, **kwargs)
+
+				key = key_of(args, kwargs)
+				await limiter.acquire_async(key)
+				try:
+					result = await func(self, *args, **kwargs)
+				except ZaloAPIException as e:
+					settle(limiter, key, error=e)
+					raise
+
+				settle(limiter, key, result=result)
+				return result
+
+		else:
+			@functools.wraps(func)
+			def wrapper(self, *args, **kwargs):
+				limiter = getattr(self, "_limiter", None)
+				if limiter is None:
+					return func(self, *args, **kwargs)
+
+				key = key_of(args, kwargs)
+				limiter.acquire(key)
+				try:
+					result = func(self, *args, **kwargs)
+				except ZaloAPIException as e:
+					settle(limiter, key, error=e)
+					raise
+
+				settle(limiter, key, result=result)
+				return result
+
+		return wrapper
+
+	return decorator
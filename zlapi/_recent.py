@@ -0,0 +1,133 @@
+# -*- coding: UTF-8 -*-
+import threading
+import collections
+
+from . import _flight
+
+
+class RecentMessages(object):
+	"""Bounded ring buffers of the recent messages of each group.
+
+	The listeners fill them from the websocket stream. A group seen for the
+	first time is warmed with a single ``getRecentGroup`` fetch, shared by
+	every message of that group arriving meanwhile, instead of one fetch per
+	incoming message.
+
+	Args:
+		size (int): Messages kept per group
+		max_groups (int): Groups kept, the least recently active ones are dropped first
+	"""
+
+	def __init__(self, size=50, max_groups=1000):
+		self.size = size
+		self.max_groups = max_groups
+		self._lock = threading.Lock()
+		self._groups = collections.OrderedDict()
+		self._flight = _flight.SingleFlight()
+		self.hits = 0
+		self.misses = 0
+
+	def _ring(self, groupId):
+		ring = self._groups.get(groupId)
+		if ring is None:
+			ring = self._groups[groupId] = (collections.deque(), {})
+			while len(self._groups) > self.max_groups:
+				self._groups.popitem(last=False)
+
+		self._groups.move_to_end(groupId)
+		return ring
+
+	def add(self, groupId, messages):
+		"""Store ``messages`` (oldest first) in the ring of ``groupId``."""
+		with self._lock:
+			order, by_id = self._ring(str(groupId))
+			for message in messages:
+				msgId = str(message.get("msgId"))
+				if msgId in by_id:
+					by_id[msgId] = message
+					continue
+
+				if len(order) >= self.size:
+					by_id.pop(order.popleft(), None)
+
+				order.append(msgId)
+				by_id[msgId] = message
+
+	def get(self, groupId, msgId):
+		"""Cached message ``msgId`` of ``groupId``, or ``None``."""
+		with self._lock:
+			ring = self._groups.get(str(groupId))
+			return ring[1].get(str(msgId)) if ring else None
+
+	def messages(self, groupId):
+		"""Cached messages of ``groupId``, oldest first."""
+		with self._lock:
+			ring = self._groups.get(str(groupId))
+			return [ring[1][msgId] for msgId in ring[0]] if ring else []
+
+	def _lookup(self, groupId, msgId):
+		with self._lock:
+			ring = self._groups.get(groupId)
+			cached = ring[1].get(msgId) if ring is not None else None
+			if cached is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+
+			return cached, ring is not None
+
+	def _store(self, groupId, msgId, message, fetched):
+		if fetched is not None:
+			self.add(groupId, fetched)
+			cached = self.get(groupId, msgId)
+			if cached is not None:
+				return cached
+
+		self.add(groupId, [message])
+		return message
+
+	def resolve(self, groupId, message, fetch):
+		"""Cached copy of ``message``, recording it in the ring of its group.
+
+		Args:
+			groupId (str): Group the message was sent to
+			message (dict): Message received from the websocket
+			fetch (callable): ``fetch(groupId)`` returns the recent messages of a group,
+				called (once for concurrent callers) when the group is not cached yet
+
+		Returns:
+			dict: The cached message, or ``message`` itself
+		"""
+		groupId, msgId = str(groupId), str(message.get("msgId"))
+		cached, warm = self._lookup(groupId, msgId)
+		if cached is not None:
+			return cached
+
+		fetched = None
+		if not warm:
+			try:
+				fetched = self._flight.do(groupId, fetch, groupId) or []
+			except Exception:
+				fetched = []
+
+		return self._store(groupId, msgId, message, fetched)
+
+	async def resolve_async(self, groupId, message, fetch):
+		"""``resolve`` with a coroutine ``fetch``."""
+		groupId, msgId = str(groupId), str(message.get("msgId"))
+		cached, warm = self._lookup(groupId, msgId)
+		if cached is not None:
+			return cached
+
+		fetched = None
+		if not warm:
+			try:
+				fetched = await self._flight.do_async(groupId, fetch, groupId) or []
+			except Exception:
+				fetched = []
+
+		return self._store(groupId, msgId, message, fetched)
+
+	def stats(self):
+		with self._lock:
+			return {"groups": len(self._groups), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,298 @@
+# -*- coding: UTF-8 -*-
+import time
+import random
+import asyncio
+import inspect
+import aiohttp
+import requests
+import functools
+import itertools
+import threading
+import contextvars
+import collections
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from ._exception import ZaloServerError
+from ._ratelimit import error_code
+
+_attempt = contextvars.ContextVar("zlapi_attempt", default=0)
+
+#: Network errors that are safe to retry for idempotent requests
+RETRYABLE_ERRORS = (
+	ZaloServerError,
+	ConnectionError,
+	TimeoutError,
+	asyncio.TimeoutError,
+	requests.exceptions.ConnectionError,
+	requests.exceptions.Timeout,
+	requests.exceptions.ChunkedEncodingError,
+	aiohttp.ClientConnectionError,
+	aiohttp.ClientPayloadError,
+)
+
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def current_attempt():
+	"""Retry number of the request being sent (``0`` for the first try).
+
+	The clients send it as ``nretry``, like the Zalo web client.
+	"""
+	return _attempt.get()
+
+
+def mark_attempt(params):
+	"""Set the ``nretry`` field of request params, if present, to the current retry number."""
+	if isinstance(params, dict) and "nretry" in params:
+		params["nretry"] = _attempt.get()
+
+	return params
+
+
+def _executor():
+	global _hedge_pool
+	with _hedge_pool_lock:
+		if _hedge_pool is None:
+			_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="zlapi-hedge")
+
+		return _hedge_pool
+
+
+class LatencyTracker(object):
+	"""Recent successful call durations, per method."""
+
+	def __init__(self, size=200):
+		self._lock = threading.Lock()
+		self._samples = collections.defaultdict(lambda: collections.deque(maxlen=size))
+
+	def record(self, name, seconds):
+		with self._lock:
+			self._samples[name].append(seconds)
+
+	def percentile(self, name, pct, min_samples=20):
+		with self._lock:
+			samples = sorted(self._samples.get(name, ()))
+
+		if len(samples) < min_samples:
+			return None
+
+		return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+class RetryPolicy(object):
+	"""Retry and hedging settings for idempotent reads.
+
+	Args:
+		max_attempts (int): Total number of tries, including the first one
+		base_delay (float): Backoff before the first retry, in seconds
+		max_delay (float): Upper bound of a single backoff
+		multiplier (float): Backoff growth factor between retries
+		max_elapsed (float): Stop retrying once this many seconds have passed since the first try
+		jitter (bool): Randomize each backoff between 0 and its full value
+		retry_codes (set): Zalo error codes that are also worth retrying
+		hedge (float | str): Send a second copy of a request still pending after this many
+			seconds, or after the recent ``"p95"`` latency of the method (``None`` disables hedging)
+		hedge_min_samples (int): Calls to observe before a percentile hedge delay is used
+	"""
+
+	def __init__(
+		self,
+		max_attempts=3,
+		base_delay=0.2,
+		max_delay=5.0,
+		multiplier=2.0,
+		max_elapsed=15.0,
+		jitter=True,
+		retry_codes=(),
+		hedge=None,
+		hedge_min_samples=20
+	):
+		self.max_attempts = max(1, max_attempts)
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.multiplier = multiplier
+		self.max_elapsed = max_elapsed
+		self.jitter = jitter
+		self.retry_codes = frozenset(int(code) for code in retry_codes)
+		self.hedge = hedge
+		self.hedge_min_samples = hedge_min_samples
+		self.latency = LatencyTracker()
+		self.counters = collections.Counter()
+		self._lock = threading.Lock()
+
+	def backoff(self, retry):
+		delay = min(self.max_delay, self.base_delay * self.multiplier ** retry)
+		return random.uniform(0, delay) if self.jitter else delay
+
+	def is_retryable(self, error):
+		if isinstance(error, RETRYABLE_ERRORS):
+			return True
+
+		return bool(self.retry_codes) and error_code(error) in self.retry_codes
+
+	def hedge_delay(self, name):
+		if isinstance(self.hedge, str) and self.hedge.startswith("p"):
+			return self.latency.percentile(name, float(self.hedge[1:]), self.hedge_min_samples)
+
+		return self.hedge
+
+	def next_delay(self, error, retry, started):
+		"""Seconds to wait before the next try, or ``None`` to give up."""
+		if retry + 1 >= self.max_attempts or not self.is_retryable(error):
+			return None
+
+		delay = self.backoff(retry)
+		if self.max_elapsed is not None and time.monotonic() - started + delay > self.max_elapsed:
+			return None
+
+		return delay
+
+	def count(self, name):
+		with self._lock:
+			self.counters[name] += 1
+
+	def stats(self):
+		"""Counters of ``calls``, ``retries``, ``hedged`` and ``hedge_wins``."""
+		with self._lock:
+			return dict(self.counters)
+
+
+def _run_attempt(attempt, func, *args, **kwargs):
+	token = _attempt.set(attempt)
+	try:
+		return func(*args, **kwargs)
+	finally:
+		_attempt.reset(token)
+
+
+async def _run_attempt_async(attempt, func, *args, **kwargs):
+	token = _attempt.set(attempt)
+	try:
+		return await func(*args, **kwargs)
+	finally:
+		_attempt.reset(token)
+
+
+def _hedged(policy, name, attempts, func, *args, **kwargs):
+	delay = policy.hedge_delay(name)
+	if delay is None:
+		return _run_attempt(next(attempts), func, *args, **kwargs)
+
+	executor = _executor()
+	primary = executor.submit(_run_attempt, next(attempts), func, *args, **kwargs)
+	done, _ = wait([primary], timeout=delay)
+	if done:
+		return primary.result()
+
+	policy.count("hedged")
+	hedge = executor.submit(_run_attempt, next(attempts), func, *args, **kwargs)
+	pending = {primary, hedge}
+	while pending:
+		done, pending = wait(pending, return_when=FIRST_COMPLETED)
+		winner = next((future for future in done if future.exception() is None), None)
+		if winner is not None:
+			if winner is hedge:
+				policy.count("hedge_wins")
+
+			return winner.result()
+
+		if not pending:
+			return done.pop().result()
+
+
+async def _hedged_async(policy, name, attempts, func, *args, **kwargs):
+	delay = policy.hedge_delay(name)
+	if delay is None:
+		return await _run_attempt_async(next(attempts), func, *args, **kwargs)
+
+	primary = asyncio.ensure_future(_run_attempt_async(next(attempts), func, *args, **kwargs))
+	done, _ = await asyncio.wait([primary], timeout=delay)
+	if done:
+		return primary.result()
+
+	policy.count("hedged")
+	hedge = asyncio.ensure_future(_run_attempt_async(next(attempts), func, *args, **kwargs))
+	pending = {primary, hedge}
+	try:
+		while pending:
+			done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+			winner = next((task for task in done if task.exception() is None), None)
+			if winner is not None:
+				if winner is hedge:
+					policy.count("hedge_wins")
+
+				return winner.result()
+
+			if not pending:
+				return done.pop().result()
+	finally:
+		for task in pending:
+			task.cancel()
+
+
+def idempotent(func):
+	"""Retry (and optionally hedge) an idempotent client method.
+
+	Only active when the client has a ``RetryPolicy`` in ``self._retry``.
+	"""
+	name = func.__name__
+
+	if inspect.iscoroutinefunction(func):
+		@functools.wraps(func)
+		async def wrapper(self, *args, **kwargs):
+			policy = getattr(self, "_retry", None)
+			if policy is None:
+				return await func(self, *args, **kwargs)
+
+			policy.count("calls")
+			started = time.monotonic()
+			retry = 0
+			attempts = itertools.count()
+			while True:
+				begin = time.monotonic()
+				try:
+					result = await _hedged_async(policy, name, attempts, func, self, *args, **kwargs)
+				except Exception as e:
+					delay = policy.next_delay(e, retry, started)
+					if delay is None:
+						raise
+
+					policy.count("retries")
+					retry += 1
+					await asyncio.sleep(delay)
+					continue
+
+				policy.latency.record(name, time.monotonic() - begin)
+				return result
+
+	else:
+		@functools.wraps(func)
+		def wrapper(self, *args, **kwargs):
+			policy = getattr(self, "_retry", None)
+			if policy is None:
+				return func(self, *args, **kwargs)
+
+			policy.count("calls")
+			started = time.monotonic()
+			retry = 0
+			attempts = itertools.count()
+			while True:
+				begin = time.monotonic()
+				try:
+					result = _hedged(policy, name, attempts, func, self, *args, **kwargs)
+				except Exception as e:
+					delay = policy.next_delay(e, retry, started)
+					if delay is None:
+						raise
+
+					policy.count("retries")
+					retry += 1
+					time.sleep(delay)
+					continue
+
+				policy.latency.record(name, time.monotonic() - begin)
+				return result
+
+	return wrapper
@@ -3,7 +3,7 @@ import attr
 import random
 import requests, json
 
-from . import _util, _exception
+from . import _util, _exception, _transport, _retry
 
 headers = {
 	"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
@@ -20,11 +20,13 @@ headers = {
 	"accept-language": "vi-VN,vi;q=0.9,fr-FR;q=0.8,fr;q=0.7,en-US;q=0.6,en;q=0.5",
 }
 class State(object):
-	def __init__(cls):
+	def __init__(cls, pool_options=None, transport=None):
 		cls._config = {}
+		cls._codec = None
 		cls._headers = _util.HEADERS
 		cls._cookies = _util.COOKIES
-		cls._session = requests.Session()
+		cls._transport = transport or _transport.RequestsTransport(pool_options=pool_options)
+		cls._session = getattr(cls._transport, "session", None) or requests.Session()
 		cls.user_id = None
 		cls.user_imei = None
 		cls._loggedin = False
@@ -41,15 +43,34 @@ class State(object):
 	def set_secret_key(cls, secret_key):
 		cls._config["secret_key"] = secret_key
 	
+	def get_codec(cls):
+		secret_key = cls._config.get("secret_key")
+		if cls._codec is None or cls._codec.key != secret_key:
+			cls._codec = _util.Codec(secret_key)
+		
+		return cls._codec
+	
+	def get_pool_stats(cls):
+		stats = getattr(cls._transport, "pool_stats", None)
+		return stats.snapshot() if stats else {}
+	
 	def _get(cls, *args, **kwargs):
-		sessionObj = cls._session.get(*args, **kwargs, headers=cls._headers, cookies=cls._cookies)
+		_retry.mark_attempt(kwargs.get("params"))
+		sessionObj = cls._transport.request("GET", *args, **kwargs, headers=cls._headers, cookies=cls._cookies)
 		
 		return sessionObj
 		
 	def _post(cls, *args, **kwargs):
-		sessionObj = cls._session.post(*args, **kwargs, headers=cls._headers, cookies=cls._cookies)
+		_retry.mark_attempt(kwargs.get("params"))
+		sessionObj = cls._transport.request("POST", *args, **kwargs, headers=cls._headers, cookies=cls._cookies)
 		return sessionObj
 	
+	def prewarm(cls, families=None, connections=1):
+		return cls._transport.prewarm(families, connections)
+	
+	def close(cls):
+		cls._transport.close()
+	
 	def is_logged_in(cls):
 		return cls._loggedin
 	
@@ -67,7 +88,7 @@ class State(object):
 			}
 			try:
 				url = f"https://wpa.chat.zalo.me/api/login/getLoginInfo?imei={imei}&type=30&client_version=645&computer_name=Web&ts={_util.now()}"
-				response = requests.get(url, headers=headers, cookies=cls._cookies)
+				response = cls._transport.request("GET", url, headers=headers, cookies=cls._cookies)
 				data = response.json()
 				zpw = data["data"]["zpw_ws"]
 				uid = data["data"]["uid"]
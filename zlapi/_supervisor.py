@@ -0,0 +1,216 @@
+# -*- coding: UTF-8 -*-
+import time
+import random
+import threading
+import collections
+
+from websockets.exceptions import ConnectionClosedError, InvalidHandshake
+
+from ._retry import RETRYABLE_ERRORS
+
+#: Opening the connection
+CONNECTING = "connecting"
+
+#: Connected and receiving
+LIVE = "live"
+
+#: Connection ended, releasing its resources
+DRAINING = "draining"
+
+#: Waiting before the next connection attempt
+BACKOFF = "backoff"
+
+#: Not listening
+STOPPED = "stopped"
+
+#: Seconds between planned websocket rotations
+ROTATION_INTERVAL = 50 * 60
+
+#: Message lists of the frames that can be delivered on both websockets of a rotation
+_MESSAGE_LISTS = {501: ("msgs",), 521: ("groupMsgs",), 612: ("reacts", "reactGroups")}
+
+#: Errors ending a connection that are worth reconnecting after
+DISCONNECT_ERRORS = RETRYABLE_ERRORS + (
+	OSError,
+	EOFError,
+	ConnectionClosedError,
+	InvalidHandshake,
+)
+
+
+class ReconnectPolicy(object):
+	"""Delays between the connection attempts of a listener.
+
+	Each failed attempt doubles (``multiplier``) the delay, starting at ``base``
+	and up to ``cap``, and a random part of it (``jitter``) is shaved off so
+	that many clients do not reconnect in lockstep. A connection that goes
+	live resets the delay. At most ``max_attempts`` attempts are made per
+	``window`` seconds, further attempts wait for the window to clear.
+
+	Args:
+		base (float): First delay in seconds (Default: the ``reconnect`` argument of ``listen``)
+		cap (float): Longest delay in seconds
+		multiplier (float): Growth of the delay per failed attempt
+		jitter (float): Part of each delay that is randomized, from 0 (none) to 1 (full jitter)
+		max_attempts (int): Attempts allowed per ``window``, ``None`` for no limit
+		window (float): Length of the attempt window in seconds
+		rotate (float): Seconds between planned rotations of a live websocket to a new connection
+			(Default: 50 minutes), ``None`` keeps the connection until it drops
+
+	Example:
+		>>> client = ZaloAPI(..., reconnect_policy=ReconnectPolicy(cap=60, max_attempts=10, window=300))
+	"""
+
+	def __init__(self, base=None, cap=300, multiplier=2, jitter=0.5, max_attempts=30, window=600, rotate=ROTATION_INTERVAL):
+		self.base = base
+		self.cap = cap
+		self.multiplier = multiplier
+		self.jitter = min(max(jitter, 0), 1)
+		self.max_attempts = max_attempts
+		self.window = window
+		self.rotate = rotate
+
+	def delay(self, failures, base=5):
+		"""Delay after ``failures`` consecutive failed attempts."""
+		base = self.base if self.base is not None else base
+		delay = min(self.cap, base * self.multiplier ** max(failures - 1, 0))
+		return delay * (1 - self.jitter * random.random())
+
+
+class Supervisor(object):
+	"""Connection state of a listener: ``connecting``, ``live``, ``draining``, ``backoff`` or ``stopped``.
+
+	Args:
+		policy (ReconnectPolicy): Delays between attempts
+		base (float): Base delay when ``policy`` has none
+	"""
+
+	def __init__(self, policy=None, base=5):
+		self.policy = policy or ReconnectPolicy()
+		self.base = base
+		self.state = STOPPED
+		self.failures = 0
+		self.attempts = 0
+		self.down_since = None
+		self._lock = threading.Lock()
+		self._history = collections.deque()
+
+	def connecting(self):
+		with self._lock:
+			self.state = CONNECTING
+			self.attempts += 1
+			self._history.append(time.monotonic())
+
+	def live(self):
+		"""Mark the connection live.
+
+		Returns:
+			tuple: ``(attempts, downtime)`` when this ends a disconnect, ``None`` for the first connection
+		"""
+		with self._lock:
+			reconnected = (self.attempts, time.monotonic() - self.down_since) if self.down_since is not None else None
+			self.state = LIVE
+			self.failures = 0
+			self.attempts = 0
+			self.down_since = None
+			return reconnected
+
+	def draining(self):
+		"""Mark the connection ended; ``True`` if it had been live."""
+		with self._lock:
+			was_live = self.state == LIVE
+			self.state = DRAINING
+			if self.down_since is None:
+				self.down_since = time.monotonic()
+
+			return was_live
+
+	def backoff(self):
+		"""Enter ``backoff`` and return the seconds to wait before the next attempt."""
+		with self._lock:
+			self.state = BACKOFF
+			self.failures += 1
+			delay = self.policy.delay(self.failures, self.base)
+			now = time.monotonic()
+			while self._history and self._history[0] <= now - self.policy.window:
+				self._history.popleft()
+
+			limit = self.policy.max_attempts
+			if limit and len(self._history) >= limit:
+				delay = max(delay, self._history[-limit] + self.policy.window - now)
+
+			return delay
+
+	def stopped(self):
+		with self._lock:
+			self.state = STOPPED
+
+
+class OverlapFilter(object):
+	"""Drop the messages delivered twice while two websockets overlap during a rotation.
+
+	Message IDs are recorded from ``start`` until ``window`` seconds after ``end``,
+	outside of that frames pass through untouched.
+
+	Args:
+		window (float): Seconds to keep filtering after the old websocket is closed
+		size (int): Message IDs remembered
+	"""
+
+	def __init__(self, window=30, size=10000):
+		self.window = window
+		self.size = size
+		self.dropped = 0
+		self._lock = threading.Lock()
+		self._until = None
+		self._ids = set()
+		self._order = collections.deque()
+
+	def start(self):
+		with self._lock:
+			self._until = float("inf")
+
+	def end(self):
+		with self._lock:
+			if self._until is not None:
+				self._until = time.monotonic() + self.window
+
+	def _first(self, msgId):
+		if msgId is None:
+			return True
+
+		msgId = str(msgId)
+		if msgId in self._ids:
+			self.dropped += 1
+			return False
+
+		self._ids.add(msgId)
+		self._order.append(msgId)
+		if len(self._order) > self.size:
+			self._ids.discard(self._order.popleft())
+
+		return True
+
+	def filter(self, frame):
+		"""``frame`` without the messages already seen, ``None`` if none is left."""
+		n, cmd, s, parsedData = frame
+		keys = _MESSAGE_LISTS.get(cmd)
+		with self._lock:
+			if self._until is not None and time.monotonic() >= self._until:
+				self._until = None
+				self._ids.clear()
+				self._order.clear()
+
+			if self._until is None or not keys or not isinstance(parsedData.get("data"), dict):
+				return frame
+
+			data = parsedData["data"]
+			kept = {key: [message for message in data[key] if self._first(message.get("msgId"))] for key in keys if data.get(key)}
+
+		if all(len(kept[key]) == len(data[key]) for key in kept):
+			return frame
+
+		if not any(kept.values()):
+			return None
+
+		return n, cmd, s, dict(parsedData, data=dict(data, **kept))
@@ -0,0 +1,273 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import aiohttp
+import threading
+import requests
+import urllib.parse
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import _pool, _dns, _util
+from ._exception import ZaloServerError, ZaloRateLimitError
+
+
+class JSONResponse(object):
+	"""Wraps a ``requests.Response`` so that ``json()`` parses with the selected JSON backend.
+
+	Every other attribute is read from the wrapped ``response``.
+	"""
+
+	__slots__ = ("response",)
+
+	def __init__(self, response):
+		self.response = response
+
+	def __getattr__(self, name):
+		return getattr(self.response, name)
+
+	def json(self, **kwargs):
+		if kwargs:
+			return self.response.json(**kwargs)
+
+		return _util.json_loads(self.response.content)
+
+
+class Transport(object):
+	"""Sends the HTTP requests of the sync ``State``.
+
+	Subclasses implement :meth:`request`, which must return an object with a
+	``json()`` method (like ``requests.Response``), raise ``ZaloServerError``
+	on HTTP 5xx answers and ``ZaloRateLimitError`` on HTTP 429.
+
+	Args:
+		base_url (str): If set, every request is sent to this origin instead of
+			the Zalo host in its url (e.g. ``http://127.0.0.1:8080`` for a local mock server)
+	"""
+
+	def __init__(self, base_url=None):
+		self.base_url = base_url.rstrip("/") if base_url else None
+
+	def resolve(self, url):
+		if not self.base_url:
+			return url
+
+		parts = urllib.parse.urlsplit(url)
+		return self.base_url + urllib.parse.urlunsplit(("", "", parts.path, parts.query, parts.fragment))
+
+	def request(self, method, url, **kwargs):
+		raise NotImplementedError
+
+	def prewarm(self, families=None, connections=1):
+		"""Open connections ahead of the first requests (no-op unless implemented)."""
+		return {}
+
+	def close(self):
+		pass
+
+	def warm_urls(self, families=None):
+		"""Origins to prewarm: every host of ``families`` (all of ``HOST_FAMILIES`` by default)."""
+		if self.base_url:
+			return [self.base_url + "/"]
+
+		families = families or list(_pool.HOST_FAMILIES)
+		return [f"https://{host}/" for family in families for host in _pool.HOST_FAMILIES[family]]
+
+
+class RequestsTransport(Transport):
+	"""Default sync transport, a ``requests.Session`` with one pool per Zalo host family.
+
+	Args:
+		base_url (str): Origin to send every request to instead of the Zalo hosts
+		pool_options (dict): Connection pool settings, see ``_pool.mount_adapters``
+		dns_cache (DNSCache): Cache new connections resolve their host with
+			(Default: a cache keeping answers for 300 seconds)
+	"""
+
+	def __init__(self, base_url=None, pool_options=None, dns_cache=None):
+		super().__init__(base_url)
+		self.session = requests.Session()
+		self.dns_cache = dns_cache or _dns.DNSCache()
+		self.pool_stats = _pool.mount_adapters(self.session, pool_options, resolver=self.dns_cache)
+
+	def request(self, method, url, **kwargs):
+		response = self.session.request(method, self.resolve(url), **kwargs)
+		if response.status_code >= 500:
+			raise ZaloServerError(f"Error #{response.status_code} when sending requests: {response.reason}", response.status_code)
+
+		if response.status_code == 429:
+			raise ZaloRateLimitError(f"Error #429 when sending requests: {response.reason}")
+
+		return JSONResponse(response)
+
+	def prewarm(self, families=None, connections=1):
+		"""Resolve the Zalo hosts and open keep-alive connections to them in parallel.
+
+		Args:
+			families (list): Host families to warm (Default: all of ``HOST_FAMILIES``)
+			connections (int): Connections to open per host
+
+		Returns:
+			dict: ``{url: error}`` with ``None`` for the hosts that were warmed
+		"""
+		def warm(url):
+			try:
+				adapter = self.session.get_adapter(url)
+				if hasattr(adapter, "get_connection_with_tls_context"):
+					pool = adapter.get_connection_with_tls_context(requests.Request("GET", url).prepare(), self.session.verify)
+				else:
+					pool = adapter.get_connection(url)
+
+				_pool.warm_pool(pool, connections)
+			except Exception as e:
+				return url, e
+
+			return url, None
+
+		urls = self.warm_urls(families)
+		with ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="zlapi-prewarm") as executor:
+			return dict(executor.map(warm, urls))
+
+	def close(self):
+		self.session.close()
+
+
+class AsyncTransport(Transport):
+	"""Sends the HTTP requests of the async ``State``.
+
+	Subclasses implement the coroutine :meth:`request`, which must return the
+	decoded JSON body of the response, raise ``ZaloServerError`` on HTTP 5xx answers
+	and ``ZaloRateLimitError`` on HTTP 429.
+	"""
+
+	async def request(self, method, url, **kwargs):
+		raise NotImplementedError
+
+	async def prewarm(self, families=None, connections=1):
+		"""Open connections ahead of the first requests (no-op unless implemented)."""
+		return {}
+
+	async def close(self):
+		pass
+
+
+class AiohttpTransport(AsyncTransport):
+	"""Default async transport, one pooled ``aiohttp.ClientSession`` on a background event loop.
+
+	Requests from any event loop (e.g. one ``asyncio.run`` per call) are handed over
+	to the loop of the transport, so they all share the same connection pool.
+
+	Args:
+		base_url (str): Origin to send every request to instead of the Zalo hosts
+		limit (int): Total number of simultaneous connections
+		limit_per_host (int): Number of simultaneous connections to one host
+		keepalive_timeout (float): Seconds an idle connection is kept open
+		ttl_dns_cache (int): Seconds DNS lookups are cached (``0`` disables the cache)
+		dns_cache (DNSCache): Cache new connections resolve their host with
+			(Default: a cache keeping answers for ``ttl_dns_cache`` seconds)
+	"""
+
+	def __init__(self, base_url=None, limit=100, limit_per_host=30, keepalive_timeout=30, ttl_dns_cache=300, dns_cache=None):
+		super().__init__(base_url)
+		self.dns_cache = dns_cache or (_dns.DNSCache(ttl_dns_cache) if ttl_dns_cache else None)
+		self._session = None
+		self._loop = None
+		self._thread = None
+		self._lock = threading.Lock()
+		self._connector_options = {
+			"limit": limit,
+			"limit_per_host": limit_per_host,
+			"keepalive_timeout": keepalive_timeout,
+			"ttl_dns_cache": ttl_dns_cache,
+			"use_dns_cache": bool(ttl_dns_cache)
+		}
+
+	def _get_loop(self):
+		with self._lock:
+			if self._loop is None:
+				self._loop = asyncio.new_event_loop()
+				self._thread = threading.Thread(target=self._loop.run_forever, name="zlapi-aiohttp", daemon=True)
+				self._thread.start()
+
+			return self._loop
+
+	async def _run(self, coro):
+		"""Await ``coro`` on the loop of the transport."""
+		loop = self._get_loop()
+		if asyncio.get_running_loop() is loop:
+			return await coro
+
+		return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+	async def get_session(self):
+		"""The session of the transport, to be used on its loop."""
+		if self._session is None or self._session.closed:
+			resolver = _dns.CachedResolver(self.dns_cache) if self.dns_cache else None
+			connector = aiohttp.TCPConnector(resolver=resolver, **self._connector_options)
+			self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+
+		return self._session
+
+	async def _prewarm(self, families, connections):
+		session = await self.get_session()
+
+		async def warm(url):
+			try:
+				async with session.head(url, allow_redirects=False, timeout=aiohttp.ClientTimeout(total=10)):
+					pass
+			except Exception as e:
+				return url, e
+
+			return url, None
+
+		urls = [url for url in self.warm_urls(families) for _ in range(connections)]
+		return dict(await asyncio.gather(*map(warm, urls)))
+
+	async def prewarm(self, families=None, connections=1):
+		"""Resolve the Zalo hosts and open keep-alive connections to them in parallel.
+
+		Args:
+			families (list): Host families to warm (Default: all of ``HOST_FAMILIES``)
+			connections (int): Connections to open per host
+
+		Returns:
+			dict: ``{url: error}`` with ``None`` for the hosts that were warmed
+		"""
+		return await self._run(self._prewarm(families, connections))
+
+	async def _request(self, method, url, **kwargs):
+		session = await self.get_session()
+		async with session.request(method, self.resolve(url), **kwargs) as response:
+			if response.status >= 500:
+				raise ZaloServerError(f"Error #{response.status} when sending requests: {response.reason}", response.status)
+
+			if response.status == 429:
+				raise ZaloRateLimitError(f"Error #429 when sending requests: {response.reason}")
+
+			return await response.json(loads=_util.json_loads, content_type=None)
+
+	async def request(self, method, url, **kwargs):
+		return await self._run(self._request(method, url, **kwargs))
+
+	async def _close_session(self):
+		if self._session is not None:
+			await self._session.close()
+			self._session = None
+
+	async def close(self):
+		"""Close the session and stop the loop of the transport, the next request starts them again."""
+		with self._lock:
+			loop, thread = self._loop, self._thread
+			self._loop = self._thread = None
+
+		if loop is None:
+			return
+
+		if asyncio.get_running_loop() is loop:
+			await self._close_session()
+			loop.stop()
+			return
+
+		await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._close_session(), loop))
+		loop.call_soon_threadsafe(loop.stop)
+		await asyncio.get_running_loop().run_in_executor(None, thread.join)
+		loop.close()
@@ -1,8 +1,12 @@
 # -*- coding: UTF-8 -*-
 
+import os
 import time, datetime
 import urllib.parse, json
 import gzip, base64, zlib
+import binascii, struct
+import functools
+import threading
 
 from . import _exception
 from Crypto.Cipher import AES
@@ -27,6 +31,95 @@ HEADERS = {
 #: Default cookies
 COOKIES = {}
 
+#: Name of the JSON library in use, see ``set_json_backend``
+JSON_BACKEND = "json"
+
+#: Header of the websocket frames: version, cmd, sub command
+FRAME_HEADER = struct.Struct("<BHB")
+
+#: Bytes decrypted and decompressed at a time when decoding websocket frames
+FRAME_CHUNK_SIZE = 64 * 1024
+
+
+def _stdlib_dumps(obj):
+	return json.dumps(obj)
+
+
+def json_dumps(obj):
+	"""Serialize ``obj`` to a JSON ``str`` with the selected backend."""
+	return _stdlib_dumps(obj)
+
+
+def json_loads(data):
+	"""Parse a JSON ``str``/``bytes`` document with the selected backend."""
+	return json.loads(data)
+
+
+def set_json_backend(name="auto"):
+	"""Select the JSON library used for payloads, websocket frames and responses.
+	
+	Args:
+		name (str): ``"orjson"``, ``"ujson"``, ``"json"`` (standard library) or
+			``"auto"`` for the fastest one installed. The fast libraries encode
+			payloads more compactly (no spaces, raw UTF-8), so the bytes sent
+			differ from the standard library's
+	
+	Returns:
+		str: Name of the selected backend
+	
+	Raises:
+		ZaloUserError: If the requested library is not installed
+	"""
+	global JSON_BACKEND, json_dumps, json_loads
+	
+	candidates = ("orjson", "ujson", "json") if name == "auto" else (name,)
+	for candidate in candidates:
+		if candidate == "json":
+			json_dumps, json_loads = _stdlib_dumps, json.loads
+			break
+		
+		try:
+			module = __import__(candidate)
+		except ImportError:
+			if name != "auto":
+				raise _exception.ZaloUserError(f"JSON backend {name!r} is not installed")
+			
+			continue
+		
+		if candidate == "orjson":
+			def json_dumps(obj, _dumps=module.dumps, _options=module.OPT_NON_STR_KEYS):
+				try:
+					return _dumps(obj, option=_options).decode()
+				except TypeError:
+					# Integers above 64 bits and other types orjson rejects
+					return _stdlib_dumps(obj)
+		
+		elif candidate == "ujson":
+			def json_dumps(obj, _dumps=module.dumps):
+				try:
+					return _dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+				except (TypeError, OverflowError):
+					return _stdlib_dumps(obj)
+		
+		else:
+			raise _exception.ZaloUserError(f"Unknown JSON backend {name!r}")
+		
+		def json_loads(data, _loads=module.loads):
+			try:
+				return _loads(data)
+			except (TypeError, ValueError):
+				# Let the standard library parse (or reject) what the fast parser refused
+				return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+		
+		break
+	
+	JSON_BACKEND = candidate
+	return JSON_BACKEND
+
+
+# The standard library by default, orjson/ujson only when asked for
+set_json_backend(os.environ.get("ZLAPI_JSON", "json"))
+
 
 def now():
 	return int(time.time() * 1000)
@@ -45,7 +138,24 @@ def getHeader(buffer):
 	if len(buffer) < 4:
 		raise ValueError("Invalid header")
 	
-	return [buffer[0], int.from_bytes(buffer[1:3], "little"), buffer[3]]
+	return FRAME_HEADER.unpack_from(buffer)
+
+
+def parseFrame(data):
+	"""Split a binary websocket frame into its header and parsed JSON envelope.
+	
+	The body is parsed in place (no ``data[4:]`` copy) when the JSON backend
+	accepts a ``memoryview``.
+	
+	Returns:
+		tuple: ``(version, cmd, sub_cmd, envelope)``, ``envelope`` is ``None`` for an empty body
+	"""
+	version, cmd, sub_cmd = getHeader(data)
+	if len(data) == FRAME_HEADER.size:
+		return version, cmd, sub_cmd, None
+	
+	body = memoryview(data)[FRAME_HEADER.size:]
+	return version, cmd, sub_cmd, json_loads(body if JSON_BACKEND == "orjson" else body.tobytes())
 
 
 def getClientMessageType(msgType):
@@ -103,81 +213,175 @@ def _unpad(s, block_size):
 	return s[:-padding_length]
 
 
-def zalo_encode(params, key):
-	try:
-		key = base64.b64decode(key)
-		iv = bytes.fromhex("00000000000000000000000000000000")
-		cipher = AES.new(key, AES.MODE_CBC, iv)
-		plaintext = json.dumps(params).encode()
-		padded_plaintext = _pad(plaintext, AES.block_size)
-		ciphertext = cipher.encrypt(padded_plaintext)
-		
-		return base64.b64encode(ciphertext).decode()
-		
-	except Exception as e:
-		raise _exception.EncodePayloadError(f"Unable to encode payload! Error: {e}")
-		
-		
-def zalo_decode(params, key):
-	try:
-		params = urllib.parse.unquote(params)
-		key = base64.b64decode(key)
-		iv = bytes.fromhex("00000000000000000000000000000000")
-		cipher = AES.new(key, AES.MODE_CBC, iv)
-		ciphertext = base64.b64decode(params.encode())
-		padded_plaintext = cipher.decrypt(ciphertext)
-		plaintext = _unpad(padded_plaintext, AES.block_size)
-		plaintext = plaintext.decode("utf-8")
-		
-		if isinstance(plaintext, str):
-			plaintext = json.loads(plaintext)
-		
-		return plaintext
+class Codec(object):
+	"""AES codec bound to one key.
+	
+	Create one per ``secret_key`` (HTTP payloads) or ``ws_key`` (websocket frames).
+	The key is decoded once, and the AES-CBC ciphers used for HTTP payloads are
+	created once and reused: every payload is encrypted with a zero IV, so only
+	the first block has to be corrected for the chaining value the cipher carries
+	over from the previous call. Safe to share between threads.
+	
+	Args:
+		key (str): Base64 encoded AES key
+	"""
+	
+	__slots__ = ("key", "_key", "_lock", "_encryptor", "_encrypt_iv", "_decryptor", "_decrypt_iv")
+	
+	_ZERO_IV = bytes(16)
+	
+	def __init__(self, key):
+		self.key = key
+		self._key = None
+		self._lock = threading.Lock()
+		self._encryptor = self._decryptor = None
+	
+	def _aes_key(self):
+		if self._key is None:
+			self._key = base64.b64decode(self.key)
 		
-	except Exception as e:
-		raise _exception.DecodePayloadError(f"Unable to decode payload! Error: {e}")
-
-
-def zws_decode(parsed, key):
-	payload = parsed.get("data")
-	encrypt_type = parsed.get("encrypt")
-	if not payload or not key:
-		return
+		return self._key
 	
-	try:
-		if encrypt_type == 0:
+	@staticmethod
+	def _xor_block(data, iv):
+		block = (int.from_bytes(data[:16], "big") ^ int.from_bytes(iv, "big")).to_bytes(16, "big")
+		return block + data[16:]
+	
+	def encode(self, params):
+		"""Encrypt ``params`` like ``zalo_encode``."""
+		try:
+			padded_plaintext = _pad(json_dumps(params).encode(), AES.block_size)
+			with self._lock:
+				if self._encryptor is None:
+					self._encryptor = AES.new(self._aes_key(), AES.MODE_CBC, self._ZERO_IV)
+					self._encrypt_iv = self._ZERO_IV
+				
+				# CBC xors the first block with the last ciphertext block of the previous call
+				ciphertext = self._encryptor.encrypt(self._xor_block(padded_plaintext, self._encrypt_iv))
+				self._encrypt_iv = ciphertext[-16:]
 			
-			decoded_data = payload
-		
-		elif encrypt_type == 1:
+			return base64.b64encode(ciphertext).decode()
 			
-			decrypted_data = base64.b64decode(payload)
-			decompressed_data = gzip.decompress(decrypted_data)
-			decoded_data = decompressed_data.decode("utf-8")
-		
-		elif encrypt_type == 2:
+		except Exception as e:
+			raise _exception.EncodePayloadError(f"Unable to encode payload! Error: {e}")
+	
+	def decode(self, params):
+		"""Decrypt a response ``data`` field like ``zalo_decode``."""
+		try:
+			ciphertext = base64.b64decode(urllib.parse.unquote(params))
+			if not ciphertext or len(ciphertext) % AES.block_size:
+				raise ValueError("Data must be padded to 16 byte boundary in CBC mode")
 			
-			data_bytes = base64.b64decode(urllib.parse.unquote(payload))
-			if len(data_bytes) >= 48:
+			with self._lock:
+				if self._decryptor is None:
+					self._decryptor = AES.new(self._aes_key(), AES.MODE_CBC, self._ZERO_IV)
+					self._decrypt_iv = self._ZERO_IV
 				
-				iv = data_bytes[:16]
-				additional_data = data_bytes[16:32]
-				data_source = data_bytes[32:]
-				decryptor = AES.new(base64.b64decode(key), AES.MODE_GCM, nonce=iv)
-				decryptor.update(additional_data)
-				decrypted_data = decryptor.decrypt(data_source)[:-16]
-				decompressed_data = zlib.decompress(decrypted_data, wbits=16)
-				decoded_data = decompressed_data.decode("utf-8")
-		
-		else:
+				padded_plaintext = self._decryptor.decrypt(ciphertext)
+				previous_iv, self._decrypt_iv = self._decrypt_iv, ciphertext[-16:]
 			
-			decoded_data = None
+			plaintext = _unpad(self._xor_block(padded_plaintext, previous_iv), AES.block_size)
+			
+			return json_loads(plaintext.decode("utf-8"))
+			
+		except Exception as e:
+			raise _exception.DecodePayloadError(f"Unable to decode payload! Error: {e}")
+	
+	def encode_frame(self, data, encrypt_type=2):
+		"""Build a websocket envelope (``{"data", "encrypt"}``) like ``zws_encode``."""
+		try:
+			plaintext = json_dumps(data)
+			if encrypt_type == 0:
+				
+				payload = plaintext
+			
+			elif encrypt_type == 1:
+				
+				payload = base64.b64encode(gzip.compress(plaintext.encode())).decode()
+			
+			elif encrypt_type == 2:
+				
+				iv = os.urandom(16)
+				additional_data = os.urandom(16)
+				encryptor = AES.new(self._aes_key(), AES.MODE_GCM, nonce=iv)
+				encryptor.update(additional_data)
+				ciphertext, tag = encryptor.encrypt_and_digest(gzip.compress(plaintext.encode()))
+				payload = urllib.parse.quote(base64.b64encode(iv + additional_data + ciphertext + tag).decode())
+			
+			else:
+				raise ValueError(f"Unknown encrypt type {encrypt_type}")
+			
+			return {"data": payload, "encrypt": encrypt_type}
 		
-		if not decoded_data:
+		except Exception as e:
+			raise _exception.EncodePayloadError(f"Unable to encode payload! Error: {e}")
+	
+	def decode_frame(self, parsed):
+		"""Decrypt a parsed websocket envelope like ``zws_decode``.
+		
+		Encrypted frames are decrypted and gunzipped ``FRAME_CHUNK_SIZE`` bytes at a
+		time over a ``memoryview`` of the payload, so large frames are not copied
+		whole at every step.
+		"""
+		payload = parsed.get("data")
+		encrypt_type = parsed.get("encrypt")
+		if not payload or not self.key:
 			return
+		
+		try:
+			decoded_data = None
+			if encrypt_type == 0:
+				
+				decoded_data = payload
 			
-		return json.loads(decoded_data)
-	
-	except Exception as e:
-		# return
-		raise _exception.DecodePayloadError(f"Unable to decode payload! Error: {e}")
\ No newline at end of file
+			elif encrypt_type == 1:
+				
+				decoded_data = zlib.decompress(binascii.a2b_base64(payload), wbits=31)
+			
+			elif encrypt_type == 2:
+				
+				if "%" in payload:
+					payload = urllib.parse.unquote(payload)
+				
+				data_bytes = memoryview(binascii.a2b_base64(payload))
+				if len(data_bytes) >= 48:
+					
+					decryptor = AES.new(self._aes_key(), AES.MODE_GCM, nonce=data_bytes[:16])
+					decryptor.update(data_bytes[16:32])
+					decrypted_data = data_bytes[32:-16]
+					decompressor = zlib.decompressobj(wbits=31)
+					chunks = [
+						decompressor.decompress(decryptor.decrypt(decrypted_data[start:start + FRAME_CHUNK_SIZE]))
+						for start in range(0, len(decrypted_data), FRAME_CHUNK_SIZE)
+					]
+					chunks.append(decompressor.flush())
+					decoded_data = b"".join(chunks)
+			
+			if not decoded_data:
+				return
+			
+			return json_loads(decoded_data)
+		
+		except Exception as e:
+			raise _exception.DecodePayloadError(f"Unable to decode payload! Error: {e}")
+
+
+@functools.lru_cache(maxsize=16)
+def _codec(key):
+	return Codec(key)
+
+
+def zalo_encode(params, key):
+	return _codec(key).encode(params)
+		
+		
+def zalo_decode(params, key):
+	return _codec(key).decode(params)
+
+
+def zws_encode(data, key, encrypt_type=2):
+	return _codec(key).encode_frame(data, encrypt_type)
+
+
+def zws_decode(parsed, key):
+	return _codec(key).decode_frame(parsed)
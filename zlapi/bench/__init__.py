@@ -0,0 +1,41 @@
+# -*- coding: UTF-8 -*-
+"""Micro-benchmarks of the zlapi hot paths.
+
+Fixtures are generated locally, nothing is sent to Zalo. Run every suite
+with ``python -m zlapi.bench`` (``--json``/``--output`` for machine-readable
+results).
+"""
+import time
+
+
+def measure(func, min_time=0.2, repeat=3):
+	"""Call ``func`` repeatedly and return its best rate.
+
+	Args:
+		func (callable): Function to time, called without arguments
+		min_time (float): Minimum seconds each round runs for
+		repeat (int): Number of rounds, the fastest one is kept
+
+	Returns:
+		float: Calls per second
+	"""
+	number = 1
+	while True:
+		start = time.perf_counter()
+		for _ in range(number):
+			func()
+		elapsed = time.perf_counter() - start
+		if elapsed >= min_time / 10:
+			break
+
+		number *= 10
+
+	number = max(1, int(number * min_time / elapsed))
+	best = 0.0
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for _ in range(number):
+			func()
+		best = max(best, number / (time.perf_counter() - start))
+
+	return best
@@ -0,0 +1,76 @@
+# -*- coding: UTF-8 -*-
+"""Run every benchmark suite.
+
+Usage::
+
+	python -m zlapi.bench [--json] [--output FILE] [--min-time SECONDS]
+
+``--json`` prints the results as JSON, ``--output`` writes them to a file,
+so runs of different releases can be compared.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+
+from .. import __version__, _util
+from . import codec, json_backends
+
+SUITES = {
+	"codec": codec.run,
+	"json_backends": json_backends.run,
+}
+
+
+def run(min_time=0.2, suites=None):
+	"""Run the benchmark suites.
+
+	Returns:
+		dict: Run metadata and ``{suite: results}`` under ``results``
+	"""
+	return {
+		"zlapi": __version__,
+		"python": platform.python_version(),
+		"implementation": platform.python_implementation(),
+		"machine": platform.machine(),
+		"json_backend": _util.JSON_BACKEND,
+		"timestamp": int(time.time()),
+		"unit": "calls/s",
+		"results": {name: SUITES[name](min_time) for name in suites or SUITES},
+	}
+
+
+def _print(report):
+	for suite, results in report["results"].items():
+		print(f"[{suite}]")
+		for case, rate in results.items():
+			if isinstance(rate, dict):
+				print("  " + case)
+				for name, value in rate.items():
+					print("    " + name.ljust(20) + f"{value:14.0f}")
+			else:
+				print("  " + case.ljust(22) + f"{rate:14.0f}")
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog="python -m zlapi.bench", description="zlapi micro-benchmarks")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	parser.add_argument("--output", metavar="FILE", help="also write the JSON results to FILE")
+	parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per measurement round")
+	parser.add_argument("--suite", action="append", choices=list(SUITES), help="suite to run (default: all)")
+	args = parser.parse_args(argv)
+
+	report = run(args.min_time, args.suite)
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(report, f, indent=2)
+
+	if args.json:
+		print(json.dumps(report, indent=2))
+	else:
+		_print(report)
+
+
+if __name__ == "__main__":
+	main()
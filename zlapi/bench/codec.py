@@ -0,0 +1,74 @@
+# -*- coding: UTF-8 -*-
+"""Codec and parser hot paths: HTTP and websocket codecs, frame header,
+event objects and message formatting.
+
+Usage::
+
+	python -m zlapi.bench.codec [--json]
+"""
+import sys
+import json
+
+from .. import _util, _parse_message
+from .._objects import MessageObject, EventObject
+from . import measure, fixtures
+
+#: ``params`` sizes (bytes of JSON) of the HTTP codec cases
+PARAM_SIZES = (256, 4096, 65536)
+
+_MARKDOWN = "**Thông báo** họp *nhóm* lúc __15h__ ~~hôm nay~~ tại phòng **A1**"
+_HTML = "<b>Thông báo</b> họp <i>nhóm</i> lúc <u>15h</u> <s>hôm nay</s> tại phòng <b>A1</b>"
+
+
+def _cases():
+	cases = {}
+	for size in PARAM_SIZES:
+		params = fixtures.random_params(size)
+		encoded = _util.zalo_encode(params, fixtures.SECRET_KEY)
+		cases[f"zalo_encode_{size}"] = lambda params=params: _util.zalo_encode(params, fixtures.SECRET_KEY)
+		cases[f"zalo_decode_{size}"] = lambda encoded=encoded: _util.zalo_decode(encoded, fixtures.SECRET_KEY)
+
+	body = fixtures.messages_body(50, group=True)
+	for encrypt_type in (0, 1, 2):
+		envelope = _util.zws_encode(body, fixtures.WS_KEY, encrypt_type)
+		cases[f"zws_decode_type{encrypt_type}"] = lambda envelope=envelope: _util.zws_decode(envelope, fixtures.WS_KEY)
+
+	header = fixtures.frame(501, fixtures.messages_body(1))[:4]
+	cases["getHeader"] = lambda: _util.getHeader(header)
+
+	user = fixtures.messages_body(1)["data"]["msgs"][0]
+	group = fixtures.messages_body(1, group=True)["data"]["groupMsgs"][0]
+	control = fixtures.group_event_body()["data"]["controls"][0]
+	react = fixtures.reaction_body(1)["data"]["reacts"][0]
+	cases["fromDict_501"] = lambda: MessageObject.fromDict(user, None)
+	cases["fromDict_521"] = lambda: MessageObject.fromDict(group, None)
+	cases["fromDict_601"] = lambda: EventObject.fromDict(_util.json_loads(control["content"]["data"]))
+	cases["fromDict_612"] = lambda: MessageObject.fromDict(dict(react, content=_util.json_loads(react["content"])), None)
+
+	cases["Parse_markdown"] = lambda: _parse_message.Parse(_MARKDOWN, parse_mode="Markdown")
+	cases["Parse_html"] = lambda: _parse_message.Parse(_HTML)
+	return cases
+
+
+def run(min_time=0.2):
+	"""Calls per second of each case, with the current JSON backend.
+
+	Returns:
+		dict: ``{case: rate}``
+	"""
+	return {name: measure(func, min_time) for name, func in _cases().items()}
+
+
+def main(argv=None):
+	argv = sys.argv[1:] if argv is None else argv
+	results = run()
+	if "--json" in argv:
+		print(json.dumps(results, indent=2))
+		return
+
+	for case, rate in results.items():
+		print(case.ljust(20) + f"{rate:14.0f}")
+
+
+if __name__ == "__main__":
+	main()
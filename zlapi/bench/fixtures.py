@@ -0,0 +1,125 @@
+# -*- coding: UTF-8 -*-
+"""Realistic payloads for the benchmarks, generated locally."""
+import json
+import base64
+import random
+import struct
+
+from .. import _util
+
+#: Websocket key used by the fixtures
+WS_KEY = base64.b64encode(bytes(range(32))).decode()
+
+#: HTTP secret key used by the fixtures
+SECRET_KEY = base64.b64encode(bytes(range(32, 64))).decode()
+
+_TEXTS = (
+	"Xin chào mọi người!",
+	"ok",
+	"Hôm nay họp lúc 3h chiều nhé, nhớ mang laptop",
+	"😂😂😂",
+	"https://zalo.me/g/abcdef123",
+)
+
+
+def _id(rng):
+	return str(rng.randrange(10 ** 18, 10 ** 19))
+
+
+def message(rng=None, group=False, **fields):
+	"""A cmd 501 (user) or 521 (group) message as sent by Zalo."""
+	rng = rng or random.Random(0)
+	ts = str(1720000000000 + rng.randrange(10 ** 9))
+	msg = {
+		"actionId": str(rng.randrange(10 ** 12)),
+		"msgId": str(rng.randrange(10 ** 12)),
+		"cliMsgId": ts,
+		"msgType": "webchat",
+		"uidFrom": _id(rng),
+		"idTo": _id(rng) if group else "0",
+		"dName": "Người dùng",
+		"ts": ts,
+		"status": 1,
+		"content": rng.choice(_TEXTS),
+		"notify": "1",
+		"ttl": 0,
+		"userId": "0",
+		"uin": "0",
+		"topOut": "0",
+		"topOutTimeOut": "0",
+		"topOutImprTimeOut": "0",
+		"propertyExt": {"color": 0, "size": 0, "type": 0, "subType": 0, "ext": "{\"shouldParseLinkOrContact\":0}"},
+		"paramsExt": {"countUnread": 1, "containType": 0, "platformType": 1},
+		"cmd": 521 if group else 501,
+		"st": 3,
+		"at": 5,
+		"realMsgId": "0",
+	}
+	msg.update(fields)
+	return msg
+
+
+def messages_body(count, group=False, seed=0):
+	"""Decrypted body of a cmd 501/521 frame carrying ``count`` messages."""
+	rng = random.Random(seed)
+	msgs = [message(rng, group) for _ in range(count)]
+	return {"data": {"groupMsgs" if group else "msgs": msgs}, "error_code": 0}
+
+
+def group_event_body(seed=0):
+	"""Decrypted body of a cmd 601 (group event) frame."""
+	rng = random.Random(seed)
+	groupId = _id(rng)
+	data = {
+		"groupId": groupId,
+		"creatorId": _id(rng),
+		"groupName": "Nhóm test",
+		"sourceId": _id(rng),
+		"updateMembers": [{"id": _id(rng), "dName": "Thành viên", "avatar": "", "type": 0} for _ in range(3)],
+		"groupSetting": None,
+		"groupTopic": None,
+		"info": {"group_link": ""},
+		"act": "join",
+	}
+	control = {
+		"content": {
+			"act_type": "group",
+			"act": "join",
+			"data": json.dumps(data),
+		}
+	}
+	return {"data": {"controls": [control]}, "error_code": 0}
+
+
+def reaction_body(count=3, group=False, seed=0):
+	"""Decrypted body of a cmd 612 (reaction) frame."""
+	rng = random.Random(seed)
+	reacts = []
+	for _ in range(count):
+		content = {"rMsg": [{"gMsgID": str(rng.randrange(10 ** 12)), "cMsgID": str(rng.randrange(10 ** 12)), "msgType": 1}], "rIcon": "/-heart", "rType": 0, "source": 6}
+		reacts.append({
+			"actionId": str(rng.randrange(10 ** 12)),
+			"msgId": str(rng.randrange(10 ** 12)),
+			"cliMsgId": str(rng.randrange(10 ** 12)),
+			"msgType": "chat.reaction",
+			"uidFrom": _id(rng),
+			"idTo": _id(rng),
+			"dName": "Người dùng",
+			"content": json.dumps(content),
+			"ts": str(1720000000000 + rng.randrange(10 ** 9)),
+			"ttl": 0,
+		})
+	return {"data": {"reactGroups" if group else "reacts": reacts}, "error_code": 0}
+
+
+def frame(cmd, body, encrypt_type=2, key=WS_KEY, sub_cmd=0):
+	"""A complete binary websocket frame: ``<BHB`` header + JSON envelope."""
+	envelope = _util.zws_encode(body, key, encrypt_type)
+	return struct.pack("<BHB", 1, cmd, sub_cmd) + json.dumps(envelope).encode()
+
+
+def random_params(size, seed=0):
+	"""An HTTP ``params`` dict whose JSON form is about ``size`` bytes."""
+	rng = random.Random(seed)
+	text = base64.b64encode(rng.randbytes(max(1, size * 3 // 4))).decode()
+	return {"message": text[:size], "clientId": _util.now(), "imei": "bench", "ttl": 0}
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+"""Compare the JSON backends on the listener and HTTP codec paths.
+
+Usage::
+
+	python -m zlapi.bench.json_backends [--json]
+"""
+import sys
+import json
+
+from .. import _util
+from . import measure, fixtures
+
+BACKENDS = ("json", "ujson", "orjson")
+
+
+def _decode_frame(data, key=fixtures.WS_KEY):
+	parsed = _util.parseFrame(data)[3]
+	return _util.zws_decode(parsed, key)
+
+
+def run(min_time=0.2):
+	"""Frames (or calls) per second of each installed backend.
+
+	Returns:
+		dict: ``{backend: {case: rate}}``
+	"""
+	cases = {
+		"frame_501_x1": fixtures.frame(501, fixtures.messages_body(1)),
+		"frame_521_x50": fixtures.frame(521, fixtures.messages_body(50, group=True)),
+		"frame_521_x500": fixtures.frame(521, fixtures.messages_body(500, group=True)),
+	}
+	params = fixtures.random_params(2048)
+	encoded = _util.zalo_encode(params, fixtures.SECRET_KEY)
+
+	previous = _util.JSON_BACKEND
+	results = {}
+	try:
+		for backend in BACKENDS:
+			try:
+				_util.set_json_backend(backend)
+			except _util._exception.ZaloUserError:
+				continue
+
+			rates = results[backend] = {}
+			for name, data in cases.items():
+				rates[name] = measure(lambda: _decode_frame(data), min_time)
+
+			rates["zalo_encode_2k"] = measure(lambda: _util.zalo_encode(params, fixtures.SECRET_KEY), min_time)
+			rates["zalo_decode_2k"] = measure(lambda: _util.zalo_decode(encoded, fixtures.SECRET_KEY), min_time)
+	finally:
+		_util.set_json_backend(previous)
+
+	return results
+
+
+def main(argv=None):
+	argv = sys.argv[1:] if argv is None else argv
+	results = run()
+	if "--json" in argv:
+		print(json.dumps(results, indent=2))
+		return
+
+	cases = list(next(iter(results.values())))
+	print("case".ljust(18) + "".join(backend.rjust(12) for backend in results))
+	for case in cases:
+		print(case.ljust(18) + "".join(f"{results[backend][case]:12.0f}" for backend in results))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,318 @@
+# -*- coding: UTF-8 -*-
+"""In-process mock of the Zalo web API, for offline benchmarks and load tests.
+
+Usage::
+
+	from zlapi import ZaloAPI
+	from zlapi.mock import MockZaloServer
+
+	with MockZaloServer(latency=0.02) as server:
+		bot = ZaloAPI("<phone>", "<password>", imei="mock", session_cookies={"zpw_sek": "mock"}, transport=server.transport())
+		bot.sendMessage(Message(text="Hi"), server.uid, ThreadType.USER)
+"""
+import os
+import json
+import time
+import base64
+import inspect
+import struct
+import asyncio
+import threading
+import itertools
+import collections
+
+from aiohttp import web
+
+from . import _util
+from ._transport import RequestsTransport, AiohttpTransport
+
+
+class MockZaloServer(object):
+	"""Local HTTP + websocket server speaking the Zalo envelope formats.
+
+	HTTP responses are encrypted with ``zalo_encode`` using :attr:`secret_key`, and
+	websocket frames are encrypted like the real ``zpw_ws`` frames (see ``zws_decode``).
+	Endpoints are dispatched on the url path only, so any Zalo host can be mapped to
+	the server with ``Transport(base_url=server.url)``.
+
+	Args:
+		host (str): Interface to listen on
+		port (int): Port to listen on (``0`` picks a free port)
+		latency (float): Seconds to wait before answering each HTTP request
+		uid (str): User ID of the logged in mock account
+		secret_key (str): Base64 AES key for HTTP payloads (random if not set)
+		ws_key (str): Base64 AES key for websocket frames (random if not set)
+	"""
+
+	def __init__(self, host="127.0.0.1", port=0, latency=0, uid="1000000000000000001", secret_key=None, ws_key=None):
+		self.host = host
+		self.port = port
+		self.latency = latency
+		self.uid = str(uid)
+		self.phone = "84000000000"
+		self.secret_key = secret_key or base64.b64encode(os.urandom(32)).decode()
+		self.ws_key = ws_key or base64.b64encode(os.urandom(32)).decode()
+
+		self.friends = []
+		self.groups = {}
+		self.user_msgs = collections.deque(maxlen=200)
+		self.group_msgs = collections.defaultdict(lambda: collections.deque(maxlen=200))
+		self.stats = collections.Counter()
+		#: Whether websocket connections are accepted, ``False`` answers them with HTTP 503
+		self.accepting = True
+
+		self._routes = {}
+		self._sockets = set()
+		self._msg_ids = itertools.count(int(time.time() * 1000) * 1000)
+		self._loop = None
+		self._runner = None
+		self._thread = None
+		self._started = threading.Event()
+
+		self.route("/api/login/getLoginInfo")(self._login_info)
+		self.route("/api/social/profile/me-v2")(self._me)
+		self.route("/api/social/friend/getprofiles/v2")(self._profiles)
+		self.route("/api/social/friend/getfriends")(self._friends)
+		self.route("/api/group/getmg-v2")(self._group_info)
+		self.route("/api/group/getlg/v4")(self._all_groups)
+		self.route("/api/preloadconvers/get-last-msgs")(self._last_msgs)
+		self.route("/api/cm/getrecentv2")(self._recent_group)
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc_info):
+		self.stop()
+
+	@property
+	def url(self):
+		return f"http://{self.host}:{self.port}"
+
+	@property
+	def ws_url(self):
+		return f"ws://{self.host}:{self.port}/ws"
+
+	def transport(self, **kwargs):
+		"""Return a sync transport sending every request to this server."""
+		return RequestsTransport(base_url=self.url, **kwargs)
+
+	def async_transport(self, **kwargs):
+		"""Return an async transport sending every request to this server."""
+		return AiohttpTransport(base_url=self.url, **kwargs)
+
+	def route(self, path):
+		"""Register a handler for an API path.
+
+		The handler (a function or coroutine function) is called with the decoded
+		``params`` of the request and returns the ``data`` to encrypt into the response.
+		Raising ``MockError`` answers with an error code instead.
+		"""
+		def decorator(handler):
+			self._routes[path] = handler
+			return handler
+
+		return decorator
+
+	def start(self):
+		"""Start serving in a background thread."""
+		self._thread = threading.Thread(target=self._serve, name="MockZaloServer", daemon=True)
+		self._thread.start()
+		self._started.wait()
+		return self
+
+	def stop(self):
+		"""Close the websocket connections and stop serving."""
+		if self._loop is None:
+			return
+
+		asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+		self._loop.call_soon_threadsafe(self._loop.stop)
+		self._thread.join()
+		self._loop = None
+
+	def push(self, cmd, data, sub_cmd=0, encrypt_type=2):
+		"""Send an encrypted frame to every connected websocket."""
+		frame = self.frame(cmd, _util.zws_encode(data, self.ws_key, encrypt_type), sub_cmd)
+		return asyncio.run_coroutine_threadsafe(self._broadcast(frame), self._loop).result()
+
+	def disconnect(self, code=1011):
+		"""Close every connected websocket with ``code`` (1011 is an abnormal closure).
+
+		Returns:
+			int: Number of closed connections
+		"""
+		return asyncio.run_coroutine_threadsafe(self._disconnect(code), self._loop).result()
+
+	def deliver(self, message, group=False):
+		"""Store a message and push it to the listeners (cmd 501 or 521).
+
+		Missing ``msgId``, ``cliMsgId`` and ``ts`` fields are filled in.
+
+		Returns:
+			dict: The delivered message
+		"""
+		message = dict(message)
+		message.setdefault("msgId", str(next(self._msg_ids)))
+		message.setdefault("cliMsgId", str(_util.now()))
+		message.setdefault("ts", str(_util.now()))
+		message.setdefault("msgType", "webchat")
+		if group:
+			self.group_msgs[str(message["idTo"])].append(message)
+			self.push(521, {"data": {"groupMsgs": [message]}})
+		else:
+			self.user_msgs.append(message)
+			self.push(501, {"data": {"msgs": [message]}})
+
+		return message
+
+	@staticmethod
+	def frame(cmd, body, sub_cmd=0, version=1):
+		return struct.pack("<BHB", version, cmd, sub_cmd) + json.dumps(body).encode()
+
+	def _serve(self):
+		self._loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(self._loop)
+
+		app = web.Application()
+		app.router.add_get("/ws", self._websocket)
+		app.router.add_route("*", "/{path:.*}", self._http)
+		self._runner = web.AppRunner(app, access_log=None)
+		self._loop.run_until_complete(self._runner.setup())
+		site = web.TCPSite(self._runner, self.host, self.port)
+		self._loop.run_until_complete(site.start())
+		self.port = self._runner.addresses[0][1]
+
+		self._started.set()
+		self._loop.run_forever()
+		self._loop.close()
+
+	async def _shutdown(self):
+		for ws in list(self._sockets):
+			await ws.close()
+
+		await self._runner.cleanup()
+
+	async def _disconnect(self, code):
+		sockets = list(self._sockets)
+		for ws in sockets:
+			await ws.close(code=code)
+
+		return len(sockets)
+
+	async def _broadcast(self, frame):
+		for ws in list(self._sockets):
+			await ws.send_bytes(frame)
+
+		return len(self._sockets)
+
+	async def _websocket(self, request):
+		if not self.accepting:
+			raise web.HTTPServiceUnavailable()
+
+		ws = web.WebSocketResponse()
+		await ws.prepare(request)
+		self._sockets.add(ws)
+		self.stats["ws_connections"] += 1
+		try:
+			await ws.send_bytes(self.frame(1, {"key": self.ws_key}, 1))
+			async for _ in ws:
+				self.stats["ws_frames_received"] += 1
+		finally:
+			self._sockets.discard(ws)
+
+		return ws
+
+	async def _http(self, request):
+		path = "/" + request.match_info["path"]
+		self.stats[path] += 1
+		if self.latency:
+			await asyncio.sleep(self.latency)
+
+		handler = self._routes.get(path, self._default)
+		form = await request.post() if request.method == "POST" else {}
+		encoded = form.get("params") if isinstance(form.get("params"), str) else request.query.get("params")
+		params = {}
+		if encoded and path != "/api/login/getLoginInfo":
+			params = _util.zalo_decode(encoded, self.secret_key)
+			params = params if isinstance(params, dict) else {}
+
+		try:
+			data = handler(params)
+			if inspect.isawaitable(data):
+				data = await data
+		except MockError as e:
+			return web.json_response({"error_code": e.error_code, "error_message": str(e)}, status=e.status)
+
+		if path == "/api/login/getLoginInfo":
+			return web.json_response({"error_code": 0, "error_message": "Successful.", "data": data})
+
+		body = {"error_code": 0, "error_message": "", "data": data}
+		return web.json_response({
+			"error_code": 0,
+			"error_message": "Successful.",
+			"data": _util.zalo_encode(body, self.secret_key)
+		})
+
+	def _default(self, params):
+		return {"msgId": str(next(self._msg_ids))}
+
+	def _login_info(self, params):
+		return {
+			"uid": self.uid,
+			"send2me_id": self.uid,
+			"phone_number": self.phone,
+			"zpw_enk": self.secret_key,
+			"zpw_ws": [self.ws_url]
+		}
+
+	def _me(self, params):
+		return {"profile": {"userId": self.uid, "displayName": "Mock Account", "phoneNumber": self.phone}}
+
+	def _profiles(self, params):
+		profiles = {}
+		for entry in params.get("friend_pversion_map", []):
+			userId = str(entry).split("_")[0]
+			profiles[userId] = {"userId": userId, "displayName": f"User {userId}", "zaloName": f"User {userId}"}
+
+		return {"changed_profiles": profiles}
+
+	def _friends(self, params):
+		page = int(params.get("page", 1))
+		count = int(params.get("count", 20000))
+		return self.friends[(page - 1) * count:page * count]
+
+	def _group_info(self, params):
+		gridVerMap = params.get("gridVerMap", "{}")
+		gridVerMap = json.loads(gridVerMap) if isinstance(gridVerMap, str) else gridVerMap
+		infos = {}
+		for groupId in gridVerMap:
+			infos[groupId] = self.groups.get(groupId) or {"groupId": groupId, "name": f"Group {groupId}", "currentMems": [], "memVerList": []}
+
+		return {"gridInfoMap": infos, "unchangedsGroup": [], "removedsGroup": []}
+
+	def _all_groups(self, params):
+		return {"gridVerMap": {groupId: "0" for groupId in self.groups}}
+
+	def _last_msgs(self, params):
+		groupMsgs = [message for messages in self.group_msgs.values() for message in messages]
+		return {"msgs": list(self.user_msgs), "groupMsgs": groupMsgs}
+
+	def _recent_group(self, params):
+		messages = list(self.group_msgs.get(str(params.get("groupId")), []))
+		before = int(params.get("globalMsgId") or 0)
+		if before:
+			messages = [message for message in messages if int(message.get("msgId") or 0) < before]
+
+		return json.dumps({"groupMsgs": messages[-int(params.get("count", 50)):]})
+
+
+class MockError(Exception):
+	"""Raised by a mock route handler to answer with a Zalo error code.
+
+	``status`` sets the HTTP status of the answer (e.g. ``503`` for a transient server error).
+	"""
+
+	def __init__(self, error_code, message="Mock error", status=200):
+		self.error_code = error_code
+		self.status = status
+		super().__init__(message)
@@ -9,12 +9,21 @@ from ._exception import (
 	ZaloLoginError,
 	LoginMethodNotSupport,
 	EncodePayloadError,
-	DecodePayloadError
+	DecodePayloadError,
+	ZaloServerError,
+	ZaloRateLimitError
 )
 from ._threads import ThreadType
 from ._aevents import GroupEventType, EventType
 from ._message import MessageReaction, MessageStyle, MultiMsgStyle, Message, Mention, MultiMention
-from ._objects import User, Group, MessageObject, ContextObject, EventObject
+from ._objects import User, Group, MessageObject, ContextObject, EventObject, CompactMessageObject, CompactContextObject
+from ._directory import Directory
+from ._transport import Transport, RequestsTransport, AsyncTransport, AiohttpTransport
+from ._ratelimit import RateLimiter
+from ._retry import RetryPolicy
+from ._events import EventQueue
+from ._supervisor import ReconnectPolicy
+from ._backfill import Backfill
 
 from .logging import Logging
 
@@ -1,9 +1,10 @@
 # -*- coding: UTF-8 -*-
 
+import queue
 import websocket
 
 from ..Async import _state
-from .. import _util
+from .. import _util, _flight, _ratelimit, _retry, _outbox, _offload, _executor
 from ..models import *
 from .._package import *
 from ..logging import Logging
@@ -15,7 +16,7 @@ logger = Logging(theme="catppuccin-mocha", log_text_color="black")
 
 
 class ZaloAPI(object):
-	def __init__(self, phone=None, password=None, imei=None, cookies=None, user_agent=None, auto_login=True, prefix=""):
+	def __init__(self, phone=None, password=None, imei=None, cookies=None, user_agent=None, auto_login=True, prefix="", connector_options=None, transport=None, coalesce=False, rate_limit=None, retry=None, outbox_workers=8, prewarm=False, offload_frames=None, handler_workers=16):
 		"""Initialize and log in the client.
 		
 		Args:
@@ -26,6 +27,20 @@ class ZaloAPI(object):
 			auto_login (bool): Automatically log in when initializing ZaloAPI (Default: True)
 			user_agent (str): Custom user agent to use when sending requests. If `None`, user agent will be chosen from a premade list
 			cookies (dict): Cookies from a previous session (Required if logging in with cookies)
+			connector_options (dict): Options for the pooled HTTP connector (``limit``, ``limit_per_host``, ``keepalive_timeout``, ``ttl_dns_cache``)
+			transport (AsyncTransport): Custom HTTP transport (e.g. ``AiohttpTransport(base_url=...)`` pointing at ``zlapi.mock.MockZaloServer``)
+			coalesce (bool): Collapse identical concurrent fetch/get requests into one network call (Default: False).
+				All waiting callers receive the same result object
+			rate_limit (bool | RateLimiter): Pace send/admin requests with an adaptive token bucket per endpoint family
+				and thread (Default: None). Pass ``True`` for the defaults or a configured ``RateLimiter``
+			retry (bool | RetryPolicy): Retry idempotent reads on transient errors with jittered exponential backoff,
+				and optionally hedge them (Default: None). Pass ``True`` for the defaults or a configured ``RetryPolicy``
+			outbox_workers (int): Number of sends the ordered ``outbox`` runs at the same time (Default: 8)
+			prewarm (bool): Resolve the Zalo hosts and open keep-alive connections to them right after login (Default: False)
+			offload_frames (bool | int): Decrypt and decompress websocket frames of at least this many bytes in worker processes,
+				keeping the receive loop responsive (Default: None). ``True`` offloads frames from 256 KiB
+			handler_workers (int): Number of threads running ``thread=True`` handlers. Handlers of the same conversation
+				run one at a time in arrival order, different conversations in parallel (Default: 16)
 			
 		Raises:
 			ZaloLoginError: On failed login
@@ -40,7 +55,16 @@ class ZaloAPI(object):
 		self.register_messages = []
 		
 		self._condition = threading.Event()
-		self._state = _state.State()
+		self._state = _state.State(transport, **(connector_options or {}))
+		self._flight = _flight.SingleFlight() if coalesce else None
+		self._limiter = _ratelimit.RateLimiter() if rate_limit is True else rate_limit or None
+		self._retry = _retry.RetryPolicy() if retry is True else retry or None
+		self.outbox = _outbox.AsyncOutbox(self, outbox_workers)
+		self._prewarm = prewarm
+		self._offload = _offload.threshold(offload_frames)
+		self._handlers = _executor.KeyedExecutor(handler_workers, name="zlapi-handler")
+		self._handler_loop = threading.local()
+		self._handler_loops = []
 		self._listening = False
 		
 		if auto_login:
@@ -114,14 +138,35 @@ class ZaloAPI(object):
 		setattr(self, func.__name__, func)
 	
 	
+	def _run_async(self, func, *args, **kwargs):
+		loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(loop)
+		loop.run_until_complete(func(*args, **kwargs))
+		loop.close()
+	
+	
 	def run_in_thread(self, func, *args, **kwargs):
-		def run_async():
-			loop = asyncio.new_event_loop()
+		pool.submit(self._run_async, func, *args, **kwargs)
+	
+	
+	def _run_in_handler_loop(self, func, *args, **kwargs):
+		"""Run ``func`` on the event loop of the current handler thread, created on its first call."""
+		loop = getattr(self._handler_loop, "loop", None)
+		if loop is None:
+			loop = self._handler_loop.loop = asyncio.new_event_loop()
 			asyncio.set_event_loop(loop)
-			loop.run_until_complete(func(*args, **kwargs))
-			loop.close()
+			self._handler_loops.append(loop)
+		
+		loop.run_until_complete(func(*args, **kwargs))
+	
+	
+	def run_in_lane(self, key, func, *args, **kwargs):
+		"""Like `run_in_thread`, but after the pending calls queued with the same ``key`` (e.g. a ``thread_id``).
 		
-		pool.submit(run_async)
+		Calls of one key run one at a time in the order they were queued, different keys in parallel
+		on the ``handler_workers`` threads, each running its calls on one event loop kept for the life of the thread.
+		"""
+		self._handlers.submit(key, self._run_in_handler_loop, func, *args, **kwargs)
 	
 	
 	def load_loop(self):
@@ -177,6 +222,42 @@ class ZaloAPI(object):
 	async def _post(self, *args, **kwargs):
 		return await self._state._post(*args, **kwargs)
 	
+	async def prewarm_connections(self, families=None, connections=1):
+		"""Resolve the Zalo hosts and open keep-alive connections to them in parallel.
+		
+		Args:
+			families (list): Host families to warm, e.g. ``["chat", "group"]`` (Default: all)
+			connections (int): Connections to open per host (Default: 1)
+			
+		Returns:
+			dict: ``{url: error}`` with ``None`` for the hosts that were warmed
+		"""
+		return await self._state.prewarm(families, connections)
+	
+	def get_handler_stats(self):
+		"""Retrieve the counters of the executor running ``thread=True`` handlers.
+		
+		Returns:
+			dict: Queue depth (``queued``, ``max_depth``), ``running`` handlers, conversation ``lanes``
+			and handler latency (``wait_avg``, ``wait_max``, ``run_avg``, ``run_max``, in seconds)
+		"""
+		return self._handlers.stats()
+	
+	async def close(self):
+		"""Finish the queued handlers and ``outbox`` sends and close the HTTP transport used to send requests."""
+		self._handlers.shutdown()
+		while self._handler_loops:
+			self._handler_loops.pop().close()
+		
+		await self.outbox.close()
+		await self._state.close()
+	
+	async def __aenter__(self):
+		return self
+	
+	async def __aexit__(self, *exc_info):
+		await self.close()
+	
 	"""
 	END INTERNAL REQUEST METHODS
 	"""
@@ -186,10 +267,10 @@ class ZaloAPI(object):
 	"""
 	
 	def _encode(self, params):
-		return _util.zalo_encode(params, self._state._config.get("secret_key"))
+		return self._state.get_codec().encode(_retry.mark_attempt(params))
 		
 	def _decode(self, params):
-		return _util.zalo_decode(params, self._state._config.get("secret_key")) 
+		return self._state.get_codec().decode(params)
 		
 	"""
 	END EXTENSIONS METHODS
@@ -295,6 +376,9 @@ class ZaloAPI(object):
 		except:
 			self._imei = None
 		
+		if self._prewarm:
+			await self.prewarm_connections()
+		
 		await self.on_logged_in(self._state._config.get("phone_number"))
 		
 	"""
@@ -365,7 +449,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -383,6 +467,8 @@ class ZaloAPI(object):
 	FETCH METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetch_account_info(self):
 		"""fetch account information of the client 
 		
@@ -414,7 +500,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -424,6 +510,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetch_phone_number(self, phoneNumber, language="vi"):
 		"""Fetch user info by Phone Number.
 		
@@ -465,7 +553,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -475,6 +563,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetch_user_info(self, userId):
 		"""Fetch user info by ID.
 		
@@ -524,7 +614,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -534,11 +624,14 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	async def fetch_group_info(self, groupId):
+	@_flight.coalesce
+	@_retry.idempotent
+	async def fetch_group_info(self, groupId, columnar=False):
 		"""Fetch group info by ID.
 		
 		Args:
 			groupId (int | str | dict): Group(s) ID to get info
+			columnar (bool): Return the members in ``currentMems`` as a ``Directory`` (Default: False)
 		
 		Returns:
 			object: `Group` group info
@@ -550,7 +643,8 @@ class ZaloAPI(object):
 		
 		params = {
 			"zpw_ver": 647,
-			"zpw_type": 30
+			"zpw_type": 30,
+			"nretry": 0
 		}
 		
 		payload = {
@@ -565,7 +659,7 @@ class ZaloAPI(object):
 		else:
 			payload["params"]["gridVerMap"][str(groupId)] = 0
 			
-		payload["params"]["gridVerMap"] = json.dumps(payload["params"]["gridVerMap"])
+		payload["params"]["gridVerMap"] = _util.json_dumps(payload["params"]["gridVerMap"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post("https://tt-group-wpa.chat.zalo.me/api/group/getmg-v2", params=params, data=payload)
@@ -578,32 +672,28 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
+			if columnar:
+				for info in (results.get("gridInfoMap") or {}).values():
+					if isinstance(info, dict) and isinstance(info.get("currentMems"), list):
+						info["currentMems"] = Directory(info["currentMems"], key="id")
+			
 			return Group.fromDict(results, None)
 		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
-	async def fetch_all_friends(self):
-		"""Fetch all users the client is currently chatting with (only friends).
-		
-		Returns:
-			object: `User` all friend IDs
-			any: If response is not list friends
-			
-		Raises:
-			ZaloAPIException: If request failed
-		"""
-		
+	@_retry.idempotent
+	async def _fetch_friends_page(self, page, count):
 		params = {
 			"params": self._encode({
 				"incInvalid": 0,
-				"page": 1,
-				"count": 20000,
+				"page": page,
+				"count": count,
 				"avatar_size": 120,
 				"actiontime": 0
 			}),
@@ -615,18 +705,72 @@ class ZaloAPI(object):
 		data = await self._get("https://profile-wpa.chat.zalo.me/api/social/friend/getfriends", params=params)
 		results = data.get("data") if not data.get("error_code") else None
 		if results:
-			results = self._decode(results)
-			datas = []
-			if results.get("data"):
-				for data in results.get("data"):
-					datas.append(User(**data))
-			
-			return datas
-					
+			return self._decode(results).get("data") or []
+		
 		error_code = data.get("error_code")
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
+	
+	@_flight.coalesce
+	async def fetch_all_friends(self, columnar=False):
+		"""Fetch all users the client is currently chatting with (only friends).
+		
+		Args:
+			columnar (bool): Return a ``Directory`` instead of a list of ``User`` (Default: False)
 		
+		Returns:
+			object: `User` all friend IDs
+			any: If response is not list friends
+			
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		friends = await self._fetch_friends_page(1, 20000)
+		if columnar:
+			return Directory(friends)
+		
+		return [User(**data) for data in friends]
+	
+	async def iter_friends(self, page_size=500, read_ahead=True):
+		"""Iterate over all friends, one page at a time.
+		
+		Unlike ``fetch_all_friends``, friends are yielded as soon as their page is
+		decoded and only about two pages are held in memory.
+		
+		Args:
+			page_size (int): Friends requested per page (Default: 500)
+			read_ahead (bool): Fetch the next page while the current one is consumed (Default: True)
+		
+		Yields:
+			User: One friend at a time
+		
+		Raises:
+			ZaloAPIException: If request failed
+		"""
+		page = 1
+		ahead = None
+		friends = await self._fetch_friends_page(page, page_size)
+		try:
+			while friends:
+				if read_ahead and len(friends) >= page_size:
+					ahead = asyncio.ensure_future(self._fetch_friends_page(page + 1, page_size))
+				
+				for data in friends:
+					yield User(**data)
+				
+				if len(friends) < page_size:
+					return
+				
+				page += 1
+				friends = await ahead if ahead else await self._fetch_friends_page(page, page_size)
+				ahead = None
+		
+		finally:
+			if ahead and not ahead.done():
+				ahead.cancel()
+	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def fetch_all_groups(self):
 		"""Fetch all group IDs are joining and chatting.
 		
@@ -653,7 +797,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -671,6 +815,8 @@ class ZaloAPI(object):
 	GET METHODS
 	"""
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def get_last_msgs(self):
 		"""Get last message the client"s friends/group chat room.
 			
@@ -685,9 +831,10 @@ class ZaloAPI(object):
 			"zpw_ver": "647",
 			"zpw_type": "30",
 			"params": self._encode({
-				"threadIdLocalMsgId": json.dumps({}),
+				"threadIdLocalMsgId": _util.json_dumps({}),
 				"imei": self._imei
-			})
+			}),
+			"nretry": 0
 		}
 		
 		data = await self._get("https://tt-convers-wpa.chat.zalo.me/api/preloadconvers/get-last-msgs", params=params)
@@ -700,7 +847,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -710,6 +857,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def get_recent_group(self, groupId):
 		"""Get recent messages in group by ID.
 			
@@ -741,13 +890,13 @@ class ZaloAPI(object):
 		results = data.get("data") if not data.get("error_code") else None
 		if results:
 			results = self._decode(results)
-			results = json.loads(results.get("data")) if results.get("error_code") == 0 else results
+			results = _util.json_loads(results.get("data")) if results.get("error_code") == 0 else results
 			if results == None:
 				results = {"error_code": 1337, "error_message": "Data is None"}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -757,6 +906,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def _getGroupBoardList(self, board_type, page, count, last_id, last_type, groupId):
 		params = {
 			"params": self._encode({
@@ -782,7 +933,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -910,12 +1061,12 @@ class ZaloAPI(object):
 		
 		payload = {
 			"params": self._encode({
-				"profile": json.dumps({
+				"profile": _util.json_dumps({
 					"name": name,
 					"dob": dob,
 					"gender": int(gender)
 				}),
-				"biz": json.dumps(biz),
+				"biz": _util.json_dumps(biz),
 				"language": language
 			})
 		}
@@ -930,7 +1081,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -971,7 +1122,7 @@ class ZaloAPI(object):
 				"avatarSize": 120,
 				"clientId": str(self.user_id) + _util.formatTime("%H:%M %d/%m/%Y"),
 				"language": language,
-				"metaData": json.dumps({
+				"metaData": _util.json_dumps({
 					"origin": {
 						"width": width,
 						"height": height
@@ -995,7 +1146,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1013,6 +1164,7 @@ class ZaloAPI(object):
 	USER ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def send_friend_request(self, userId, msg, language="vi"):
 		"""Send friend request to a user by ID.
 			
@@ -1040,7 +1192,7 @@ class ZaloAPI(object):
 				"reqsrc": 30,
 				"imei": self._imei,
 				"language": language,
-				"srcParams": json.dumps({
+				"srcParams": _util.json_dumps({
 					"uidTo": str(userId)
 				})
 			})
@@ -1056,7 +1208,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1066,6 +1218,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def accept_friend_request(self, userId, language="vi"):
 		"""Accept friend request from user by ID.
 			
@@ -1102,7 +1255,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1112,6 +1265,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def block_view_feed(self, userId, isBlockFeed):
 		"""Block/Unblock friend view feed by ID.
 			
@@ -1149,7 +1303,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1159,6 +1313,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def block_user(self, userId):
 		"""Block user by ID.
 			
@@ -1194,7 +1349,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1204,6 +1359,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def unblock_user(self, userId):
 		"""Unblock user by ID.
 			
@@ -1239,7 +1395,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1257,6 +1413,7 @@ class ZaloAPI(object):
 	GROUP ACTION METHODS
 	"""
 	
+	@_ratelimit.limited("group_admin")
 	async def create_group(self, name=None, description=None, members=[], nameChanged=1, createLink=1):
 		"""Create a new group.
 			
@@ -1314,7 +1471,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1324,6 +1481,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def change_group_avatar(self, filePath, groupId):
 		"""Upload/Change group avatar by ID.
 		
@@ -1371,7 +1529,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1381,6 +1539,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def change_group_name(self, groupName, groupId):
 		"""Set/Change group name by ID.
 		
@@ -1421,7 +1580,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1434,6 +1593,7 @@ class ZaloAPI(object):
 	async def changeGroupDesc(self, groupDesc, groupId):
 		"""Not Available Yet"""
 	
+	@_ratelimit.limited("group_admin")
 	async def change_group_setting(self, groupId, defaultMode="default", **kwargs):
 		"""Update group settings by ID.
 		
@@ -1542,7 +1702,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1552,6 +1712,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def change_group_owner(self, newAdminId, groupId):
 		"""Change group owner (yellow key) by ID.
 		
@@ -1590,7 +1751,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1600,6 +1761,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def add_users_to_group(self, user_ids, groupId):
 		"""Add friends/users to a group.
 			
@@ -1650,7 +1812,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1660,6 +1822,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def kick_users_in_group(self, members, groupId):
 		"""Kickout members in group by ID.
 		
@@ -1703,7 +1866,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1713,6 +1876,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def block_users_in_group(self, members, groupId):
 		"""blocked members in group by ID.
 		
@@ -1753,7 +1917,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1763,6 +1927,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def unblock_users_in_group(self, members, groupId):
 		"""unblock members in group by ID.
 		
@@ -1803,7 +1968,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1813,6 +1978,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def add_group_admins(self, members, groupId):
 		"""Add admins to the group (white key).
 		
@@ -1855,7 +2021,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1865,6 +2031,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("group_admin")
 	async def remove_group_admins(self, members, groupId):
 		"""Remove admins in the group (white key) by ID.
 		
@@ -1907,7 +2074,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -1917,6 +2084,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def pin_group_msg(self, pinMsg, groupId):
 		"""Pin message in group by ID.
 		
@@ -1953,7 +2121,7 @@ class ZaloAPI(object):
 		
 		if pinMsg.msgType == "webchat":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -1964,7 +2132,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.voice":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -1974,7 +2142,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.photo", "chat.video.msg"]:
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -1986,12 +2154,12 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.sticker":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
 				"senderName": pinMsg.dName,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"id": pinMsg.content.id,
 					"catId": pinMsg.content.catId,
 					"type": pinMsg.content.type
@@ -2001,8 +2169,8 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType in ["chat.recommended", "chat.link"]:
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -2016,9 +2184,9 @@ class ZaloAPI(object):
 				"artist": extra.get("artist", ""),
 				"stream_icon": extra.get("stream_icon", ""),
 				"type": 2,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"action": pinMsg.content.action,
-					"params": json.dumps({
+					"params": _util.json_dumps({
 						"mediaTitle": extra.get("mediaTitle", ""),
 						"artist": extra.get("artist", ""),
 						"src": extra.get("src", ""),
@@ -2032,7 +2200,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.location.new":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -2043,14 +2211,14 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "share.file":
 			
-			extra = json.loads(pinMsg.content.params)
-			payload["params"]["params"] = json.dumps({
+			extra = _util.json_loads(pinMsg.content.params)
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
 				"senderName": pinMsg.dName,
 				"title": pinMsg.content.title,
-				"extra": json.dumps({
+				"extra": _util.json_dumps({
 					"fileSize": "7295",
 					"checksum": extra.get("checksum", ""),
 					"fileExt": extra.get("fileExt", ""),
@@ -2065,7 +2233,7 @@ class ZaloAPI(object):
 		
 		elif pinMsg.msgType == "chat.gif":
 			
-			payload["params"]["params"] = json.dumps({
+			payload["params"]["params"] = _util.json_dumps({
 				"client_msg_id": pinMsg.cliMsgId,
 				"global_msg_id": pinMsg.msgId,
 				"senderUid": str(int(pinMsg.uidFrom) or self.user_id),
@@ -2085,7 +2253,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2095,6 +2263,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def unpin_group_msg(self, pinId, pinTime, groupId):
 		"""Unpin message in group by ID.
 		
@@ -2134,7 +2303,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 				
@@ -2144,6 +2313,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def delete_group_msg(self, msgId, ownerId, clientMsgId, groupId):
 		"""Delete message in group by ID.
 		
@@ -2189,7 +2359,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2199,6 +2369,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def view_group_pending(self, groupId):
 		"""See list of people pending approval in group by ID.
 		
@@ -2231,7 +2403,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2241,6 +2413,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def handle_group_pending(self, members, groupId, isApprove=True):
 		"""Approve/Deny pending users to the group from the group"s approval.
 		
@@ -2283,7 +2456,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 				
@@ -2293,6 +2466,8 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_flight.coalesce
+	@_retry.idempotent
 	async def view_poll_detail(self, pollId):
 		"""View poll data by ID.
 		
@@ -2325,7 +2500,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2335,6 +2510,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def create_poll(
 		self,
 		question,
@@ -2408,7 +2584,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2418,6 +2594,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def lock_poll(self, pollId):
 		"""Lock/end poll in group by ID.
 		
@@ -2455,7 +2632,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2465,6 +2642,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("group_admin")
 	async def disperse_group(self, groupId):
 		"""Disperse group by ID.
 		
@@ -2502,7 +2680,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2541,6 +2719,7 @@ class ZaloAPI(object):
 		else:
 			return await self.send_message(message, thread_id, thread_type, mark_message, ttl)
 	
+	@_ratelimit.limited("message")
 	async def send_message(self, message, thread_id, thread_type, mark_message=None, ttl=0):
 		"""Send message to a thread (user/group).
 			
@@ -2601,7 +2780,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2615,6 +2794,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def reply_to(self, replyMsg, message, thread_id, thread_type, ttl=0):
 		"""Reply message in group by ID.
 			
@@ -2647,7 +2827,7 @@ class ZaloAPI(object):
 				"qmsgType": _util.getClientMessageType(replyMsg.msgType),
 				"qmsg": replyMsg.content,
 				"qmsgTs": replyMsg.ts,
-				"qmsgAttach": json.dumps({}),
+				"qmsgAttach": _util.json_dumps({}),
 				"qmsgTTL": 0,
 				"ttl": ttl
 			}
@@ -2655,7 +2835,7 @@ class ZaloAPI(object):
 		
 		if not isinstance(replyMsg.content, str):
 			payload["params"]["qmsg"] = ""
-			payload["params"]["qmsgAttach"] = json.dumps(replyMsg.content.toDict())
+			payload["params"]["qmsgAttach"] = _util.json_dumps(replyMsg.content.toDict())
 		
 		if message.style:
 			payload["params"]["textProperties"] = message.style
@@ -2685,7 +2865,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2699,6 +2879,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_mention_message(self, message, groupId, ttl=0):
 		"""Send message to a group with mention by ID.
 			
@@ -2746,7 +2927,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2756,6 +2937,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def undo_message(self, msgId, cliMsgId, thread_id, thread_type):
 		"""Undo message from the client by ID.
 			
@@ -2809,7 +2991,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2823,6 +3005,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	async def send_reaction(self, messageObject, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2847,7 +3030,7 @@ class ZaloAPI(object):
 		payload = {
 			"params": {
 				"react_list": [{
-					"message": json.dumps({
+					"message": _util.json_dumps({
 						"rMsg": [{
 							"gMsgID": int(messageObject.msgId),
 							"cMsgID": int(messageObject.cliMsgId),
@@ -2884,7 +3067,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2898,6 +3081,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("reaction")
 	async def send_multi_reaction(self, reactionObj, reactionIcon, thread_id, thread_type, reactionType=75):
 		"""Reaction message by ID.
 			
@@ -2950,7 +3134,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["react_list"][0]["message"] = json.dumps(payload["params"]["react_list"][0]["message"])
+		payload["params"]["react_list"][0]["message"] = _util.json_dumps(payload["params"]["react_list"][0]["message"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -2963,13 +3147,13 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -2983,6 +3167,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_remote_file(self, fileUrl, thread_id, thread_type, fileName="default", fileSize=None, extension="vrxx", ttl=0):
 		"""Send File to a User/Group with url.
 			
@@ -3064,7 +3249,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3078,6 +3263,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_remote_video(self, videoUrl, thumbnailUrl, duration, thread_id, thread_type, width=1280, height=720, message=None, ttl=0):
 		"""Send (Forward) video to a User/Group with url.
 		
@@ -3125,7 +3311,7 @@ class ZaloAPI(object):
 				"ttl": ttl,
 				"zsource": 704,
 				"msgType": 5,
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"videoUrl": str(videoUrl),
 					"thumbUrl": str(thumbnailUrl),
 					"duration": int(duration),
@@ -3174,7 +3360,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3188,6 +3374,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_remote_voice(self, voiceUrl, thread_id, thread_type, fileSize=None, ttl=0):
 		"""Send voice by url.
 			
@@ -3222,7 +3409,7 @@ class ZaloAPI(object):
 				"zsource": -1,
 				"msgType": 3,
 				"clientId": str(_util.now()),
-				"msgInfo": json.dumps({
+				"msgInfo": _util.json_dumps({
 					"voiceUrl": str(voiceUrl),
 					"m4aUrl": str(voiceUrl),
 					"fileSize": int(fileSize)
@@ -3251,7 +3438,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3265,6 +3452,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_remote_image(self, imageUrl, thread_id, thread_type, width=2560, height=2560, message=None, ttl=0, custom_payload=None):
 		"""Send Image to a User/Group with url.
 			
@@ -3325,7 +3513,7 @@ class ZaloAPI(object):
 					"fileSize": str(fileSize),
 					"hdSize": str(fileSize),
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3357,7 +3545,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3371,6 +3559,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_local_image(self, imagePath, thread_id, thread_type, width=2560, height=2560, message=None, ttl=0, custom_payload=None):
 		"""Send Image to a User/Group with local file.
 			
@@ -3422,7 +3611,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3454,7 +3643,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3515,7 +3704,7 @@ class ZaloAPI(object):
 					"fileSize": "247671",
 					"hdSize": "344622",
 					"zsource": -1,
-					"jcp": json.dumps({"sendSource": 1, "convertible": "jxl"}),
+					"jcp": _util.json_dumps({"sendSource": 1, "convertible": "jxl"}),
 					"ttl": ttl,
 					"imei": self._imei
 				}
@@ -3542,6 +3731,7 @@ class ZaloAPI(object):
 			User.fromDict(uploadData, None)
 		)
 	
+	@_ratelimit.limited("message")
 	async def send_local_gif(self, gifPath, thumbnailUrl, thread_id, thread_type, gifName="vrxx.gif", width=500, height=500, ttl=0):
 		"""Send Gif to a User/Group with local file.
 			
@@ -3611,7 +3801,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3625,6 +3815,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_sticker(self, stickerId, cateId, thread_id, thread_type, ttl=0):
 		"""Send Sticker to a User/Group.
 			
@@ -3681,7 +3872,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3695,6 +3886,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 		
+	@_ratelimit.limited("message")
 	async def send_custom_sticker(
 		self,
 		staticImgUrl,
@@ -3742,12 +3934,12 @@ class ZaloAPI(object):
 				"hdUrl": staticImgUrl,
 				"width": width,
 				"height": height,
-				"properties": json.dumps({
+				"properties": _util.json_dumps({
 					"subType": 0,
 					"color": -1,
 					"size": -1,
 					"type": 3,
-					"ext": json.dumps({
+					"ext": _util.json_dumps({
 						"sSrcStr": "@STICKER",
 						"sSrcType": 0
 					})
@@ -3755,7 +3947,7 @@ class ZaloAPI(object):
 				"contentId": contentId or _util.now(),
 				"thumb_height": width,
 				"thumb_width": height,
-				"webp": json.dumps({
+				"webp": _util.json_dumps({
 					"width": width,
 					"height": height,
 					"url": animationImgUrl
@@ -3790,7 +3982,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3804,6 +3996,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_link(self, linkUrl, title, thread_id, thread_type, thumbnailUrl=None, domainUrl=None, desc=None, message=None, ttl=0):
 		"""Send link to a User/Group with url.
 			
@@ -3838,7 +4031,7 @@ class ZaloAPI(object):
 				"desc": desc or "",
 				"thumb": thumbnailUrl or "",
 				"type": 0,
-				"media": json.dumps({
+				"media": _util.json_dumps({
 					"type": 0,
 					"count": 0,
 					"mediaTitle": "",
@@ -3876,7 +4069,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3890,6 +4083,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("friend", per_thread=False)
 	async def send_report(self, user_id, reason=0, content=None):
 		"""Send report to Zalo.
 		
@@ -3937,7 +4131,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -3947,6 +4141,7 @@ class ZaloAPI(object):
 		error_message = data.get("error_message") or data.get("data")
 		raise ZaloAPIException(f"Error #{error_code} when sending requests: {error_message}")
 	
+	@_ratelimit.limited("message")
 	async def send_business_card(self, userId, qrCodeUrl, thread_id, thread_type, phone=None, ttl=0):
 		"""Send business card by user ID.
 			
@@ -3993,7 +4188,7 @@ class ZaloAPI(object):
 			payload["params"]["visibility"] = 0
 			payload["params"]["grid"] = str(thread_id)
 		
-		payload["params"]["msgInfo"] = json.dumps(payload["params"]["msgInfo"])
+		payload["params"]["msgInfo"] = _util.json_dumps(payload["params"]["msgInfo"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -4006,7 +4201,7 @@ class ZaloAPI(object):
 			
 			if isinstance(results, str):
 				try:
-					results = json.loads(results)
+					results = _util.json_loads(results)
 				except:
 					results = {"error_code": 1337, "error_message": results}
 			
@@ -4124,7 +4319,7 @@ class ZaloAPI(object):
 			payload["params"]["msgInfos"]["grid"] = str(destination_id)
 			payload["params"]["imei"] = self._imei
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -4199,7 +4394,7 @@ class ZaloAPI(object):
 		else:
 			raise ZaloUserError("Thread type is invalid")
 		
-		payload["params"]["msgInfos"] = json.dumps(payload["params"]["msgInfos"])
+		payload["params"]["msgInfos"] = _util.json_dumps(payload["params"]["msgInfos"])
 		payload["params"] = self._encode(payload["params"])
 		
 		data = await self._post(url, params=params, data=payload)
@@ -4243,9 +4438,29 @@ class ZaloAPI(object):
 			"Cookie": raw_cookies,
 		}
 
+		ws_loop = asyncio.new_event_loop()
+		commands = _offload.commands(self, ZaloAPI, {601: "on_event"})
+		reader = _offload.FrameReader(getattr(self, "ws_key", None), self._offload, commands=commands)
+		jobs = queue.SimpleQueue()
+		
+		def dispatch():
+			# The only thread running ws_loop: websocket and decoder callbacks
+			# queue their work here instead of driving the loop themselves.
+			asyncio.set_event_loop(ws_loop)
+			while True:
+				job = jobs.get()
+				if job is None:
+					return
+				
+				try:
+					job()
+				except Exception as e:
+					logger.error(f"Listener callback failed: {e}")
+		
+		
 		def onOpenCallback(ws):
 			self.listening = True
-			asyncio.run(self.on_listening())
+			jobs.put(lambda: ws_loop.run_until_complete(self.on_listening()))
 		
 		
 		def onCloseCallback(ws, status_code, msg):
@@ -4253,11 +4468,24 @@ class ZaloAPI(object):
 		
 		
 		def onErrorCallback(ws, error):
-			asyncio.run(self.on_error_callback(error))
+			jobs.put(lambda: ws_loop.run_until_complete(self.on_error_callback(error)))
+		
+		
+		def onFrame(frame):
+			ws_loop.run_until_complete(self._handler_listen(frame))
+		
+		
+		def onFrameError(error):
+			ws_loop.run_until_complete(self.on_error_callback(error))
 		
 		
 		def onMessageCallback(ws, message):
-			asyncio.run(self._handler_listen(message))
+			if not isinstance(message, bytes) or message.find(b"eventId", 4) != -1:
+				return
+			
+			# Offloaded frames are handed over once decoded, together with the
+			# frames queued behind them, on the dispatcher thread.
+			reader.put(message).add_done_callback(lambda _: jobs.put(lambda: reader.drain(onFrame, onFrameError)))
 		
 		
 		ws = websocket.WebSocketApp(
@@ -4276,7 +4504,19 @@ class ZaloAPI(object):
 			if not isinstance(reconnect, int):
 				reconnect = 5
 			
-			ws.run_forever(reconnect=reconnect)
+			# Callbacks share one event loop so the pooled HTTP session is
+			# reused between frames instead of being rebuilt for each one.
+			dispatcher = threading.Thread(target=dispatch, name="zlapi-dispatch", daemon=True)
+			dispatcher.start()
+			try:
+				ws.run_forever(reconnect=reconnect)
+			finally:
+				reader.close()
+				jobs.put(None)
+				dispatcher.join()
+				asyncio.set_event_loop(ws_loop)
+				ws_loop.run_until_complete(self._state.close())
+				ws_loop.close()
 		
 		try:
 			await asyncio.get_event_loop().run_in_executor(None, ws_run_forever)
@@ -4288,26 +4528,13 @@ class ZaloAPI(object):
 			os.kill(pid, signal.SIGTERM)
 	
 	
-	async def _handler_listen(self, data):
+	async def _handler_listen(self, frame):
 		loop = self.load_loop()
 		
-		if not isinstance(data, bytes):
-			return
-		
 		try:
-			encoded_header = data[:4]
-			version, cmd, subCmd = _util.getHeader(encoded_header)
-
-			data_to_decode = data[4:]
-			decoded_data = data_to_decode.decode("utf-8")
-			if not decoded_data or "eventId" in decoded_data:
-				return
-			
-			if not isinstance(decoded_data, dict):
-				parsed = json.loads(decoded_data)
-			
-			if version == 1 and cmd == 1 and subCmd == 1 and "key" in parsed:
-				self.ws_key = parsed["key"]
+			version, cmd, subCmd, parsed_data = frame
+			if version == 1 and cmd == 1 and subCmd == 1 and "key" in parsed_data:
+				self.ws_key = parsed_data["key"]
 				
 				if hasattr(self, "ping_interval") and self.ping_interval:
 					self.ping_interval.cancel()
@@ -4315,10 +4542,9 @@ class ZaloAPI(object):
 				self.ws_ping_scheduler()
 				return
 			
-			if not hasattr(self, "ws_key"):
+			if parsed_data is None:
 				return logger.error("Unable to decrypt data because key not found")
 			
-			parsed_data = _util.zws_decode(parsed, self.ws_key)
 			if version == 1 and cmd == 3000 and subCmd == 0:
 				logger.warning("Another connection is opened, closing this one")
 				self.ws.close()
@@ -4327,9 +4553,10 @@ class ZaloAPI(object):
 			
 			elif version == 1 and cmd == 501 and subCmd == 0:
 				user_msgs = parsed_data["data"]["msgs"]
+				batch = []
 				for message in user_msgs:
-					msg_obj = MessageObject.fromDict(message, None)
-					context = ContextObject.fromDict({
+					msg_obj = CompactMessageObject.fromDict(message, None)
+					context = CompactContextObject.fromDict({
 						"message_id": msg_obj.msgId,
 						"author_id": str(int(msg_obj.uidFrom) or self.user_id),
 						"message": msg_obj.content,
@@ -4337,14 +4564,20 @@ class ZaloAPI(object):
 						"thread_id": str(int(msg_obj.uidFrom) or self.user_id),
 						"thread_type": ThreadType.USER,
 					})
-					
-					await self.onMessage(context)
+					batch.append(context)
+				
+				[
+					self._submit_messages(batch, ThreadType.USER)
+					if self.thread else
+					await self.on_messages(batch, ThreadType.USER)
+				]
 			
 			elif version == 1 and cmd == 521 and subCmd == 0:
 				group_msgs = parsed_data["data"]["groupMsgs"]
+				batch = []
 				for message in group_msgs:
-					msg_obj = MessageObject.fromDict(message, None)
-					context = ContextObject.fromDict({
+					msg_obj = CompactMessageObject.fromDict(message, None)
+					context = CompactContextObject.fromDict({
 						"message_id": msg_obj.msgId,
 						"author_id": str(int(msg_obj.uidFrom) or self.user_id),
 						"message": msg_obj.content,
@@ -4352,8 +4585,13 @@ class ZaloAPI(object):
 						"thread_id": str(int(msg_obj.idTo) or self.user_id),
 						"thread_type": ThreadType.GROUP,
 					})
-					
-					await self.onMessage(context)
+					batch.append(context)
+				
+				[
+					self._submit_messages(batch, ThreadType.GROUP)
+					if self.thread else
+					await self.on_messages(batch, ThreadType.GROUP)
+				]
 			
 			elif version == 1 and cmd == 601 and subCmd == 0:
 				controls = parsed_data["data"].get("controls", [])
@@ -4363,12 +4601,12 @@ class ZaloAPI(object):
 						if control["content"]["act"] == "join_reject":
 							continue
 						
-						groupEventData = json.loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
+						groupEventData = _util.json_loads(control["content"]["data"]) if isinstance(control["content"]["data"], str) else control["content"]["data"]
 						groupEventType = _util.getGroupEventType(control["content"]["act"])
 						context = {"event_data": groupEventData, "event_type": groupEventType}
 						context = EventObject.fromDict(context)
 						[
-							self.run_in_thread(self.on_event, context)
+							self.run_in_lane(str(groupEventData.get("groupId")), self.on_event, context)
 							if self.thread else
 							await self.on_event(context)
 						]
@@ -4378,23 +4616,23 @@ class ZaloAPI(object):
 				reactGroups = parsed_data["data"].get("reactGroups", [])
 				
 				for react in reacts:
-					react["content"] = json.loads(react["content"])
-					msgObj = MessageObject.fromDict(react, None)
+					react["content"] = _util.json_loads(react["content"])
+					msgObj = CompactMessageObject.fromDict(react, None)
 					context = {"message_id": msgObj.msgId, "author_id": str(int(msgObj.uidFrom) or self.user_id), "message": msgObj.content, "message_object": msgObj, "thread_id": str(int(msgObj.uidFrom) or self.user_id), "thread_type": ThreadType.USER}
-					context = ContextObject.fromDict(context)
+					context = CompactContextObject.fromDict(context)
 					[
-						self.run_in_thread(self.onMessage, context)
+						self.run_in_lane(str(context.thread_id), self.onMessage, context)
 						if self.thread else
 						await self.onMessage(context)
 					]
 				
 				for reactGroup in reactGroups:
-					reactGroup["content"] = json.loads(reactGroup["content"])
-					msgObj = MessageObject.fromDict(reactGroup, None)
+					reactGroup["content"] = _util.json_loads(reactGroup["content"])
+					msgObj = CompactMessageObject.fromDict(reactGroup, None)
 					context = {"message_id": msgObj.msgId, "author_id": int(msgObj.uidFrom) or self.user_id, "message": msgObj.content, "message_object": msgObj, "thread_id": int(msgObj.idTo) or self.user_id, "thread_type": ThreadType.GROUP}
-					context = ContextObject.fromDict(context)
+					context = CompactContextObject.fromDict(context)
 					[
-						self.run_in_thread(self.onMessage, context)
+						self.run_in_lane(str(context.thread_id), self.onMessage, context)
 						if self.thread else
 						await self.onMessage(context)
 					]
@@ -4418,7 +4656,7 @@ class ZaloAPI(object):
 			"data": {"eventId": int(time.time() * 1000)}
 		}
 		
-		encoded_data = json.dumps(payload["data"]).encode()
+		encoded_data = _util.json_dumps(payload["data"]).encode()
 		data_length = len(encoded_data)
 		header = struct.pack("<BIB", payload["version"], payload["cmd"], payload["subCmd"])
 		data = header + encoded_data
@@ -4516,6 +4754,34 @@ class ZaloAPI(object):
 		logger.info("{} from {} in {}".format(ctx.message, ctx.thread_id, ctx.thread_type.name))
 	
 	
+	def _submit_messages(self, batch, thread_type):
+		"""Queue ``batch`` to `on_messages` with `run_in_lane`, one call per conversation."""
+		for thread_id, contexts in _executor.lanes(batch, lambda ctx: str(ctx.thread_id)).items():
+			self.run_in_lane(thread_id, self.on_messages, contexts, thread_type)
+	
+	
+	async def on_messages(self, batch, thread_type=ThreadType.USER):
+		"""Called with the messages received in one websocket frame.
+
+		When ``self.thread`` is set, the frame is split by conversation: the messages
+		of each thread get their own call with `run_in_lane`, so calls of one thread
+		run in order and calls of different threads in parallel.
+
+		Override it to handle a burst at once (e.g. one database write per frame).
+		By default, each message is passed on to `on_message` (and the registered handlers).
+
+		Args:
+			batch (list): Contexts of the messages, oldest first
+			thread_type (ThreadType): Type of thread that the messages were sent to
+		"""
+		for ctx in batch:
+			try:
+				await self.onMessage(ctx)
+			except Exception as e:
+				# One failing message does not cost the rest of the batch
+				await self.on_error_callback(e)
+	
+	
 	async def on_event(self, ctx):
 		"""Called when the client listening, and some events occurred.
 
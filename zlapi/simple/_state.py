@@ -4,17 +4,25 @@ import random
 import asyncio
 import aiohttp
 
-from .. import _util, _exception
+from .. import _util, _exception, _transport, _retry
 
 class State(object):
-	def __init__(cls):
+	def __init__(cls, transport=None, **connector_options):
 		cls._config = {}
+		cls._codec = None
 		cls._headers = _util.HEADERS
 		cls._cookies = _util.COOKIES
+		cls._transport = transport or _transport.AiohttpTransport(**connector_options)
 		cls.user_id = None
 		cls.user_imei = None
 		cls._loggedin = False
 	
+	async def __aenter__(cls):
+		return cls
+	
+	async def __aexit__(cls, *exc_info):
+		await cls.close()
+	
 	def is_logged_in(cls):
 		return cls._loggedin
 	
@@ -24,21 +32,32 @@ class State(object):
 	def set_secret_key(cls, secret_key):
 		cls._config["secret_key"] = secret_key
 	
+	def get_codec(cls):
+		secret_key = cls._config.get("secret_key")
+		if cls._codec is None or cls._codec.key != secret_key:
+			cls._codec = _util.Codec(secret_key)
+		
+		return cls._codec
+	
 	async def get_cookies(cls):
 		return cls._cookies
 	
 	async def get_secret_key(cls):
 		return cls._config.get("secret_key")
 	
+	async def prewarm(cls, families=None, connections=1):
+		return await cls._transport.prewarm(families, connections)
+	
+	async def close(cls):
+		await cls._transport.close()
+	
 	async def _get(cls, *args, **kwargs):
-		async with aiohttp.ClientSession() as session:
-			async with session.get(*args, **kwargs, headers=cls._headers, cookies=cls._cookies) as response:
-				return await response.json(content_type=None)
+		_retry.mark_attempt(kwargs.get("params"))
+		return await cls._transport.request("GET", *args, **kwargs, headers=cls._headers, cookies=cls._cookies)
 		
 	async def _post(cls, *args, **kwargs):
-		async with aiohttp.ClientSession() as session:
-			async with session.post(*args, **kwargs, headers=cls._headers, cookies=cls._cookies) as response:
-				return await response.json(content_type=None)
+		_retry.mark_attempt(kwargs.get("params"))
+		return await cls._transport.request("POST", *args, **kwargs, headers=cls._headers, cookies=cls._cookies)
 	
 	async def login(cls, phone, password, imei, session_cookies=None, user_agent=None):
 		if cls._cookies and cls._config.get("secret_key"):